@@ -0,0 +1,66 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Benchmark of Block.build on contents of growing size.
+
+Run this script directly:
+    python benchmarks/block_build.py
+
+The time per line should remain roughly constant from one size to
+the next, showing that building a hierarchy is linear.
+
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+        __file__))))
+
+from corpus import generate_lines
+from croissant.organization.block import Block
+
+SIZES = (1000, 10000, 100000, 1000000)
+
+def bench(nb_lines):
+    """Build a block of 'nb_lines' lines and return the elapsed time."""
+    content = generate_lines(nb_lines)
+    begin = time.perf_counter()
+    Block.build(content)
+    return time.perf_counter() - begin
+
+def main():
+    print("{:>10} {:>12} {:>14}".format("lines", "seconds", "usec/line"))
+    for nb_lines in SIZES:
+        elapsed = bench(nb_lines)
+        print("{:>10} {:>12.4f} {:>14.3f}".format(nb_lines, elapsed,
+                elapsed / nb_lines * 1e6))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Benchmark of the memory used by a hierarchy of blocks.
+
+Run this script directly:
+    python benchmarks/block_memory.py
+
+The content of a large generated story is built with Block.build and
+the memory allocated for the hierarchy is measured with tracemalloc.
+Every line is then accessed through __getitem__, to measure the
+memory allocated for the line views as well.
+
+"""
+
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+        __file__))))
+
+from corpus import generate_lines
+from croissant.organization.block import Block
+from croissant.organization.flat import FlatBlock
+
+SIZES = (10000, 100000, 500000)
+
+def browse(block):
+    """Access every line of the block through __getitem__."""
+    for i, child in enumerate(block):
+        if isinstance(child, str):
+            block[i]
+        else:
+            browse(child)
+
+def bench(block_class, nb_lines):
+    """Return the memory and time to build and browse a block."""
+    content = generate_lines(nb_lines)
+    tracemalloc.start()
+    begin = time.perf_counter()
+    block = block_class.build(content)
+    built = tracemalloc.get_traced_memory()[0]
+    browse(block)
+    browsed = tracemalloc.get_traced_memory()[0]
+    elapsed = time.perf_counter() - begin
+    tracemalloc.stop()
+    return len(content), built, browsed, elapsed
+
+def main():
+    for block_class in (Block, FlatBlock):
+        print(block_class.__name__)
+        show(block_class)
+        print()
+
+    print("Pickled FlatBlock")
+    for nb_lines in SIZES:
+        content = generate_lines(nb_lines)
+        size = len(pickle.dumps(FlatBlock.build(content)))
+        print("{:>8} {:>12} {:>12}".format(nb_lines, len(content), size))
+
+def show(block_class):
+    """Display the results for a block class."""
+    print("{:>8} {:>12} {:>12} {:>12} {:>12} {:>9}".format("lines",
+            "source (B)", "built (B)", "browsed (B)", "built B/line",
+            "seconds"))
+    for nb_lines in SIZES:
+        size, built, browsed, elapsed = bench(block_class, nb_lines)
+        print("{:>8} {:>12} {:>12} {:>12} {:>12.1f} {:>9.3f}".format(
+                nb_lines, size, built, browsed, built / nb_lines,
+                elapsed))
+
+if __name__ == "__main__":
+    main()
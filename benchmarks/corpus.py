@@ -0,0 +1,93 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Module containing helpers to generate large corpora for benchmarks.
+
+The generated content follows the structure of a '.feature' file:  a
+title, an indented description and as many scenarios as needed.
+
+"""
+
+def generate_story(nb_scenarios, title="A generated feature",
+        nb_values=None):
+    """Return the content of a story with 'nb_scenarios' scenarios.
+
+    Each scenario spans five lines (title, given, and, when, then)
+    followed by a blank line.  If 'nb_values' is set, the numbers of
+    the steps are taken modulo this value, so that steps repeat.
+
+    """
+    lines = ["Feature: " + title, "    A generated description", ""]
+    for i in range(nb_scenarios):
+        value = i if nb_values is None else i % nb_values
+        lines.append("Scenario: scenario number {}".format(i))
+        lines.append("    Given a number {}".format(value))
+        lines.append("    And another number {}".format(value + 1))
+        lines.append("    When I add them")
+        lines.append("    Then I get {}".format(2 * value + 1))
+        lines.append("")
+
+    return "\n".join(lines)
+
+def generate_lines(nb_lines, title="A generated feature"):
+    """Return the content of a story of about 'nb_lines' lines."""
+    return generate_story(max(1, nb_lines // 6), title)
+
+def generate_steps(class_name="Addition", delay=0):
+    """Return the content of a step module for the generated stories.
+
+    If 'delay' is set, the import of the module sleeps for that many
+    seconds, to simulate a module importing heavy dependencies.
+
+    """
+    lines = [
+        "import time",
+        "",
+        "from croissant.step import *",
+        "",
+        "time.sleep({})".format(delay),
+        "",
+        "class {}(BaseStep):".format(class_name),
+        "",
+        "    @context(r\"a number (\\d+)\")",
+        "    def first(self, number):",
+        "        self.first = int(number)",
+        "",
+        "    @context(r\"another number (\\d+)\")",
+        "    def second(self, number):",
+        "        self.second = int(number)",
+        "",
+        "    @event(\"I add them\")",
+        "    def add(self):",
+        "        self.result = self.first + self.second",
+        "",
+        "    @postcondition(r\"I get (\\d+)\")",
+        "    def check(self, result):",
+        "        self.assertEqual(self.result, int(result))",
+    ]
+    return "\n".join(lines) + "\n"
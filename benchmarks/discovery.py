@@ -0,0 +1,106 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Benchmark of the discovery of steps and stories.
+
+Run this script directly:
+    python benchmarks/discovery.py
+
+A temporary tree of 50,000 empty files (stories, steps and other
+files) is browsed with the previous method (os.listdir and
+os.path.isdir), with os.scandir, then with a manifest (first to
+write it, then to use it).
+
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+        __file__))))
+
+from croissant.story.discovery import Discovery
+
+NB_DIRECTORIES = 500
+NB_FILES = 100
+
+def find_with_listdir(root, directory=None, entries=None):
+    """Find the steps and stories with os.listdir and os.path.isdir."""
+    entries = [] if entries is None else entries
+    path = directory and os.path.join(root, directory) or root
+    for file in os.listdir(path):
+        rel_path = directory and os.path.join(directory, file) or file
+        if file.endswith(".py"):
+            entries.append((rel_path, "step"))
+        elif file.endswith(".feature"):
+            entries.append((rel_path, "story"))
+        elif os.path.isdir(os.path.join(path, file)):
+            find_with_listdir(root, rel_path, entries)
+
+    return entries
+
+def main():
+    root = tempfile.mkdtemp()
+    manifest = os.path.join(tempfile.mkdtemp(), "manifest")
+    try:
+        for i in range(NB_DIRECTORIES):
+            directory = os.path.join(root, "group_{}".format(i // 20),
+                    "features_{}".format(i))
+            os.makedirs(directory)
+            for j in range(NB_FILES):
+                extension = (".feature", ".py", ".txt")[j % 3]
+                with open(os.path.join(directory, "file_{}{}".format(j,
+                        extension)), "w"):
+                    pass
+
+        # The directories are not modified during the benchmark
+        for directory, dirs, files in os.walk(root):
+            os.utime(directory, ns=(0, 0))
+
+        measures = (
+            ("listdir", lambda: find_with_listdir(root)),
+            ("scandir", lambda: Discovery(root).find()),
+            ("manifest (write)", lambda: Discovery(root,
+                    manifest=manifest).find()),
+            ("manifest (read)", lambda: Discovery(root,
+                    manifest=manifest).find()),
+        )
+        for name, function in measures:
+            begin = time.perf_counter()
+            entries = function()
+            print("{:<18} {:>6} entries {:>8.3f} s".format(name,
+                    len(entries), time.perf_counter() - begin))
+    finally:
+        shutil.rmtree(root)
+        shutil.rmtree(os.path.dirname(manifest))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Benchmark of the compilation of scenarios and of the dry run.
+
+Run this script directly:
+    python benchmarks/dry_run.py
+
+A story of 20,000 scenarios is compiled (see 'StorySet.compile'),
+then its ambiguous steps are searched, without running any step.
+
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+        __file__))))
+
+from corpus import generate_steps, generate_story
+from croissant.story.story import Story
+from croissant.story.story_set import StorySet
+
+NB_SCENARIOS = 20000
+
+def main():
+    namespace = {}
+    exec(generate_steps(), namespace)
+    story_set = StorySet()
+    story_set.steps["generated"] = namespace["Addition"]
+    story_set.stories["generated"] = Story.parse("generated.feature",
+            generate_story(NB_SCENARIOS))
+    begin = time.perf_counter()
+    errors = story_set.compile()
+    print("{:<16} {:>6} scenarios {:>8.3f} s ({} undefined)".format(
+            "compile", NB_SCENARIOS, time.perf_counter() - begin,
+            len(errors)))
+    begin = time.perf_counter()
+    ambiguous = story_set.find_ambiguous()
+    print("{:<16} {:>6} scenarios {:>8.3f} s ({} ambiguous)".format(
+            "find_ambiguous", NB_SCENARIOS, time.perf_counter() - begin,
+            len(ambiguous)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Benchmark of the keyword classification.
+
+Run this script directly:
+    python benchmarks/keyword_parse.py
+
+The first measure compares, on every line of a generated story, the
+classifier with the previous method (asking each keyword in turn).
+The second one parses a story of 1,000,000 lines.
+
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+        __file__))))
+
+from corpus import generate_lines
+from croissant.language.keyword import get_classifier, keywords
+from croissant.story.story import Story
+
+NB_LINES = 1000000
+
+def parse_with_keywords(lines, symbol="en"):
+    """Find the keyword of each line by asking each keyword."""
+    paths = ("story.title", "scenario.title", "scenario.given",
+            "scenario.and", "scenario.when", "scenario.then")
+    for line in lines:
+        for path in paths:
+            if keywords[path].parse(symbol, line) is not None:
+                break
+
+def parse_with_classifier(lines, symbol="en"):
+    """Find the keyword of each line with the classifier."""
+    classify = get_classifier(symbol).classify
+    for line in lines:
+        classify(line)
+
+def main():
+    content = generate_lines(NB_LINES)
+    lines = [line.strip() for line in content.splitlines() if line.strip()]
+    for function in (parse_with_keywords, parse_with_classifier):
+        begin = time.perf_counter()
+        function(lines)
+        print("{:<24} {:>8} lines {:>8.3f} s".format(function.__name__,
+                len(lines), time.perf_counter() - begin))
+
+    begin = time.perf_counter()
+    story = Story.parse("generated.feature", content)
+    print("{:<24} {:>8} lines {:>8.3f} s ({} scenarios)".format(
+            "Story.parse", NB_LINES, time.perf_counter() - begin,
+            len(story.scenarios)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Benchmark of the startup time when running a single story.
+
+Run this script directly:
+    python benchmarks/lazy_steps.py
+
+Two temporary trees are created:  one with a single story and its
+step module, one with 200 stories and step modules.  Each step module
+takes 10 ms to import.  The time to load the tree and run one story
+is measured for both.
+
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+        __file__))))
+
+from corpus import generate_steps, generate_story
+from croissant.story.story_set import StorySet
+
+DELAY = 0.01
+NB_SCENARIOS = 20
+
+def create_tree(prefix, nb_stories):
+    """Create a tree of stories and steps and return its root."""
+    root = tempfile.mkdtemp()
+    for i in range(nb_stories):
+        name = "{}_{}".format(prefix, i)
+        with open(os.path.join(root, name + ".feature"), "w") as file:
+            file.write(generate_story(NB_SCENARIOS, name))
+        with open(os.path.join(root, name + ".py"), "w") as file:
+            file.write(generate_steps(delay=DELAY))
+
+    return root
+
+def run_one(root, name):
+    """Load the tree, run one story and return the time it took."""
+    begin = time.perf_counter()
+    story_set = StorySet()
+    story_set.load(root)
+    story_set.run_story(name)
+    return time.perf_counter() - begin
+
+def main():
+    for prefix, nb_stories in (("small", 1), ("big", 200)):
+        root = create_tree(prefix, nb_stories)
+        try:
+            duration = run_one(root, prefix + "_0")
+            print("{:>4} stories {:>8.3f} s".format(nb_stories, duration))
+        finally:
+            shutil.rmtree(root)
+            while root in sys.path:
+                sys.path.remove(root)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Benchmark of the parallel parsing of stories.
+
+Run this script directly:
+    python benchmarks/parallel_load.py
+
+A temporary directory of generated stories is loaded with an increasing
+number of jobs (up to the number of cores), without cache.
+
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+        __file__))))
+
+from corpus import generate_story
+from croissant.story.story_set import StorySet
+
+NB_STORIES = 400
+NB_SCENARIOS = 200
+
+def load(root, jobs):
+    """Load the root directory and return the time it took."""
+    story_set = StorySet()
+    story_set.jobs = jobs
+    begin = time.perf_counter()
+    story_set.load(root)
+    return time.perf_counter() - begin
+
+def main():
+    root = tempfile.mkdtemp()
+    try:
+        for i in range(NB_STORIES):
+            path = os.path.join(root, "story_{}.feature".format(i))
+            with open(path, "w") as file:
+                file.write(generate_story(NB_SCENARIOS,
+                        "story {}".format(i)))
+
+        jobs = 1
+        reference = None
+        while jobs <= (os.cpu_count() or 1):
+            duration = load(root, jobs)
+            reference = reference or duration
+            print("{:>3} jobs {:>5} stories {:>8.3f} s (x{:.2f})".format(
+                    jobs, NB_STORIES, duration, reference / duration))
+            jobs *= 2
+    finally:
+        shutil.rmtree(root)
+        while root in sys.path:
+            sys.path.remove(root)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Benchmark of the scenarios run in worker processes.
+
+Run this script directly:
+    python benchmarks/parallel_run.py
+
+A temporary tree of 20 stories of 20 scenarios is created.  Each
+scenario waits 5 ms, like an acceptance test waiting for a service.
+The scenarios are run in this process, then in 2 and 4 worker
+processes (see 'story.workers').  The scenarios using the processor
+are only faster with as many cores as workers.
+
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+        __file__))))
+
+from corpus import generate_story
+from croissant.story.story_set import StorySet
+from croissant.story.workers import SUCCESS, run_parallel, run_scenario
+
+NB_STORIES = 20
+NB_SCENARIOS = 20
+DELAY = 0.005
+
+STEPS = """import time
+
+from croissant.step import *
+
+class Addition(BaseStep):
+
+    @context("a number {{number:int}}")
+    def first(self, number):
+        self.first = number
+
+    @context("another number {{number:int}}")
+    def second(self, number):
+        self.second = number
+
+    @event("I add them")
+    def add(self):
+        time.sleep({delay})
+        self.result = self.first + self.second
+
+    @postcondition("I get {{result:int}}")
+    def check(self, result):
+        self.assertEqual(self.result, result)
+"""
+
+def create_tree():
+    """Create a tree of stories and steps and return its root."""
+    root = tempfile.mkdtemp()
+    for i in range(NB_STORIES):
+        name = "parallel_{}".format(i)
+        with open(os.path.join(root, name + ".feature"), "w") as file:
+            file.write(generate_story(NB_SCENARIOS, name))
+        with open(os.path.join(root, name + ".py"), "w") as file:
+            file.write(STEPS.format(delay=DELAY))
+
+    return root
+
+def run(story_set, workers):
+    """Run the scenarios and return the time it took."""
+    begin = time.perf_counter()
+    if workers == 1:
+        results = [run_scenario(story_set, story_name, scenario) for \
+                story_name, story in story_set.stories.items() for \
+                scenario in story.scenarios]
+    else:
+        results = [result for story_name, scenario, result in \
+                run_parallel(story_set, workers)]
+
+    duration = time.perf_counter() - begin
+    assert all(result[0] == SUCCESS for result in results)
+    return duration
+
+def main():
+    root = create_tree()
+    try:
+        story_set = StorySet()
+        story_set.load(root)
+        assert not story_set.compile()
+        for workers in (1, 2, 4):
+            duration = run(story_set, workers)
+            print("{} worker(s) {:>8.3f} s".format(workers, duration))
+    finally:
+        shutil.rmtree(root)
+        while root in sys.path:
+            sys.path.remove(root)
+
+if __name__ == "__main__":
+    main()
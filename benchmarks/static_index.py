@@ -0,0 +1,105 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Benchmark of the checks of undefined steps without importing steps.
+
+Run this script directly:
+    python benchmarks/static_index.py
+
+A temporary tree of 500 stories and step modules is created, each
+step module taking 2 ms to import.  The undefined steps are found by
+importing the step modules, then by reading them (see 'StaticIndex'),
+first without the index file, then with it.
+
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+        __file__))))
+
+from corpus import generate_steps, generate_story
+from croissant.story.cache import StoryCache
+from croissant.story.story_set import StorySet
+
+DELAY = 0.002
+NB_STORIES = 500
+NB_SCENARIOS = 10
+
+def create_tree():
+    """Create a tree of stories and steps and return its root."""
+    root = tempfile.mkdtemp()
+    for i in range(NB_STORIES):
+        name = "static_{}".format(i)
+        with open(os.path.join(root, name + ".feature"), "w") as file:
+            file.write(generate_story(NB_SCENARIOS, name))
+        with open(os.path.join(root, name + ".py"), "w") as file:
+            file.write(generate_steps(delay=DELAY))
+
+    return root
+
+def check(root, static):
+    """Find the undefined steps and return the time it took.
+
+    The time to get the step classes (importing them or reading
+    them) and the total time are returned.
+
+    """
+    story_set = StorySet()
+    story_set.cache = StoryCache(root)
+    story_set.load(root)
+    begin = time.perf_counter()
+    for name in story_set.stories:
+        story_set.find_step(name, static)
+    steps = time.perf_counter() - begin
+    errors = story_set.compile(static)
+    duration = time.perf_counter() - begin
+    assert not errors
+    return steps, duration
+
+def main():
+    root = create_tree()
+    try:
+        check(root, True)
+        os.remove(os.path.join(root, "__croissant_cache__", "steps.index"))
+        for label, static in (("import", False), ("static (cold)", True),
+                ("static (warm)", True)):
+            steps, duration = check(root, static)
+            print("{:<14} steps {:>7.3f} s, total {:>7.3f} s".format(label,
+                    steps, duration))
+    finally:
+        shutil.rmtree(root)
+        while root in sys.path:
+            sys.path.remove(root)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Benchmark of the dispatch of step lines to step methods.
+
+Run this script directly:
+    python benchmarks/step_dispatch.py
+
+A step class with 1,000 context expressions is created.  The method
+of 100,000 step lines is then found by trying each expression in turn
+(the previous method) and with the index of the class.
+
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+        __file__))))
+
+from croissant.step import *
+
+NB_EXPRESSIONS = 1000
+NB_LINES = 100000
+VERBS = ("has", "owns", "sells", "buys", "wants")
+OBJECTS = ("apples", "books", "cars", "tickets", "shares")
+
+def create_step_class():
+    """Create and return a step class with many expressions."""
+    attributes = {}
+    for i in range(NB_EXPRESSIONS):
+        verb = VERBS[i % len(VERBS)]
+        thing = OBJECTS[i // len(VERBS) % len(OBJECTS)]
+        pattern = r"the customer{} {} (\d+) {}".format(i, verb, thing)
+        attributes["step_{}".format(i)] = context(pattern)(
+                lambda self, number: None)
+
+    return type("Generated", (BaseStep, ), attributes)
+
+def find_linear(expressions, message):
+    """Find the method name by trying each expression in turn."""
+    for expression, method_name in expressions.items():
+        if expression.search(message):
+            return method_name
+
+def main():
+    generator = random.Random(0)
+    begin = time.perf_counter()
+    step_class = create_step_class()
+    print("{:<12} {:>8.3f} s".format("class", time.perf_counter() - begin))
+    lines = []
+    for i in range(NB_LINES):
+        j = generator.randrange(NB_EXPRESSIONS)
+        lines.append("the customer{} {} {} {}".format(j,
+                VERBS[j % len(VERBS)], generator.randint(1, 99),
+                OBJECTS[j // len(VERBS) % len(OBJECTS)]))
+
+    expressions = step_class.contexts
+    index = step_class.context_index
+    results = {}
+    for name, function in (("linear", lambda line: find_linear(
+            expressions, line)), ("index", index.find)):
+        begin = time.perf_counter()
+        results[name] = [function(line) for line in lines]
+        print("{:<12} {:>8} lines {:>8.3f} s".format(name, NB_LINES,
+                time.perf_counter() - begin))
+
+    assert results["linear"] == results["index"]
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Benchmark of the stories composed from the same step libraries.
+
+Run this script directly:
+    python benchmarks/step_libraries.py
+
+A temporary tree is created with 3 step libraries of 100 expressions
+each and 300 stories, whose step modules all list the 3 libraries in
+'croissant_steps'.  The stories are compiled with the merged classes
+shared by the registry, then with a new registry for each story (as
+if the classes were merged for each story).
+
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+        __file__))))
+
+from corpus import generate_story
+from croissant.step.registry import StepRegistry
+from croissant.story.story_set import StorySet
+
+NB_LIBRARIES = 3
+NB_EXPRESSIONS = 100
+NB_STORIES = 300
+NB_SCENARIOS = 10
+
+def generate_library(index):
+    """Return the content of a step library."""
+    lines = ["from croissant.step import *", "",
+            "class Library{}(BaseStep):".format(index), ""]
+    for i in range(NB_EXPRESSIONS):
+        lines.append("    @context(\"library {} step {} with " \
+                "{{n:int}}\")".format(index, i))
+        lines.append("    def step_{}_{}(self, n):".format(index, i))
+        lines.append("        pass")
+        lines.append("")
+
+    if index == 0:
+        lines.extend([
+            "    @context(\"a number {number:int}\")",
+            "    def first(self, number):",
+            "        self.first = number",
+            "",
+            "    @context(\"another number {number:int}\")",
+            "    def second(self, number):",
+            "        self.second = number",
+            "",
+            "    @event(\"I add them\")",
+            "    def add(self):",
+            "        self.result = self.first + self.second",
+            "",
+            "    @postcondition(\"I get {result:int}\")",
+            "    def check(self, result):",
+            "        self.assertEqual(self.result, result)",
+        ])
+
+    return "\n".join(lines) + "\n"
+
+def create_tree():
+    """Create the tree of libraries and stories and return its root."""
+    root = tempfile.mkdtemp()
+    names = ["Library{}".format(i) for i in range(NB_LIBRARIES)]
+    for i in range(NB_LIBRARIES):
+        with open(os.path.join(root, "library_{}.py".format(i)), "w") as \
+                file:
+            file.write(generate_library(i))
+
+    imports = "".join("from library_{} import Library{}\n".format(i, i) \
+            for i in range(NB_LIBRARIES))
+    for i in range(NB_STORIES):
+        name = "story_{}".format(i)
+        with open(os.path.join(root, name + ".feature"), "w") as file:
+            file.write(generate_story(NB_SCENARIOS, name))
+        with open(os.path.join(root, name + ".py"), "w") as file:
+            file.write(imports + "\ncroissant_steps = [{}]\n".format(
+                    ", ".join(names)))
+
+    return root
+
+def compile_stories(root, shared):
+    """Compile the stories and return (time, number of classes)."""
+    story_set = StorySet()
+    story_set.load(root)
+    for name in list(sys.modules):
+        if name.startswith("story_"):
+            del sys.modules[name]
+
+    begin = time.perf_counter()
+    for name in story_set.stories:
+        if not shared:
+            story_set.registry = StepRegistry()
+
+        story_set.get_step(name)
+
+    errors = story_set.compile()
+    duration = time.perf_counter() - begin
+    assert not errors
+    classes = set(id(class_object) for class_object in \
+            story_set.steps.values())
+    return duration, len(classes)
+
+def main():
+    root = create_tree()
+    try:
+        for label, shared in (("shared", True), ("per story", False)):
+            duration, nb_classes = compile_stories(root, shared)
+            print("{:<10} {:>8.3f} s ({} merged classes)".format(label,
+                    duration, nb_classes))
+    finally:
+        shutil.rmtree(root)
+        while root in sys.path:
+            sys.path.remove(root)
+
+if __name__ == "__main__":
+    main()
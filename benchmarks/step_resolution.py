@@ -0,0 +1,89 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Benchmark of the resolution of step lines.
+
+Run this script directly:
+    python benchmarks/step_resolution.py
+
+A story of 20,000 scenarios, whose steps repeat 50 different values,
+is run twice:  first by finding the method name and calling the
+decorated method, which searches the expression again (the previous
+method), then with 'StorySet.run_scenario', which resolves each line
+once and caches the resolutions.
+
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+        __file__))))
+
+from corpus import generate_steps, generate_story
+from croissant.story.story import Story
+from croissant.story.story_set import StorySet
+
+NB_SCENARIOS = 20000
+NB_VALUES = 50
+
+def run_twice(story_set, story_name, scenario):
+    """Run a scenario, searching each step line twice."""
+    class_object = story_set.steps[story_name]
+    step = class_object(scenario)
+    find = story_set.find_expression
+    for context in scenario.contexts:
+        getattr(step, find(class_object.contexts, scenario,
+                context))(context)
+
+    getattr(step, find(class_object.events, scenario,
+            scenario.event))(scenario.event)
+    for postcondition in scenario.postconditions:
+        getattr(step, find(class_object.postconditions, scenario,
+                postcondition))(postcondition)
+
+def main():
+    namespace = {}
+    exec(generate_steps(), namespace)
+    story_set = StorySet()
+    story_set.steps["generated"] = namespace["Addition"]
+    story = Story.parse("generated.feature", generate_story(NB_SCENARIOS,
+            nb_values=NB_VALUES))
+    for name, function in (("search twice", lambda scenario: run_twice(
+            story_set, "generated", scenario)), ("resolve once",
+            lambda scenario: story_set.run_scenario("generated", scenario))):
+        begin = time.perf_counter()
+        for scenario in story.scenarios:
+            function(scenario)
+
+        print("{:<14} {:>6} scenarios {:>8.3f} s".format(name,
+                len(story.scenarios), time.perf_counter() - begin))
+
+if __name__ == "__main__":
+    main()
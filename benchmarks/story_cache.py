@@ -0,0 +1,83 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Benchmark of the cache of parsed stories.
+
+Run this script directly:
+    python benchmarks/story_cache.py
+
+A temporary directory of generated stories is loaded three times:
+without cache, with an empty cache (cold) and with a filled cache
+(warm).
+
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+        __file__))))
+
+from corpus import generate_story
+from croissant.story.cache import StoryCache
+from croissant.story.story_set import StorySet
+
+NB_STORIES = 200
+NB_SCENARIOS = 200
+
+def load(root, cache):
+    """Load the root directory and return the time it took."""
+    story_set = StorySet()
+    story_set.cache = cache
+    begin = time.perf_counter()
+    story_set.load(root)
+    return time.perf_counter() - begin
+
+def main():
+    root = tempfile.mkdtemp()
+    try:
+        for i in range(NB_STORIES):
+            path = os.path.join(root, "story_{}.feature".format(i))
+            with open(path, "w") as file:
+                file.write(generate_story(NB_SCENARIOS,
+                        "story {}".format(i)))
+
+        cache = StoryCache(root)
+        for name, cache in (("no cache", None), ("cold cache", cache),
+                ("warm cache", cache)):
+            print("{:<12} {:>5} stories {:>8.3f} s".format(name,
+                    NB_STORIES, load(root, cache)))
+    finally:
+        shutil.rmtree(root)
+        sys.path.remove(root)
+
+if __name__ == "__main__":
+    main()
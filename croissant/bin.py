@@ -28,11 +28,35 @@
 
 """Module containing the bin functions (executed as entry points)."""
 
+import sys
+
 from croissant.output.console import ConsoleOutput
 
 def launch():
-    """Launch the tests with the console output."""
+    """Launch the tests with the console output.
+
+    If the first argument is 'check', the step classes are checked
+    instead (see 'check').
+
+    """
+    if len(sys.argv) > 1 and sys.argv[1] == "check":
+        del sys.argv[1]
+        check()
+        return
+
     output = ConsoleOutput()
     output.parse_args()
     output.load()
+    output.compile()
     output.run()
+    if output.watching:
+        output.watch()
+
+def check():
+    """Check the expressions of the step classes (see 'BaseOutput.check')."""
+    output = ConsoleOutput()
+    output.command = "check"
+    output.parser.prog += " check"
+    output.parse_args()
+    output.load()
+    output.check()
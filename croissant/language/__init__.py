@@ -31,4 +31,7 @@
 Sub-packages:
     keyword -- the default keywords
 
+Modules:
+    header -- the language header of files
+
 """
@@ -49,6 +49,16 @@ class LanguageSyntaxError(RuntimeError):
         return "File {}, line {}: {}".format(repr(self.file),
                 self.line, self.message)
 
+    def __reduce__(self):
+        """Pickle the exception by its attributes.
+
+        The subclasses have different constructors, so the exception
+        is rebuilt without calling them (see 'rebuild_error').  Syntax
+        errors can thus be sent by the processes parsing stories.
+
+        """
+        return (rebuild_error, (type(self), self.__dict__))
+
 
 class MissingKeyword(LanguageSyntaxError):
 
@@ -68,3 +78,38 @@ class MissingKeyword(LanguageSyntaxError):
 
         message = "expecting the {} keyword".format(repr(keyword))
         LanguageSyntaxError.__init__(self, file, line, message)
+
+
+class EmptyFile(LanguageSyntaxError):
+
+    """Exception raised when a file doesn't contain anything to read.
+
+    Parameters:
+        file -- the empty file
+
+    """
+
+    def __init__(self, file):
+        LanguageSyntaxError.__init__(self, file, 1, "the file is empty")
+
+
+class StructureError(LanguageSyntaxError):
+
+    """Exception raised when the structure of a file is not valid.
+
+    Parameters:
+        file -- the file where the error occured
+        line -- the line where the error occured
+        message -- the error message
+
+    """
+
+    pass
+
+
+def rebuild_error(cls, attributes):
+    """Rebuild a syntax error from its class and attributes."""
+    error = cls.__new__(cls)
+    RuntimeError.__init__(error)
+    error.__dict__.update(attributes)
+    return error
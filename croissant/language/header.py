@@ -0,0 +1,63 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Module containing the functions to read the language of a file.
+
+A story file can specify, on its first line, the language in which
+it is written:
+    # language: fr
+    Fonctionnalité: ...
+
+If no language is specified, the default language is used (see the
+'language' attribute of StorySet and the '--language' option of
+the outputs).
+
+"""
+
+import re
+
+from croissant.language.keyword import keywords
+
+DEFAULT_LANGUAGE = "en"
+RE_LANGUAGE = re.compile(r"^#\s*language\s*:\s*(\S+)\s*$", re.IGNORECASE)
+
+def read_language(line):
+    """Return the language specified in the line, or None."""
+    match = RE_LANGUAGE.match(line.strip())
+    if match is None:
+        return None
+
+    return match.group(1).lower()
+
+def get_languages():
+    """Return the set of the languages having keywords."""
+    languages = set()
+    for keyword in keywords.values():
+        languages.update(keyword.languages)
+
+    return languages
@@ -29,6 +29,7 @@
 """Package containing the keywords and their default translation."""
 
 from croissant.language.keyword.meta import keywords
+from croissant.language.keyword.classifier import get_classifier
 from croissant.language.keyword.scenario_and import ScenarioAndKeyword
 from croissant.language.keyword.scenario_given import ScenarioGivenKeyword
 from croissant.language.keyword.scenario_then import ScenarioThenKeyword
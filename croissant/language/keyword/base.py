@@ -34,7 +34,7 @@ be described in the documentation.
 
 """
 
-from croissant.language.keyword.meta import MetaKeyword
+from croissant.language.keyword.meta import MetaKeyword, classifiers
 
 class BaseKeyword(metaclass=MetaKeyword):
 
@@ -85,6 +85,7 @@ class BaseKeyword(metaclass=MetaKeyword):
 
         expressions = [possibility.lower() for possibility in possibilities]
         self.languages[symbol] = expressions
+        classifiers.clear()
 
     def parse(self, symbol, line):
         """Parse the specified line.
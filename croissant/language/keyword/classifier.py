@@ -0,0 +1,101 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Module containing the keyword classifier, described below."""
+
+import re
+
+from croissant.language.keyword.meta import classifiers, keywords
+
+class KeywordClassifier:
+
+    """Classifier finding the keyword of a line in a single pass.
+
+    Instead of asking each keyword whether it matches a line (see
+    'BaseKeyword.parse'), a classifier is built for a language with
+    all the keywords of the 'keywords' dictionary.  Their expressions
+    are compiled in a single anchored regular expression, the longest
+    expressions first.  For instance:
+    >>> classifier = get_classifier("en")
+    >>> classifier.classify("Given a number 3")
+    ('scenario.given', 'a number 3')
+    >>> classifier.classify("Some description")
+    (None, 'Some description')
+
+    Only the beginning of the line (as long as the longest expression)
+    is lowercased.  Classifiers should not be created directly:  use
+    the 'get_classifier' function, which keeps them.
+
+    """
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.paths = {}
+        for path, keyword in sorted(keywords.items()):
+            for possibility in keyword.languages.get(symbol, ()):
+                self.paths.setdefault(possibility, path)
+
+        if not self.paths:
+            raise ValueError("no keyword is defined for the {} " \
+                    "language".format(symbol))
+
+        possibilities = sorted(self.paths, key=len, reverse=True)
+        self.length = len(possibilities[0])
+        self.expression = re.compile("|".join(re.escape(possibility) \
+                for possibility in possibilities))
+
+    def __repr__(self):
+        return "<KeywordClassifier for {}>".format(repr(self.symbol))
+
+    def classify(self, line):
+        """Return the keyword path and the rest of the line.
+
+        If no keyword matches, return None and the line itself.
+
+        """
+        match = self.expression.match(line[:self.length].lower())
+        if match is None:
+            return None, line
+
+        possibility = match.group()
+        return self.paths[possibility], line[len(possibility):].lstrip()
+
+
+def get_classifier(symbol):
+    """Return the classifier of the specified language.
+
+    Classifiers are created once and kept until a keyword or a
+    language is added.
+
+    """
+    classifier = classifiers.get(symbol)
+    if classifier is None:
+        classifier = KeywordClassifier(symbol)
+        classifiers[symbol] = classifier
+
+    return classifier
@@ -29,6 +29,7 @@
 """Module containing the metaclass for keywords, named MetaKeyword."""
 
 keywords = {}
+classifiers = {}
 
 class MetaKeyword(type):
 
@@ -38,7 +39,8 @@ class MetaKeyword(type):
     keywords into the 'keywords' dictionary.  When a class using this
     metaclass is imported, a new instance of this class is created
     and stored into the 'keywords' dictionary: the key of the new
-    entry is the new class 'path'.
+    entry is the new class 'path'.  Since the keywords change, the
+    compiled classifiers (see the 'classifier' module) are cleared.
 
     """
 
@@ -47,3 +49,4 @@ class MetaKeyword(type):
         if cls.path:
             instance = cls()
             keywords[cls.path] = instance
+            classifiers.clear()
@@ -35,5 +35,6 @@ file structure can be validated by block patterns.
 
 Sub-modules:
     block -- a general block structure
+    flat -- a flat storage of block structures
 
 """
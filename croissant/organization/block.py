@@ -28,6 +28,8 @@
 
 """Module containing the Block class, described below."""
 
+import mmap
+
 class Block:
 
     """A block of text built by indentation level.
@@ -66,7 +68,7 @@ class Block:
 
     Once the hierarchy is created, you can manipulate each contained
     blocks using the standard methods:
-        __getitem__ to select a sub-block (always a Block object)
+        __getitem__ to select a sub-block (a Block or Line object)
         __iter__ to browse a block
         __len__ to know how long is the block
 
@@ -74,8 +76,15 @@ class Block:
         start_at -- the line number where the block starts
         end_at -- the line number at which the block ends.
 
+    Blocks are numerous when a large content is parsed:  they use
+    slots to remain small and the line views (see the Line class)
+    are created once and kept by their parent.
+
     """
 
+    __slots__ = ("_children", "_nb_lines", "_lines", "start_at",
+            "indentation", "parent", "previous", "next")
+
     @staticmethod
     def get_indentation_from_line(line, indentation):
         """Return the found indentation."""
@@ -95,92 +104,184 @@ class Block:
 
         return symbole * i
 
+    @staticmethod
+    def iter_lines(content, encoding="utf-8"):
+        """Return an iterator on the lines of the specified content.
+
+        The content can be:
+            A string -- it is split into lines
+            A memory-mapped file -- lines are read and decoded
+                    one at a time, without changing the file position
+            Bytes -- they are split into lines and decoded
+            An iterable of lines -- like a list of strings or a file
+                    object, either in text or binary mode.
+
+        Line endings are removed from the returned lines.
+
+        """
+        if isinstance(content, str):
+            return iter(content.splitlines())
+        elif isinstance(content, mmap.mmap):
+            return Block._iter_mapped_lines(content, encoding)
+        elif isinstance(content, (bytes, bytearray)):
+            return (line.decode(encoding) for line in content.splitlines())
+
+        return Block._iter_file_lines(content, encoding)
+
+    @staticmethod
+    def _iter_mapped_lines(mapped, encoding):
+        """Yield the decoded lines of a memory-mapped file."""
+        begin = 0
+        size = len(mapped)
+        while begin < size:
+            end = mapped.find(b"\n", begin)
+            if end < 0:
+                end = size
+
+            yield mapped[begin:end].decode(encoding).rstrip("\r")
+            begin = end + 1
+
+    @staticmethod
+    def _iter_file_lines(lines, encoding):
+        """Yield the lines of an iterable, without line endings."""
+        for line in lines:
+            if isinstance(line, (bytes, bytearray)):
+                line = line.decode(encoding)
+
+            yield line.rstrip("\r\n")
+
     @classmethod
     def build(cls, content, start_at=0, indentation=""):
         """Build a hierarchy of blocks based on the specified content.
 
-        The content must be a string, for instance extracted from
-        a file.  Each line is:
+        The content can be a string (for instance extracted from a
+        file), an iterable of lines (like a list or a file object) or
+        a memory-mapped file (see 'iter_lines').  Each line is:
         *   Of the same indentation as the previous one.  In this case,
             a new block with this line is simply added to the current
             block.
         *   Of a sub-level of indentation.  In this case, a new block is
             built based on this level of indentation.
+        *   Of a lower level of indentation.  In this case, the current
+            block is closed and the line is added to the block with
+            the same indentation.
+
+        The lines are read only once:  a stack of opened blocks is
+        kept and each line is added to the block on top of it, so that
+        building is linear in the size of the content.  If the content
+        is a file, its lines are read when needed and the file is never
+        loaded in memory as a whole.
 
         """
         block = cls()
         block.start_at = start_at
         block.indentation = indentation
-        i = 0
-        lines = content.splitlines()
-        while i < len(lines):
-            try:
-                line = lines[i]
-            except IndexError:
+        stack = [block]
+        for i, line in enumerate(cls.iter_lines(content)):
+            if line.strip() == "":
+                continue
+
+            current = stack[-1]
+            line_indentation = cls.get_indentation_from_line(line,
+                    current.indentation)
+            while len(line_indentation) < len(current.indentation):
+                stack.pop()
+                if not stack:
+                    break
+
+                current = stack[-1]
+                line_indentation = cls.get_indentation_from_line(line,
+                        current.indentation)
+
+            if not stack:
+                # The line is less indented than the root block
                 break
 
-            line_indentation = Block.get_indentation_from_line(line,
-                    indentation)
-            if line.strip() == "":
-                i += 1
-            elif line_indentation == indentation:
-                sub_block = Block()
-                line = line[len(indentation):]
-                sub_block._children.append(line)
+            if len(line_indentation) > len(current.indentation):
+                # A new sub-level of indentation
+                sub_block = cls()
                 sub_block.start_at = start_at + i
                 sub_block.indentation = line_indentation
-                block._children.append(sub_block)
-                i += 1
-            elif len(line_indentation) > len(indentation):
-                sub_content = "\n".join(lines[i:])
-                sub_block = Block.build(sub_content, start_at=start_at + i,
-                        indentation=line_indentation)
-                block._children.append(sub_block)
-                i += sub_block.nb_lines
-            else:
-                break
+                current.add_child(sub_block)
+                stack.append(sub_block)
+                current = sub_block
 
-        previous = None
-        for child in block._children:
-            child.parent = block
-            child.previous = previous
-            if previous is not None:
-                previous.next = child
-            previous = child
+            line_block = cls()
+            line_block._children = [line[len(line_indentation):]]
+            line_block._nb_lines = 1
+            line_block.start_at = start_at + i
+            line_block.indentation = line_indentation
+            current.add_child(line_block)
 
         return block
 
     def __init__(self):
         self._children = []
+        self._nb_lines = 0
+        self._lines = None
         self.start_at = -1
         self.indentation = ""
         self.parent = None
         self.previous = None
         self.next = None
 
+    def add_child(self, child):
+        """Add a child block and link it to its parent and siblings.
+
+        This method is used while building a hierarchy:  the child is
+        appended and its 'parent', 'previous' and 'next' attributes
+        are updated.
+
+        """
+        previous = None
+        if self._children:
+            previous = self._children[-1]
+
+        child.parent = self
+        child.previous = previous
+        if previous is not None:
+            previous.next = child
+
+        self._children.append(child)
+        self._update_nb_lines(child._nb_lines)
+
     def __len__(self):
         return len(self._children)
 
     def __getitem__(self, item):
-        lines = list(self._children)
-        line = None
-        try:
-            line = lines[item]
-        except IndexError:
-            pass
+        child = self._children[item]
+        if child and isinstance(child, str):
+            return self._get_line(item, child)
+
+        return child
+
+    def _get_line(self, item, text):
+        """Return the view of the line of text at the specified index.
+
+        The views are cached:  if the block only contains one line
+        (the most common case), the view is stored directly.
+        Otherwise, a list of views is kept.  The cache is cleared when
+        a child is added.
+
+        """
+        lines = self._lines
+        if len(self._children) == 1:
+            if lines is None:
+                lines = self._lines = Line(text, self)
 
-        if line and isinstance(line, str):
-            block = Block()
-            block.start_at = self.start_at
-            block.parent = self
-            block._children = [line]
-            return block
+            return lines
 
-        return self._children[item]
+        if lines is None:
+            lines = self._lines = [None] * len(self._children)
+
+        line = lines[item]
+        if line is None:
+            line = lines[item] = Line(text, self)
+
+        return line
 
     def __iter__(self):
-        for child in self._children:
-            yield child
+        return iter(self._children)
 
     def __repr__(self):
         if len(self._children) == 1:
@@ -199,7 +300,7 @@ class Block:
             Another block
 
         """
-        if isinstance(compared_to, Block):
+        if isinstance(compared_to, (Block, Line)):
             compared_to = compared_to.display(indentation=False)
         elif isinstance(compared_to, str):
             pass
@@ -214,62 +315,248 @@ class Block:
         """Return the number of lines contained in this block.
 
         This property is recusrive:  each block can contain
-        sub-blocks that can contain sub-sub-blocks ans so on.
+        sub-blocks that can contain sub-sub-blocks ans so on.  The
+        number is not computed when read, however:  it is kept up to
+        date when children are added (see '_update_nb_lines').
 
         """
-        nb = 0
-        for line in self._children:
-            if isinstance(line, str):
-                nb += 1
-            else:
-                nb += line.nb_lines
-
-        return nb
+        return self._nb_lines
 
     @property
     def end_at(self):
         """Return the line where the block should end."""
-        return self.start_at + self.nb_lines
+        return self.start_at + self._nb_lines
+
+    @staticmethod
+    def count_lines(child):
+        """Return the number of lines of a child (block, line or string)."""
+        if isinstance(child, str):
+            return 1
+
+        return child._nb_lines
+
+    def _update_nb_lines(self, difference):
+        """Add 'difference' to the number of lines of this block.
+
+        The parent blocks are updated as well, since their number of
+        lines includes this block's.
+
+        """
+        block = self
+        while block is not None:
+            block._nb_lines += difference
+            block = block.parent
 
     def display(self, show_lines=False, indentation=True):
-        """Display this block and its children."""
-        res = ""
-        i = 0
-        nb_lines = self.nb_lines
-        for line in self:
+        """Display this block and its children.
+
+        The fragments of text are collected by the 'render' method and
+        joined once.  A block containing a single line is displayed
+        directly.
+
+        """
+        children = self._children
+        if len(children) == 1 and not show_lines:
+            child = children[0]
+            if isinstance(child, str):
+                if indentation:
+                    return self.indentation + child
+
+                return child
+
+        fragments = []
+        self.render(fragments.append, show_lines, indentation)
+        return "".join(fragments)
+
+    def write(self, file, show_lines=False, indentation=True):
+        """Write this block and its children in a file.
+
+        The file can be any object with a 'write' method.  The block
+        is written fragment by fragment, without being displayed as a
+        whole.
+
+        """
+        self.render(file.write, show_lines, indentation)
+
+    def render(self, write, show_lines=False, indentation=True):
+        """Render this block and its children.
+
+        The 'write' argument should be a callable, called with each
+        fragment of text in order.
+
+        """
+        nb_lines = self._nb_lines
+        for i, line in enumerate(self._children):
             if i != 0 and nb_lines > 1:
-                res += "\n"
+                write("\n")
 
             if isinstance(line, str):
                 if show_lines:
-                    res += str(self.start_at + i + 1).rjust(2) + " "
+                    write(str(self.start_at + i + 1).rjust(2) + " ")
 
-                if indentation:
-                    res += self.indentation
+                if indentation and self.indentation:
+                    write(self.indentation)
 
-                res += line
+                write(line)
             else:
-                res += line.display(show_lines=show_lines, indentation=indentation)
-
-            i += 1
-
-        return res
+                line.render(write, show_lines, indentation)
 
     def insert(self, child):
         """Insert the child at the beginnning of the block.
 
         If the child is a block itself, the 'start_at' attribute is
         set to the new child.  If not, the start_at is simply decreased.
+        A block is moved (see 'append').
 
         """
         if isinstance(child, Block):
             start_at = child.start_at
+            child.detach()
         else:
             start_at = self.start_at - 1
 
         self._children.insert(0, child)
+        self._lines = None
         self.start_at = start_at
+        self._link(0)
+        self._update_nb_lines(self.count_lines(child))
 
     def append(self, child):
-        """Append a child."""
+        """Append a child.
+
+        If the child is a block, it is moved:  it's removed from its
+        former parent, if any, and linked to this block and its
+        siblings.  A block has only one parent, so that the number of
+        lines of the parents remains right when it's modified.
+
+        """
+        if isinstance(child, Block):
+            child.detach()
+
         self._children.append(child)
+        self._lines = None
+        self._link(len(self._children) - 1)
+        self._update_nb_lines(self.count_lines(child))
+
+    def detach(self):
+        """Remove the block from its parent, if any."""
+        parent = self.parent
+        if parent is None:
+            return
+
+        children = parent._children
+        for i, child in enumerate(children):
+            if child is self:
+                del children[i]
+                parent._lines = None
+                parent._update_nb_lines(-self._nb_lines)
+                break
+
+        if self.previous is not None:
+            self.previous.next = self.next
+        if self.next is not None:
+            self.next.previous = self.previous
+
+        self.parent = None
+        self.previous = None
+        self.next = None
+
+    def _link(self, index):
+        """Link the child block at 'index' to this block and its siblings.
+
+        The siblings that are lines of text (strings) have no link.
+
+        """
+        children = self._children
+        child = children[index]
+        if not isinstance(child, Block):
+            return
+
+        child.parent = self
+        previous = children[index - 1] if index > 0 else None
+        following = children[index + 1] if index + 1 < len(children) else \
+                None
+        child.previous = previous if isinstance(previous, Block) else None
+        child.next = following if isinstance(following, Block) else None
+        if child.previous is not None:
+            child.previous.next = child
+        if child.next is not None:
+            child.next.previous = child
+
+
+class Line:
+
+    """A line of text contained in a block.
+
+    When a block contains a line of text (and not a sub-block), its
+    __getitem__ method returns a Line object.  It behaves like a block
+    containing only this line:  it has the 'start_at', 'parent' and
+    'nb_lines' attributes, can be displayed and compared to a string
+    or a block.  It only holds the text and its parent, though, and
+    is cached by its parent block.
+
+    """
+
+    __slots__ = ("text", "parent")
+
+    indentation = ""
+    previous = None
+    next = None
+    nb_lines = 1
+    _nb_lines = 1
+
+    def __init__(self, text, parent):
+        self.text = text
+        self.parent = parent
+
+    def __len__(self):
+        return 1
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self.text][item]
+
+        if item not in (0, -1):
+            raise IndexError("line index out of range")
+
+        return self
+
+    def __iter__(self):
+        yield self.text
+
+    def __repr__(self):
+        return "<Line {}>".format(repr(self.text))
+
+    def __str__(self):
+        return self.display(show_lines=True)
+
+    def __eq__(self, compared_to):
+        """Compare the line to a string, a block or another line."""
+        if isinstance(compared_to, (Block, Line)):
+            compared_to = compared_to.display(indentation=False)
+        elif not isinstance(compared_to, str):
+            raise TypeError("cannot compare {} to {}".format(
+                    self, compared_to))
+
+        return self.text == compared_to
+
+    @property
+    def start_at(self):
+        """Return the line number of the parent block."""
+        return self.parent.start_at
+
+    @property
+    def end_at(self):
+        """Return the line where the line ends."""
+        return self.parent.start_at + 1
+
+    def render(self, write, show_lines=False, indentation=True):
+        """Render the line (see 'Block.render')."""
+        write(self.display(show_lines, indentation))
+
+    def display(self, show_lines=False, indentation=True):
+        """Display the line."""
+        if show_lines:
+            return str(self.parent.start_at + 1).rjust(2) + " " + self.text
+
+        return self.text
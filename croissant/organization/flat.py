@@ -0,0 +1,396 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Module containing the flat storage of block hierarchies.
+
+The Block class (see the 'block' module) creates an object per line
+of text and per sub-block.  This module defines an alternative:  the
+BlockArena stores a whole hierarchy in flat parallel arrays and the
+FlatBlock objects are small views on this storage, offering the same
+navigation API as blocks.  The hierarchy is built with the
+'FlatBlock.build' class method, like 'Block.build':
+>>> block = FlatBlock.build(content)
+>>> block[0].start_at
+0
+
+Since the arena only contains a string and a few arrays of integers,
+it uses little memory and is cheap to pickle (to send it to another
+process, for instance).
+
+"""
+
+from array import array
+import re
+
+from croissant.organization.block import Block, Line
+
+# Line breaks recognized by str.splitlines
+RE_LINE_BREAK = re.compile(
+        "\r\n|[\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+
+# Number of lists of children kept by an arena (see 'get_children')
+CHILDREN_CACHE_SIZE = 8
+
+class BlockArena:
+
+    """Flat storage of a hierarchy of blocks.
+
+    Each block (or node) is identified by its index, the root being
+    at index 0.  Nodes are stored in the order of the content, a node
+    always coming before its children.  The following arrays are
+    indexed by node:
+        begins -- the offset of the node's text in the content (for
+                a container, the offset of its first line)
+        ends -- the end offset of the node's text (-1 for a container)
+        starts -- the line number where the node starts
+        depths -- the length of the node's indentation
+        parents -- the index of the parent node (-1 for the root)
+        first_children -- the index of the first child (-1 if none)
+        next_siblings -- the index of the next sibling (-1 if none)
+        previous_siblings -- the index of the previous sibling
+        sizes -- the number of lines contained in the node.
+
+    The text itself is not copied:  a line is a slice of the content,
+    after its indentation.  The lists of children are built when
+    needed and only the last ones are kept (see 'get_children').
+
+    """
+
+    def __init__(self, content, indentation=""):
+        self.content = content
+        self.indentation = indentation
+        typecode = "i" if len(content) < 2 ** 31 else "q"
+        self.begins = array(typecode)
+        self.ends = array(typecode)
+        self.starts = array(typecode)
+        self.depths = array(typecode)
+        self.parents = array(typecode)
+        self.first_children = array(typecode)
+        self.next_siblings = array(typecode)
+        self.previous_siblings = array(typecode)
+        self.sizes = array(typecode)
+        self.children = {}
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["children"] = {}
+        return state
+
+    @staticmethod
+    def iter_lines(content):
+        """Yield the (begin, end) offsets of each line in the content.
+
+        Lines are split like str.splitlines would, but the content
+        is not copied.
+
+        """
+        begin = 0
+        for match in RE_LINE_BREAK.finditer(content):
+            yield begin, match.start()
+            begin = match.end()
+
+        if begin < len(content):
+            yield begin, len(content)
+
+    def add_node(self, parent, previous, begin, end, start_at, depth):
+        """Add a new node and return its index."""
+        index = len(self.starts)
+        self.begins.append(begin)
+        self.ends.append(end)
+        self.starts.append(start_at)
+        self.depths.append(depth)
+        self.parents.append(parent)
+        self.first_children.append(-1)
+        self.next_siblings.append(-1)
+        self.previous_siblings.append(previous)
+        self.sizes.append(0)
+        if previous >= 0:
+            self.next_siblings[previous] = index
+        elif parent >= 0:
+            self.first_children[parent] = index
+
+        return index
+
+    @classmethod
+    def build(cls, content, start_at=0, indentation=""):
+        """Build the arena of a hierarchy of blocks.
+
+        The rules are the same as in 'Block.build':  blank lines are
+        ignored, a line more indented than the current block opens a
+        sub-block and a line less indented closes it.
+
+        """
+        arena = cls(content, indentation)
+        get_indentation = Block.get_indentation_from_line
+        root = arena.add_node(-1, -1, -1, -1, start_at, len(indentation))
+
+        # The stack contains [index, indentation, last child, lines]
+        stack = [[root, indentation, -1, 0]]
+        nb_lines = 0
+        for i, (begin, end) in enumerate(cls.iter_lines(content)):
+            line = content[begin:end]
+            if line.strip() == "":
+                continue
+
+            current = stack[-1]
+            line_indentation = get_indentation(line, current[1])
+            while len(line_indentation) < len(current[1]):
+                arena.close_node(stack.pop(), nb_lines)
+                if not stack:
+                    break
+
+                current = stack[-1]
+                line_indentation = get_indentation(line, current[1])
+
+            if not stack:
+                # The line is less indented than the root block
+                break
+
+            depth = len(line_indentation)
+            if depth > len(current[1]):
+                # A new sub-level of indentation
+                sub_block = arena.add_node(current[0], current[2],
+                        begin + depth, -1, start_at + i, depth)
+                current[2] = sub_block
+                current = [sub_block, line_indentation, -1, nb_lines]
+                stack.append(current)
+
+            current[2] = arena.add_node(current[0], current[2],
+                    begin + depth, end, start_at + i, depth)
+            arena.sizes[current[2]] = 1
+            nb_lines += 1
+
+        while stack:
+            arena.close_node(stack.pop(), nb_lines)
+
+        return arena
+
+    def close_node(self, entry, nb_lines):
+        """Close a container node, setting its number of lines."""
+        self.sizes[entry[0]] = nb_lines - entry[3]
+
+    def get_text(self, index):
+        """Return the text of a line node."""
+        return self.content[self.begins[index]:self.ends[index]]
+
+    def get_indentation(self, index):
+        """Return the indentation of a node."""
+        if index == 0:
+            return self.indentation
+
+        begin = self.begins[index]
+        return self.content[begin - self.depths[index]:begin]
+
+    def get_children(self, index):
+        """Return the list of indexes of the node's children.
+
+        The lists of the last CHILDREN_CACHE_SIZE nodes are kept, so
+        that selecting the children of a block one by one remains
+        linear, without keeping a list per node.  The list shouldn't
+        be modified.
+
+        """
+        cache = self.children
+        children = cache.get(index)
+        if children is None:
+            children = []
+            child = self.first_children[index]
+            while child >= 0:
+                children.append(child)
+                child = self.next_siblings[child]
+
+            if len(cache) >= CHILDREN_CACHE_SIZE:
+                del cache[next(iter(cache))]
+
+            cache[index] = children
+
+        return children
+
+
+class FlatBlock:
+
+    """A view on a block stored in a BlockArena.
+
+    A flat block offers the same navigation API as a Block:
+        __getitem__ to select a sub-block (a FlatBlock or Line object)
+        __iter__ to browse a block
+        __len__ to know how long is the block
+        parent, previous, next -- the surrounding blocks
+        start_at, end_at, nb_lines -- the line numbers.
+
+    Flat blocks are views and are created when needed:  to check
+    that two flat blocks are the same, compare their 'index'.  A
+    flat block is immutable.
+
+    """
+
+    __slots__ = ("arena", "index")
+
+    def __init__(self, arena, index=0):
+        self.arena = arena
+        self.index = index
+
+    @classmethod
+    def build(cls, content, start_at=0, indentation=""):
+        """Build a flat hierarchy and return its root block."""
+        return cls(BlockArena.build(content, start_at, indentation))
+
+    def __len__(self):
+        if self.is_line:
+            return 1
+
+        return len(self.arena.get_children(self.index))
+
+    def __getitem__(self, item):
+        if self.is_line:
+            if isinstance(item, slice):
+                return [self.text][item]
+
+            if item not in (0, -1):
+                raise IndexError("block index out of range")
+
+            return Line(self.text, self)
+
+        arena = self.arena
+        children = arena.get_children(self.index)
+        if isinstance(item, slice):
+            return [FlatBlock(arena, child) for child in children[item]]
+
+        return FlatBlock(arena, children[item])
+
+    def __iter__(self):
+        if self.is_line:
+            yield self.text
+        else:
+            arena = self.arena
+            child = arena.first_children[self.index]
+            while child >= 0:
+                yield FlatBlock(arena, child)
+                child = arena.next_siblings[child]
+
+    def __repr__(self):
+        nb = len(self)
+        if nb == 1:
+            return "<FlatBlock with 1 child>"
+        else:
+            return "<FlatBlock with {} children>".format(nb)
+
+    def __str__(self):
+        return self.display(show_lines=True)
+
+    def __eq__(self, compared_to):
+        """Compare the block to some content.
+
+        This content can be:
+            A string
+            Another block (a Block, FlatBlock or Line)
+
+        """
+        if isinstance(compared_to, (Block, FlatBlock, Line)):
+            compared_to = compared_to.display(indentation=False)
+        elif not isinstance(compared_to, str):
+            raise TypeError("cannot compare {} to {}".format(
+                    self, compared_to))
+
+        return self.display(indentation=False) == compared_to
+
+    def __getstate__(self):
+        return (self.arena, self.index)
+
+    def __setstate__(self, state):
+        self.arena, self.index = state
+
+    def _get_node(self, index):
+        """Return the block at the given index, or None if negative."""
+        if index < 0:
+            return None
+
+        return FlatBlock(self.arena, index)
+
+    @property
+    def is_line(self):
+        """Return whether this block contains a line of text."""
+        return self.arena.ends[self.index] >= 0
+
+    @property
+    def text(self):
+        """Return the text of a line block."""
+        return self.arena.get_text(self.index)
+
+    @property
+    def parent(self):
+        """Return the parent block, or None."""
+        return self._get_node(self.arena.parents[self.index])
+
+    @property
+    def next(self):
+        """Return the next block, or None."""
+        return self._get_node(self.arena.next_siblings[self.index])
+
+    @property
+    def previous(self):
+        """Return the previous block, or None."""
+        return self._get_node(self.arena.previous_siblings[self.index])
+
+    @property
+    def start_at(self):
+        """Return the line number where the block starts."""
+        return self.arena.starts[self.index]
+
+    @property
+    def indentation(self):
+        """Return the block's indentation."""
+        return self.arena.get_indentation(self.index)
+
+    @property
+    def nb_lines(self):
+        """Return the number of lines contained in this block."""
+        return self.arena.sizes[self.index]
+
+    @property
+    def end_at(self):
+        """Return the line where the block should end."""
+        return self.start_at + self.nb_lines
+
+    def display(self, show_lines=False, indentation=True):
+        """Display this block and its children."""
+        if self.is_line:
+            res = ""
+            if show_lines:
+                res += str(self.start_at + 1).rjust(2) + " "
+
+            if indentation:
+                res += self.indentation
+
+            return res + self.text
+
+        return "\n".join(child.display(show_lines=show_lines,
+                indentation=indentation) for child in self)
@@ -30,12 +30,20 @@
 
 from abc import *
 import argparse
+import json
 import sys
+import time
 import traceback
 
 from croissant.language.exceptions.syntax import LanguageSyntaxError
+from croissant.language.header import DEFAULT_LANGUAGE, get_languages
 from croissant.step.exceptions import *
-from croissant.story.story_set import StorySet
+from croissant.story.cache import StoryCache
+from croissant.story.selection import Selection
+from croissant.story.story_set import ENGINES, StorySet
+from croissant.story.watcher import Watcher
+from croissant.story.workers import SUCCESS, NOT_FOUND, FAILURE, \
+        rebuild_error, run_parallel
 
 class BaseOutput(metaclass=ABCMeta):
 
@@ -52,9 +60,59 @@ class BaseOutput(metaclass=ABCMeta):
         self.failures = []
         self.errors = []
         self.traces = {}
+        self.durations = {}
+        self.workers = 1
         self.directory = None
+        self.keep_going = False
+        self.syntax_report = None
+        self.watching = False
+        self.interval = 1.0
+        self.dry_run = False
+        self.static = False
+        self.command = "run"
         self.parser = argparse.ArgumentParser()
         self.parser.add_argument("directory")
+        self.parser.add_argument("--story", action="append", default=[],
+                metavar="PATTERN",
+                help="run only the stories matching a glob (repeatable)")
+        self.parser.add_argument("--scenario", metavar="REGEX",
+                help="run only the scenarios whose title matches")
+        self.parser.add_argument("--tags", metavar="EXPRESSION",
+                help="run only the scenarios matching a tag expression")
+        self.parser.add_argument("--language", default=DEFAULT_LANGUAGE,
+                help="the default language of the stories")
+        self.parser.add_argument("--engine", default="stream",
+                choices=sorted(ENGINES),
+                help="the engine used to parse the stories")
+        self.parser.add_argument("--jobs", type=int, default=1,
+                help="the number of processes parsing the stories")
+        self.parser.add_argument("--workers", type=int, default=1,
+                metavar="N", help="the number of processes running the " \
+                "scenarios")
+        self.parser.add_argument("--exclude", action="append", default=[],
+                metavar="PATTERN", help="ignore the paths matching a glob")
+        self.parser.add_argument("--manifest", metavar="FILE",
+                help="the manifest of the files, to speed up discovery")
+        self.parser.add_argument("--no-cache", action="store_true",
+                help="don't use the cache of parsed stories")
+        self.parser.add_argument("--clear-cache", action="store_true",
+                help="clear the cache of parsed stories before loading")
+        self.parser.add_argument("--dry-run", action="store_true",
+                help="display the undefined and ambiguous steps without " \
+                "running them")
+        self.parser.add_argument("--static", action="store_true",
+                help="with --dry-run or check, read the step files " \
+                "without importing them")
+        self.parser.add_argument("--watch", action="store_true",
+                help="keep running and run the affected scenarios after " \
+                "each change")
+        self.parser.add_argument("--interval", type=float, default=1.0,
+                metavar="SECONDS", help="the time between two checks when " \
+                "watching")
+        self.parser.add_argument("--keep-going", action="store_true",
+                help="run the valid stories despite syntax errors")
+        self.parser.add_argument("--syntax-report", metavar="FILE",
+                help="write the syntax errors in JSON ('-' for stdout)")
 
     def parse_args(self):
         """Parse the arguments from the argument parser."""
@@ -64,9 +122,58 @@ class BaseOutput(metaclass=ABCMeta):
     def handle_args(self, args):
         """Handle the command-line arguments."""
         self.directory = args.directory
+        if args.language not in get_languages():
+            self.parser.error("unknown language {}".format(
+                    repr(args.language)))
+
+        self.set.language = args.language
+        self.set.engine = args.engine
+        if args.jobs < 1:
+            self.parser.error("the number of jobs should be at least 1")
+
+        self.set.jobs = args.jobs
+        if args.workers < 1:
+            self.parser.error("the number of workers should be at least 1")
+
+        self.workers = args.workers
+        self.set.excludes = args.exclude
+        self.set.manifest = args.manifest
+        self.set.collect_errors = True
+        self.keep_going = args.keep_going
+        self.syntax_report = args.syntax_report
+        self.watching = args.watch
+        self.dry_run = args.dry_run
+        if args.static and not args.dry_run and self.command != "check":
+            self.parser.error("--static can only be used with --dry-run " \
+                    "or check")
+
+        self.static = args.static
+        self.interval = args.interval
+        if args.story or args.scenario is not None or \
+                args.tags is not None:
+            try:
+                self.set.selection = Selection(args.story, args.scenario,
+                        args.tags)
+            except ValueError as err:
+                self.parser.error(str(err))
+
+        cache = StoryCache(self.directory)
+        if args.clear_cache:
+            cache.clear()
+
+        if not args.no_cache:
+            self.set.cache = cache
 
     def load(self):
-        """Load the steps and stories of a given directory."""
+        """Load the steps and stories of a given directory.
+
+        If the story set collects the syntax errors, they are all
+        handled (and written in the syntax report if needed) after
+        the loading.  Unless 'keep_going' is set, the program then
+        exits.  The program exits too if a story pattern (see the
+        --story option) doesn't match any story.
+
+        """
         directory = self.directory
         try:
             self.set.load(directory)
@@ -74,11 +181,173 @@ class BaseOutput(metaclass=ABCMeta):
             self.handle_syntax_error(err)
             sys.exit(1)
 
+        errors = self.set.syntax_errors
+        for error in errors:
+            self.handle_syntax_error(error)
+
+        if self.syntax_report:
+            self.write_syntax_report(self.syntax_report, errors)
+
+        if errors and not self.keep_going:
+            sys.exit(1)
+
+        # Each story pattern should match at least one story
+        selection = self.set.selection
+        if selection is not None:
+            for pattern in selection.find_unknown(self.set.story_names):
+                self.parser.error("unknown story {}".format(repr(pattern)))
+
+    def compile(self):
+        """Compile the scenarios before running them.
+
+        The step lines of all the scenarios are resolved first (see
+        'StorySet.compile').  If some of them cannot be found, they
+        are all handled and the program exits before running any
+        scenario.  In dry-run mode, the undefined and ambiguous steps
+        are displayed, as well as the step modules that cannot be
+        imported, and the program exits without running anything.
+        The step modules are then read without being imported if
+        'static' is set (see 'StorySet.index_steps').
+
+        """
+        errors = self.set.compile(self.static)
+        if self.dry_run:
+            ambiguous = self.set.find_ambiguous(self.static)
+            import_errors = list(self.set.import_errors.items())
+            self.display_dry_run(errors, ambiguous, import_errors)
+            sys.exit(1 if errors or import_errors else 0)
+
+        if errors:
+            for error in errors:
+                self.failures.append(error)
+                self.handle_step_not_found(error)
+
+            self.display_report()
+            sys.exit(1)
+
+    def check(self):
+        """Check the expressions of the step classes and exit.
+
+        The step classes whose expressions are in conflict (see
+        'StepMeta') are displayed, as well as the step modules that
+        cannot be imported.  The program exits with 1 if there are
+        conflicts or import errors, 0 otherwise.
+
+        """
+        classes = self.set.find_conflicts(self.static)
+        import_errors = list(self.set.import_errors.items())
+        self.display_conflicts(classes, import_errors)
+        sys.exit(1 if classes or import_errors else 0)
+
+    @staticmethod
+    def write_syntax_report(path, errors):
+        """Write the syntax errors in JSON.
+
+        The report is an object with an 'errors' key, containing a
+        list of objects (one per error) with the keys 'type', 'file',
+        'line' and 'message'.  If the path is '-', the report is
+        written in the standard output.
+
+        """
+        errors = [{"type": type(error).__name__, "file": error.file,
+                "line": error.line, "message": error.message} for error in \
+                errors]
+        report = {"errors": errors}
+        if path == "-":
+            json.dump(report, sys.stdout, indent=4)
+            sys.stdout.write("\n")
+        else:
+            with open(path, "w") as file:
+                json.dump(report, file, indent=4)
+                file.write("\n")
+
     def run(self):
-        """Run the different stories."""
+        """Run the different stories.
+
+        If stories were selected, only these ones were loaded.  The step
+        modules of the other stories are thus never imported.  If
+        'workers' is greater than 1, the scenarios are run in worker
+        processes (see 'run_parallel').
+
+        """
+        if self.workers > 1:
+            self.run_parallel()
+            return
+
         for story_name in self.stories:
             self.run_story(story_name)
 
+    def run_parallel(self):
+        """Run the scenarios in 'workers' processes.
+
+        The results are handled in the order of the scenarios, as if
+        they were run in this process (see 'handle_result').
+
+        """
+        for story_name, scenario, result in run_parallel(self.set,
+                self.workers):
+            self.handle_result(story_name, scenario, result)
+
+    def handle_result(self, story_name, scenario, result):
+        """Handle the result of a scenario run in a worker process.
+
+        The result (see 'story.workers') is given to the same methods
+        as the errors of the scenarios run in this process.
+
+        """
+        status, message, trace, duration, detail = result
+        self.durations[scenario.identifier] = duration
+        if status == SUCCESS:
+            self.handle_success(story_name)
+        else:
+            error = rebuild_error(scenario, result)
+            self.traces[scenario.identifier] = trace
+            if status == NOT_FOUND:
+                self.failures.append(error)
+                self.handle_step_not_found(error)
+            elif status == FAILURE:
+                self.failures.append(error)
+                self.handle_assertion(error)
+            else:
+                self.errors.append((scenario, error))
+                self.handle_exception(error)
+
+        self.display_report()
+
+    def watch(self):
+        """Watch the directory and run the affected scenarios.
+
+        After each change in the steps or stories, they are loaded
+        again (see 'StorySet.refresh') and the affected scenarios are
+        run.  This method only returns when interrupted (with CTRL-C).
+
+        """
+        watcher = Watcher(self.set, self.interval)
+        try:
+            while True:
+                changed, removed = watcher.wait()
+                self.failures = []
+                self.errors = []
+                self.traces = {}
+                self.durations = {}
+                self.set.syntax_errors = []
+                try:
+                    scenarios = self.set.refresh(changed, removed)
+                except LanguageSyntaxError as err:
+                    self.handle_syntax_error(err)
+                    continue
+                except Exception:
+                    traceback.print_exc()
+                    continue
+
+                for error in self.set.syntax_errors:
+                    self.handle_syntax_error(error)
+
+                for story_name, scenario in scenarios:
+                    self.run_scenario(story_name, scenario)
+        except KeyboardInterrupt:
+            pass
+
     def run_story(self, story_name):
         """Run a specific story.
 
@@ -92,6 +361,7 @@ class BaseOutput(metaclass=ABCMeta):
 
     def run_scenario(self, story_name, scenario):
         """Run a specific scenario."""
+        begin = time.perf_counter()
         try:
             self.set.run_scenario(story_name, scenario)
         except StepNotFound as err:
@@ -109,6 +379,7 @@ class BaseOutput(metaclass=ABCMeta):
         else:
             self.handle_success(story_name)
 
+        self.durations[scenario.identifier] = time.perf_counter() - begin
         self.display_report()
 
     @abstractmethod
@@ -136,6 +407,68 @@ class BaseOutput(metaclass=ABCMeta):
         """Handle when a user story passes without errors."""
         pass
 
+    def display_dry_run(self, undefined, ambiguous, import_errors):
+        """Display the undefined and ambiguous steps.
+
+        Parameters:
+            undefined -- a list of StepNotFound errors
+            ambiguous -- a list of (scenario, line, matches), see
+                    'StorySet.find_ambiguous'
+            import_errors -- a list of (story name, error) for the step
+                    modules that cannot be imported.
+
+        By default, a line of plain text is written in the standard
+        output for each of them.
+
+        """
+        for error in undefined:
+            print("Undefined: {}".format(error))
+
+        for scenario, line, matches in ambiguous:
+            print("Ambiguous: Scenario {} in {}: {} matches {} " \
+                    "expressions".format(scenario.title, scenario.path,
+                    repr(line), len(matches)))
+
+        self.display_import_errors(import_errors)
+
+    def display_import_errors(self, import_errors):
+        """Display the step modules that cannot be imported.
+
+        Parameters:
+            import_errors -- a list of (story name, error), see
+                    'StorySet.import_errors'.
+
+        """
+        for name, error in import_errors:
+            print("Not imported: {} ({}): {}: {}".format(name,
+                    self.set.step_modules[name], type(error).__name__,
+                    error))
+
+    def display_conflicts(self, classes, import_errors):
+        """Display the conflicts between step expressions.
+
+        Parameters:
+            classes -- the step classes having conflicts (see
+                    'StorySet.find_conflicts')
+            import_errors -- a list of (story name, error) for the step
+                    modules that cannot be imported.
+
+        By default, a line of plain text is written in the standard
+        output for each conflict and each step module that cannot be
+        imported.
+
+        """
+        for class_object in classes:
+            for kind, expression, method_name, example, matches in \
+                    class_object.conflicts:
+                print("Conflict: {} ({}): {} {} ({}) matches {} " \
+                        "expressions".format(class_object.croissant_path,
+                        class_object.__name__, kind,
+                        repr(expression.pattern), method_name,
+                        len(matches)))
+
+        self.display_import_errors(import_errors)
+
     def display_report(self):
         """Display a report."""
         self.display_main_report()
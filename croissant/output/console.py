@@ -79,6 +79,70 @@ class ConsoleOutput(BaseOutput):
         """Handle a success."""
         self.file.write(".")
 
+    def display_dry_run(self, undefined, ambiguous, import_errors):
+        """Display the undefined and ambiguous steps."""
+        file = self.file
+        nb_scenarios = sum(len(story.scenarios) for story in \
+                self.stories.values())
+        print("Dry run:  {} scenarios in {} stories ({} undefined " \
+                "steps, {} ambiguous steps)".format(nb_scenarios,
+                len(self.stories), len(undefined), len(ambiguous)),
+                file=file)
+        self.display_import_errors(import_errors)
+        if undefined:
+            print("\nUndefined steps:", file=file)
+
+        for error in undefined:
+            scenario = error.scenario
+            print("  {} ({}): {}".format(scenario.identifier,
+                    scenario.title, error.message), file=file)
+
+        if ambiguous:
+            print("\nAmbiguous steps:", file=file)
+
+        for scenario, line, matches in ambiguous:
+            print("  {} ({}): {} matches".format(scenario.identifier,
+                    scenario.title, repr(line)), file=file)
+            for expression, method_name in matches:
+                print("    {} ({})".format(repr(expression.pattern),
+                        method_name), file=file)
+
+    def display_conflicts(self, classes, import_errors):
+        """Display the conflicts between step expressions."""
+        file = self.file
+        nb_conflicts = sum(len(class_object.conflicts) for class_object in \
+                classes)
+        print("Check:  {} step classes with conflicts ({} " \
+                "conflicts)".format(len(classes), nb_conflicts), file=file)
+        self.display_import_errors(import_errors)
+        for class_object in classes:
+            print("\n{} ({}):".format(class_object.croissant_path,
+                    class_object.__name__), file=file)
+            for kind, expression, method_name, example, matches in \
+                    class_object.conflicts:
+                if matches[0][0] == expression:
+                    state = "ambiguous"
+                else:
+                    state = "shadowed"
+
+                print("  {} {} ({}) is {}:  {} matches".format(kind,
+                        repr(expression.pattern), method_name, state,
+                        repr(example)), file=file)
+                for match, match_name in matches:
+                    print("    {} ({})".format(repr(match.pattern),
+                            match_name), file=file)
+
+    def display_import_errors(self, import_errors):
+        """Display the step modules that cannot be imported."""
+        file = self.file
+        if import_errors:
+            print("\nStep modules that cannot be imported:", file=file)
+
+        for name, error in import_errors:
+            module_name = self.set.step_modules[name]
+            print("  {} ({}): {}: {}".format(name, module_name,
+                    type(error).__name__, error), file=file)
+
     def display_main_report(self):
         """Display the main report (statistics)."""
         file = self.file
@@ -30,11 +30,104 @@
 
 This module contains different decorators that are useful to
 specify class methods as step contexts, events and postconditions.
+The decorated method keeps the original one in its '_function'
+attribute:  when the arguments are already known (see 'StepIndex'),
+it is called directly.
+
+The expressions of the decorators can contain typed placeholders,
+like "a number {number:int}":  the placeholder is replaced by a group
+matching the type (see TYPES) and the argument is converted before
+the method is called.  The expression is compiled once, when the
+method is decorated (see 'compile_expression'):  the converters of the
+groups are kept in the '_converters' attribute of the decorated
+method, and the arguments are converted when the method is called
+(see 'convert_arguments').
 
 """
 
+from functools import lru_cache
+import json
 import re
 
+# Typed placeholders, like {name:type}
+RE_PLACEHOLDER = re.compile(r"(?<!\\)\{([A-Za-z_]\w*):([A-Za-z_]\w*)\}")
+
+# Number of converted values kept for the types with a cache
+CONVERSION_CACHE_SIZE = 1024
+
+# Types of the placeholders {name: (pattern, converter)}
+TYPES = {}
+
+def register_type(name, pattern, converter, cache=False):
+    """Register a type of placeholders.
+
+    Parameters:
+        name -- the name of the type, used in placeholders
+        pattern -- the regular expression matching the values (it
+                shouldn't contain capturing groups)
+        converter -- the function converting a matched string
+        cache -- should the last conversions be cached?
+
+    The cache should only be used if the conversion is slow and returns
+    values that cannot be modified, since the same value is then
+    given to every step.
+
+    """
+    if cache:
+        converter = lru_cache(maxsize=CONVERSION_CACHE_SIZE)(converter)
+
+    TYPES[name] = (pattern, converter)
+
+register_type("int", r"[-+]?\d+", int)
+register_type("float", r"[-+]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?",
+        float)
+register_type("word", r"\w+", str)
+register_type("str", r".+", str)
+register_type("json", r".+", json.loads)
+
+def compile_expression(expression):
+    """Compile an expression and return (regex, converters).
+
+    The typed placeholders are replaced by named groups.  The
+    converters are a tuple containing, for each group of the regular
+    expression, the converter of its type or None for the groups that
+    aren't placeholders.  If the expression has no placeholder, the
+    converters are None.  A ValueError is raised if a type is unknown.
+
+    """
+    types = []
+    def replace(match):
+        name, type_name = match.groups()
+        if type_name not in TYPES:
+            raise ValueError("unknown type {} in {}".format(repr(type_name),
+                    repr(expression)))
+
+        types.append((name, type_name))
+        return "(?P<{}>{})".format(name, TYPES[type_name][0])
+
+    regex = re.compile(RE_PLACEHOLDER.sub(replace, expression))
+    if not types:
+        return regex, None
+
+    converters = [None] * regex.groups
+    for name, type_name in types:
+        converters[regex.groupindex[name] - 1] = TYPES[type_name][1]
+
+    return regex, tuple(converters)
+
+def convert_arguments(converters, args):
+    """Convert the arguments of a step method (see 'compile_expression').
+
+    The groups that didn't participate in the match (None) aren't
+    converted.
+
+    """
+    if converters is None:
+        return args
+
+    return tuple(arg if converter is None or arg is None else \
+            converter(arg) for converter, arg in zip(converters, args))
+
 def context(expression):
     """Decorator to mark a method as a context.
 
@@ -45,12 +138,12 @@ def context(expression):
                 ...
 
     """
-    expression = re.compile(expression)
+    expression, converters = compile_expression(expression)
     def decorator(method):
         def call_context(self, context):
             res = expression.search(context)
             if res:
-                args = res.groups()
+                args = convert_arguments(converters, res.groups())
             else:
                 raise ValueError("Invalid expression: {}".format(
                         repr(context)))
@@ -58,6 +151,8 @@ def context(expression):
             return method(self, *args)
         call_context._iscontext = True
         call_context._expression = expression
+        call_context._converters = converters
+        call_context._function = method
         return call_context
     return decorator
 
@@ -71,12 +166,12 @@ def event(expression):
                 ...
 
     """
-    expression = re.compile(expression)
+    expression, converters = compile_expression(expression)
     def decorator(method):
         def call_event(self, event):
             res = expression.search(event)
             if res:
-                args = res.groups()
+                args = convert_arguments(converters, res.groups())
             else:
                 raise ValueError("Invalid expression: {}".format(
                         repr(event)))
@@ -84,6 +179,8 @@ def event(expression):
             return method(self, *args)
         call_event._isevent = True
         call_event._expression = expression
+        call_event._converters = converters
+        call_event._function = method
         return call_event
     return decorator
 
@@ -97,12 +194,12 @@ def postcondition(expression):
                 ...
 
     """
-    expression = re.compile(expression)
+    expression, converters = compile_expression(expression)
     def decorator(method):
         def call_postcondition(self, postcondition):
             res = expression.search(postcondition)
             if res:
-                args = res.groups()
+                args = convert_arguments(converters, res.groups())
             else:
                 raise ValueError("Invalid expression: {}".format(
                         repr(postcondition)))
@@ -110,5 +207,7 @@ def postcondition(expression):
             return method(self, *args)
         call_postcondition._ispostcondition = True
         call_postcondition._expression = expression
+        call_postcondition._converters = converters
+        call_postcondition._function = method
         return call_postcondition
     return decorator
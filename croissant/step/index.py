@@ -0,0 +1,373 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Module containing the StepIndex class, described below."""
+
+from functools import lru_cache
+import re
+
+try:
+    from re import _constants as sre_constants
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_constants
+    import sre_parse
+
+RE_WORD = re.compile(r"\w+")
+
+# Number of step lines whose resolution is kept by each index
+RESOLUTION_CACHE_SIZE = 1024
+
+# Number of expressions whose analysis (parsing, words, example) is kept
+EXPRESSION_CACHE_SIZE = 4096
+
+# Zero-width assertions that can only match next to a word boundary
+BOUNDARIES = (sre_constants.AT_BEGINNING, sre_constants.AT_BEGINNING_STRING,
+        sre_constants.AT_END, sre_constants.AT_END_STRING)
+
+@lru_cache(maxsize=EXPRESSION_CACHE_SIZE)
+def parse_expression(expression):
+    """Return the parsed data of an expression, or None.
+
+    The parsing is shared by 'get_words' and 'get_example':  the last
+    parsed expressions are cached.
+
+    """
+    if not isinstance(expression.pattern, str):
+        return None
+
+    try:
+        return sre_parse.parse(expression.pattern, expression.flags).data
+    except Exception:
+        return None
+
+def get_items(data, flags):
+    """Yield the items of a parsed regular expression, in sequence.
+
+    An item is either a literal character, True for a position that
+    is a word boundary, or None for anything else.  Groups without
+    flags are read recursively, since their content is required as
+    well.
+
+    """
+    for op, av in data:
+        if op is sre_constants.LITERAL:
+            yield chr(av)
+        elif op is sre_constants.SUBPATTERN and not av[1] and not av[2]:
+            yield from get_items(av[3], flags)
+        elif op is sre_constants.AT and (av in BOUNDARIES or \
+                av is sre_constants.AT_BOUNDARY and not flags & re.ASCII):
+            yield True
+        else:
+            yield None
+
+@lru_cache(maxsize=EXPRESSION_CACHE_SIZE)
+def get_words(expression):
+    """Return the words that a match of the expression always contains.
+
+    A word (see 'RE_WORD') is returned only if its boundaries are known:
+    it must be preceded and followed by a non-word literal character or
+    a word boundary.  For instance, the expression "a number (\\d+)"
+    always contains the word "number", but not "a", which could be the
+    end of a longer word.  The expressions ignoring case, or that
+    cannot be read, don't return any word.  The words of the last
+    expressions are cached, since the same expressions are often
+    found in several step classes (see 'StaticIndex').
+
+    """
+    data = parse_expression(expression)
+    if data is None or expression.flags & re.IGNORECASE:
+        return frozenset()
+
+    try:
+        items = list(get_items(data, expression.flags))
+    except Exception:
+        return frozenset()
+
+    words = set()
+    word = None
+    bounded = False
+    for item in items + [None]:
+        if isinstance(item, str) and RE_WORD.match(item):
+            if word is None:
+                word = item if bounded else ""
+            elif word:
+                word += item
+        else:
+            is_boundary = item is True or isinstance(item, str)
+            if word and is_boundary:
+                words.add(word)
+
+            word = None
+            bounded = is_boundary
+
+    return frozenset(words)
+
+
+# Characters tried in the examples of character sets (see 'get_example')
+EXAMPLE_CHARACTERS = "a0 xZ_-.,:;!?'\"/"
+
+# Checks of the categories of characters (like \\d or \\w)
+CATEGORIES = {
+    sre_constants.CATEGORY_DIGIT: lambda char: char.isdecimal(),
+    sre_constants.CATEGORY_NOT_DIGIT: lambda char: not char.isdecimal(),
+    sre_constants.CATEGORY_SPACE: lambda char: char.isspace(),
+    sre_constants.CATEGORY_NOT_SPACE: lambda char: not char.isspace(),
+    sre_constants.CATEGORY_WORD: lambda char: char.isalnum() or \
+            char == "_",
+    sre_constants.CATEGORY_NOT_WORD: lambda char: not (char.isalnum() or \
+            char == "_"),
+    sre_constants.CATEGORY_LINEBREAK: lambda char: char == "\n",
+    sre_constants.CATEGORY_NOT_LINEBREAK: lambda char: char != "\n",
+}
+
+# Operators of repetitions and groups (some are missing before Python 3.11)
+REPEATS = tuple(getattr(sre_constants, name) for name in ("MAX_REPEAT",
+        "MIN_REPEAT", "POSSESSIVE_REPEAT") if hasattr(sre_constants, name))
+ATOMIC_GROUP = getattr(sre_constants, "ATOMIC_GROUP", None)
+
+def in_set(items, char):
+    """Return whether a character belongs to a parsed character set."""
+    negate = False
+    found = False
+    for op, av in items:
+        if op is sre_constants.NEGATE:
+            negate = True
+        elif op is sre_constants.LITERAL:
+            found = found or chr(av) == char
+        elif op is sre_constants.RANGE:
+            found = found or av[0] <= ord(char) <= av[1]
+        elif op is sre_constants.CATEGORY:
+            found = found or CATEGORIES[av](char)
+        else:
+            raise ValueError("unknown item in set: {}".format(op))
+
+    return found != negate
+
+def get_example_text(data, groups):
+    """Return a text matching a parsed regular expression.
+
+    The 'groups' dictionary contains the text of the groups already
+    read.  A ValueError is raised if the expression contains an
+    operator that cannot be read.
+
+    """
+    text = ""
+    for op, av in data:
+        if op is sre_constants.LITERAL:
+            text += chr(av)
+        elif op is sre_constants.NOT_LITERAL:
+            text += next(char for char in EXAMPLE_CHARACTERS if \
+                    ord(char) != av)
+        elif op is sre_constants.ANY:
+            text += EXAMPLE_CHARACTERS[0]
+        elif op is sre_constants.IN:
+            chars = [chr(av) for op, av in av if \
+                    op is sre_constants.LITERAL]
+            chars.extend(chr(av[0]) for op, av in av if \
+                    op is sre_constants.RANGE)
+            chars.extend(EXAMPLE_CHARACTERS)
+            text += next(char for char in chars if in_set(av, char))
+        elif op in REPEATS:
+            minimum, maximum, item = av
+            count = minimum or min(maximum, 1)
+            text += get_example_text(item, groups) * count
+        elif op is sre_constants.BRANCH:
+            text += get_example_text(av[1][0], groups)
+        elif op is sre_constants.SUBPATTERN:
+            group_text = get_example_text(av[3], groups)
+            if av[0] is not None:
+                groups[av[0]] = group_text
+
+            text += group_text
+        elif op is ATOMIC_GROUP:
+            text += get_example_text(av, groups)
+        elif op is sre_constants.GROUPREF:
+            text += groups.get(av, "")
+        elif op is sre_constants.GROUPREF_EXISTS:
+            group, yes, no = av
+            if group in groups:
+                text += get_example_text(yes, groups)
+            elif no is not None:
+                text += get_example_text(no, groups)
+        elif op in (sre_constants.AT, sre_constants.ASSERT,
+                sre_constants.ASSERT_NOT):
+            continue
+        else:
+            raise ValueError("unknown operator: {}".format(op))
+
+    return text
+
+@lru_cache(maxsize=EXPRESSION_CACHE_SIZE)
+def get_example(expression):
+    """Return a step line matched by the expression, or None.
+
+    The example is built from the parsed expression:  the literal
+    characters are kept, the first alternative of each branch is
+    chosen and repetitions occur once, if possible.  For instance,
+    the example of "a number (\\d+)" is "a number 0".  If the
+    expression cannot be read, or if the example doesn't match it
+    (because of lookahead assertions, for instance), None is
+    returned.
+
+    """
+    data = parse_expression(expression)
+    if data is None:
+        return None
+
+    try:
+        example = get_example_text(data, {})
+    except Exception:
+        return None
+
+    if not expression.search(example):
+        return None
+
+    return example
+
+
+class StepIndex:
+
+    """An index of step expressions, to find the method of a step line.
+
+    The expressions are given as a dictionary {compiled expression:
+    method name}, like the 'contexts', 'events' and 'postconditions'
+    of the steps (see 'StepMeta').  Trying each expression in turn is
+    slow with many expressions, so the index finds, for each
+    expression, a word that any of its matches contains (see
+    'get_words'), choosing the one shared by the fewest expressions.
+    To find a step line, only the expressions whose word appears in
+    the line (and the ones without word) are tried.
+
+    The result is the same as trying every expression in the order of
+    the dictionary:  the method of the first one that matches is
+    returned.
+
+    Step lines are resolved to the method name and the groups of
+    the match (see 'resolve'), so that the expression doesn't have
+    to be searched again to get the arguments.  Since scenarios often
+    repeat the same lines, the last resolutions are kept in a LRU
+    cache.
+
+    """
+
+    def __init__(self, expressions):
+        self.expressions = list(expressions.items())
+        self.words = {}
+        self.others = []
+        all_words = [get_words(expression) for expression, name in \
+                self.expressions]
+        frequencies = {}
+        for words in all_words:
+            for word in words:
+                frequencies[word] = frequencies.get(word, 0) + 1
+
+        for i, words in enumerate(all_words):
+            if words:
+                word = min(words, key=lambda word: (frequencies[word], word))
+                self.words.setdefault(word, []).append(i)
+            else:
+                self.others.append(i)
+
+        self.resolve = lru_cache(maxsize=RESOLUTION_CACHE_SIZE)(
+                self.resolve)
+
+    def __len__(self):
+        return len(self.expressions)
+
+    def get_candidates(self, message):
+        """Return the positions of the expressions that could match."""
+        candidates = list(self.others)
+        words = self.words
+        for word in set(RE_WORD.findall(message)):
+            positions = words.get(word)
+            if positions:
+                candidates.extend(positions)
+
+        candidates.sort()
+        return candidates
+
+    def resolve(self, message):
+        """Return the method name and the arguments of a step line.
+
+        The arguments are the groups of the first matching expression.
+        If no expression matches, return None.  The result is cached
+        (the method is wrapped when the index is created).
+
+        """
+        expressions = self.expressions
+        for i in self.get_candidates(message):
+            expression, name = expressions[i]
+            match = expression.search(message)
+            if match:
+                return name, match.groups()
+
+        return None
+
+    def find_all(self, message):
+        """Return the (expression, method name) matching a step line.
+
+        They are returned in order:  only the first one is called.
+
+        """
+        expressions = self.expressions
+        return [expressions[i] for i in self.get_candidates(message) if \
+                expressions[i][0].search(message)]
+
+    def find_conflicts(self):
+        """Return the expressions in conflict with other expressions.
+
+        Each expression is tested against a step line it matches
+        (see 'get_example'):  if other expressions match this line
+        too, the expressions are in conflict.  A list of (expression,
+        method name, example, matches) is returned, where the matches
+        are the (expression, method name) matching the example, in
+        order.  If the expression isn't the first one, it is shadowed:
+        the example calls the method of another expression.
+
+        """
+        conflicts = []
+        for expression, name in self.expressions:
+            example = get_example(expression)
+            if example is None:
+                continue
+
+            matches = self.find_all(example)
+            if len(matches) > 1:
+                conflicts.append((expression, name, example, matches))
+
+        return conflicts
+
+    def find(self, message):
+        """Return the method name of the first matching expression.
+
+        If no expression matches, return None.
+
+        """
+        resolution = self.resolve(message)
+        return resolution and resolution[0]
@@ -28,12 +28,41 @@
 
 """Module containing the metaclass for steps."""
 
+from croissant.step.index import StepIndex
+
+def get_conflicts(step):
+    """Return the conflicts between the expressions of a step class.
+
+    The conflicts of each index are searched (see
+    'StepIndex.find_conflicts').  A list of (kind, expression, method
+    name, example, matches) is returned, the kind being "context",
+    "event" or "postcondition".
+
+    """
+    conflicts = []
+    for kind, index in (("context", step.context_index),
+            ("event", step.event_index),
+            ("postcondition", step.postcondition_index)):
+        conflicts.extend((kind, ) + conflict for conflict in \
+                index.find_conflicts())
+
+    return conflicts
+
+
 class StepMeta(type):
 
     """Metaclass for steps.
 
     This metaclass is responsible for selecting the contexts, events
     and postconditions declared in the class inherited from BaseStep.
+    An index is then built for each of them (see 'StepIndex'):
+    'context_index', 'event_index' and 'postcondition_index'.
+
+    The expressions are then checked once, when the class is created:
+    the expressions matching the same step lines as other expressions
+    (the ones shadowed by a previous expression, for instance) are
+    stored in 'conflicts' (see 'get_conflicts').  They are reported
+    by the 'check' command.
 
     """
 
@@ -63,3 +92,8 @@ class StepMeta(type):
                     cls.events[value._expression] = name
                 elif getattr(value, "_ispostcondition", False):
                     cls.postconditions[value._expression] = name
+
+        cls.context_index = StepIndex(cls.contexts)
+        cls.event_index = StepIndex(cls.events)
+        cls.postcondition_index = StepIndex(cls.postconditions)
+        cls.conflicts = get_conflicts(cls)
@@ -0,0 +1,136 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Module containing the StepRegistry class, described below."""
+
+from croissant.step.meta import StepMeta
+
+KINDS = ("contexts", "events", "postconditions")
+
+def get_step_classes(classes):
+    """Return the step classes to merge, without their bases.
+
+    A class that is a base of another class of the list is removed,
+    since its expressions are already inherited.  The duplicates are
+    removed too and the order is kept.
+
+    """
+    selected = []
+    for class_object in classes:
+        if class_object in selected:
+            continue
+
+        if any(other is not class_object and issubclass(other,
+                class_object) for other in classes):
+            continue
+
+        selected.append(class_object)
+
+    return selected
+
+
+class StepRegistry:
+
+    """A registry of the step classes merged from step libraries.
+
+    A story can use several step classes (see 'StorySet.import_step'):
+    they are merged in a single class inheriting from all of them, in
+    order, so that one step object shares the state of every library.
+    Its expressions are gathered by 'StepMeta' as for any class with
+    several bases:  if two libraries define the same expression, the
+    last one wins, and the merged class has a single index for each
+    kind of step.
+
+    The merged class is created once for each combination of classes
+    (see 'merge') and shared by all the stories using this
+    combination:  its indexes, and the step lines they resolved, are
+    thus shared as well.
+
+    If two libraries have methods with the same name, the name only
+    refers to the method of the first library in the merged class.  The
+    expressions of the other methods are then given an alias, like
+    "Library.method", referring to the right method.
+
+    """
+
+    def __init__(self):
+        self.merged = {}
+
+    def clear(self):
+        """Forget the merged classes."""
+        self.merged.clear()
+
+    def merge(self, classes):
+        """Return the step class merging the given classes.
+
+        If there is only one class (once the bases are removed, see
+        'get_step_classes'), it is returned unchanged.
+
+        """
+        classes = tuple(get_step_classes(classes))
+        if len(classes) == 1:
+            return classes[0]
+
+        merged = self.merged.get(classes)
+        if merged is None:
+            merged = self.create(classes)
+            self.merged[classes] = merged
+
+        return merged
+
+    @staticmethod
+    def create(classes):
+        """Create the class merging several step classes."""
+        name = "+".join(class_object.__name__ for class_object in classes)
+        attributes = {
+            "__module__": classes[0].__module__,
+            "croissant_path": name,
+        }
+        merged = StepMeta(name, classes, dict(attributes))
+
+        # The methods hidden by a method of the same name get an alias
+        aliases = {}
+        for kind in KINDS:
+            for expression, method_name in getattr(merged, kind).items():
+                owner = None
+                for class_object in classes:
+                    if getattr(class_object, kind).get(expression) == \
+                            method_name:
+                        owner = class_object
+
+                method = getattr(owner, method_name, None)
+                if getattr(method, "_expression", None) == expression and \
+                        getattr(merged, method_name) is not method:
+                    alias = "{}.{}".format(owner.__name__, method_name)
+                    aliases[alias] = method
+
+        if aliases:
+            attributes.update(aliases)
+            merged = StepMeta(name, classes, attributes)
+
+        return merged
@@ -0,0 +1,610 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Module containing the StaticIndex class, described below.
+
+The step modules are read with 'ast', without being imported:  the
+contexts, events and postconditions are found in the decorators of the
+methods (see 'step.functions'), when their expression is a string
+literal.  The result of the reading of a module (see 'read_module') only
+contains strings, numbers, tuples, lists and dictionaries, so that it
+can be written with 'marshal'.
+
+"""
+
+import ast
+import marshal
+import os
+
+from croissant.step.functions import compile_expression
+from croissant.step.index import StepIndex
+from croissant.step.meta import get_conflicts
+
+# Name of the decorators and of the attribute of the step class
+DECORATORS = {
+    "context": "contexts",
+    "event": "events",
+    "postcondition": "postconditions",
+}
+
+# Modules defining the decorators and the base step
+STEP_MODULES = ("croissant.step", "croissant.step.functions",
+        "croissant.step.base")
+
+# Version of the format (increment it when the format changes)
+INDEX_VERSION = 2
+
+def get_dotted_name(node):
+    """Return the dotted name of a Name or Attribute node, or None."""
+    names = []
+    while isinstance(node, ast.Attribute):
+        names.append(node.attr)
+        node = node.value
+
+    if not isinstance(node, ast.Name):
+        return None
+
+    names.append(node.id)
+    return ".".join(reversed(names))
+
+def get_import_module(module_name, node):
+    """Return the absolute name of the module of an ImportFrom node."""
+    if not node.level:
+        return node.module or ""
+
+    package = module_name.split(".")[:-node.level]
+    if node.module:
+        package.append(node.module)
+
+    return ".".join(package)
+
+def read_decorator(node, decorators):
+    """Return the (kind, pattern) of a decorator, or None.
+
+    The kind is the name of the decorator ("context", "event" or
+    "postcondition").  The pattern is None if the expression isn't a
+    string literal.
+
+    """
+    if not isinstance(node, ast.Call):
+        return None
+
+    if isinstance(node.func, ast.Name):
+        kind = decorators.get(node.func.id)
+    elif isinstance(node.func, ast.Attribute) and \
+            node.func.attr in DECORATORS:
+        kind = node.func.attr
+    else:
+        return None
+
+    if kind is None:
+        return None
+
+    arguments = list(node.args) + [keyword.value for keyword in \
+            node.keywords if keyword.arg == "expression"]
+    pattern = None
+    if arguments and isinstance(arguments[0], ast.Constant) and \
+            isinstance(arguments[0].value, str):
+        pattern = arguments[0].value
+
+    return kind, pattern
+
+def read_module(module_name, source):
+    """Read the source of a step module and return its data.
+
+    The data is a tuple (imports, classes, declared):
+        imports -- a dictionary {name: (module, attribute)} of the
+                names imported with 'from ... import', relative imports
+                being made absolute ("*" gives the modules imported
+                with 'from ... import *')
+        classes -- a dictionary {class name: (line, bases, step,
+                attributes)} of the classes defined at the top level of
+                the module
+        declared -- the dotted names of the classes listed in
+                'croissant_steps' (None for the names that cannot be
+                read), or None if the module doesn't define it.
+
+    The bases are dotted names.  'step' is True if the metaclass of
+    the class is explicitly StepMeta.  The attributes are (name, kind,
+    pattern, line) in the order of the class body:  the kind and the
+    pattern are the ones of the decorator (see 'read_decorator'), or
+    None if the attribute isn't a step method.  A SyntaxError is raised
+    if the source cannot be parsed.
+
+    """
+    tree = ast.parse(source)
+    decorators = {name: name for name in DECORATORS}
+    imports = {}
+    classes = {}
+    declared = None
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(target,
+                ast.Name) and target.id == "croissant_steps" for target in \
+                node.targets):
+            if isinstance(node.value, (ast.List, ast.Tuple)):
+                declared = [get_dotted_name(element) for element in \
+                        node.value.elts]
+            else:
+                declared = [None]
+
+        if isinstance(node, ast.ImportFrom):
+            module = get_import_module(module_name, node)
+            for alias in node.names:
+                if alias.name == "*":
+                    imports["*"] = imports.get("*", ()) + (module, )
+                    continue
+
+                name = alias.asname or alias.name
+                imports[name] = (module, alias.name)
+                if module in STEP_MODULES and alias.name in DECORATORS:
+                    decorators[name] = alias.name
+        elif isinstance(node, ast.ClassDef):
+            bases = [get_dotted_name(base) for base in node.bases]
+            bases = [base for base in bases if base]
+            step = any(keyword.arg == "metaclass" and (get_dotted_name(
+                    keyword.value) or "").endswith("StepMeta") for \
+                    keyword in node.keywords)
+            attributes = []
+            for child in node.body:
+                if isinstance(child, (ast.FunctionDef,
+                        ast.AsyncFunctionDef)):
+                    decorator = None
+                    if child.decorator_list:
+                        decorator = read_decorator(child.decorator_list[0],
+                                decorators)
+
+                    if decorator is None:
+                        attributes.append((child.name, None, None,
+                                child.lineno))
+                    else:
+                        kind, pattern = decorator
+                        attributes.append((child.name, kind, pattern,
+                                child.lineno))
+                elif isinstance(child, (ast.Assign, ast.AnnAssign)):
+                    if isinstance(child, ast.Assign):
+                        targets = child.targets
+                    else:
+                        targets = [child.target]
+
+                    for target in targets:
+                        if isinstance(target, ast.Name):
+                            attributes.append((target.id, None, None,
+                                    child.lineno))
+
+            classes[node.name] = (node.lineno, bases, step, attributes)
+
+    return imports, classes, declared
+
+
+class StaticStep:
+
+    """A step class read from the source of its module.
+
+    It has the same attributes as the step classes used to find the
+    step lines (see 'StepMeta'):  'contexts', 'events',
+    'postconditions', their indexes and their conflicts.  Its methods
+    cannot be called, however:  the plans compiled with a static step
+    (see 'Plan') can only be used to check the step lines.
+
+    A static step also has:
+        module -- the name of its module
+        line -- the line of the class in its module
+        lines -- a dictionary {method name: line}
+        complete -- False if some step methods were skipped, because
+                their expression isn't a string literal or because
+                a base class couldn't be read
+        ancestors -- the (module, class name) of its step bases.
+
+    """
+
+    def __init__(self, name, module, line):
+        self.__name__ = name
+        self.module = module
+        self.line = line
+        self.croissant_path = "unknown"
+        self.contexts = {}
+        self.events = {}
+        self.postconditions = {}
+        self.lines = {}
+        self.complete = True
+        self.ancestors = set()
+
+    def __repr__(self):
+        return "<StaticStep {}.{}>".format(self.module, self.__name__)
+
+    def build_indexes(self):
+        """Build the indexes and find the conflicts (see 'StepMeta')."""
+        self.context_index = StepIndex(self.contexts)
+        self.event_index = StepIndex(self.events)
+        self.postcondition_index = StepIndex(self.postconditions)
+        self.conflicts = get_conflicts(self)
+
+
+class StaticIndex:
+
+    """An index of the step classes built without importing them.
+
+    The step modules are read (see 'read_module') and the data of each
+    module is kept with the modification time and size of its file.
+    When the index is updated (see 'update'), only the modules whose
+    file changed are read again.  If the index has a path, it is
+    written there (with 'marshal') and read again when created, so
+    that the step files that didn't change aren't read at all.
+
+    The step classes of a module (see 'get_step') are the classes
+    listed in its 'croissant_steps' or, by default, the classes defined
+    in this module that inherit from BaseStep, directly or through
+    other classes defined in the step modules.  Their expressions are
+    gathered as 'StepMeta' would:  the expressions of the bases
+    first, then the ones of the class, in order.  Several step classes
+    are merged as 'StepRegistry' would.
+
+    Unlike the imported steps, the expressions built dynamically and
+    the classes defined outside the top level of the module cannot be
+    found.  The step classes with such expressions, or inheriting from
+    classes that aren't defined in the step modules, are marked as
+    incomplete.  The classes that only inherit from such classes
+    cannot be identified as step classes (see 'get_step').
+
+    """
+
+    def __init__(self, root, path=None):
+        self.root = root
+        self.path = path
+        self.modules = {}
+        self.steps = {}
+        self.unknown = set()
+        if path is not None:
+            self.read()
+
+    def read(self):
+        """Read the index from its path, if it exists and is valid."""
+        try:
+            with open(self.path, "rb") as file:
+                version, modules = marshal.loads(file.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return
+
+        if version == INDEX_VERSION:
+            self.modules = modules
+
+    def write(self):
+        """Write the index in its path.
+
+        If the path cannot be written, the index is only kept in
+        memory (the step files will be read again the next time).
+
+        """
+        directory = os.path.dirname(self.path)
+        temporary = self.path + ".tmp"
+        try:
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            with open(temporary, "wb") as file:
+                file.write(marshal.dumps((INDEX_VERSION, self.modules)))
+            os.replace(temporary, self.path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def get_path(module_name):
+        """Return the relative path of a module from its name."""
+        return os.path.join(*module_name.split(".")) + ".py"
+
+    def update(self, module_names):
+        """Update the index with the given step modules.
+
+        The modules whose file changed are read again.  The modules
+        that aren't given are removed from the index.  The index is
+        written if it has a path and changed.  A module that cannot
+        be parsed is kept with None as data.
+
+        """
+        modules = {}
+        changed = False
+        for module_name in module_names:
+            full_path = os.path.join(self.root, self.get_path(module_name))
+            try:
+                stat = os.stat(full_path)
+            except OSError:
+                continue
+
+            entry = self.modules.get(module_name)
+            if entry is None or entry[0] != stat.st_mtime_ns or \
+                    entry[1] != stat.st_size:
+                with open(full_path, "rb") as file:
+                    source = file.read()
+
+                try:
+                    data = read_module(module_name, source)
+                except (SyntaxError, ValueError):
+                    data = None
+
+                entry = (stat.st_mtime_ns, stat.st_size, data)
+                changed = True
+
+            modules[module_name] = entry
+
+        changed = changed or len(modules) != len(self.modules)
+        self.modules = modules
+        self.steps = {}
+        self.unknown = set()
+        if changed and self.path is not None:
+            self.write()
+
+    def find_class(self, module_name, name, seen=()):
+        """Return the (module name, class name) of a name, or None.
+
+        The name is a dotted name used in the given module:  it can be
+        a class defined in this module, a class imported with 'from
+        ... import' or a class of another step module
+        ("module.Class").  'seen' contains the modules being
+        searched, to avoid modules importing each other.
+
+        """
+        entry = self.modules.get(module_name)
+        if entry is None or entry[2] is None or module_name in seen:
+            return None
+
+        seen = seen + (module_name, )
+        imports, classes, declared = entry[2]
+        if "." not in name:
+            if name in classes:
+                return module_name, name
+
+            if name in imports:
+                module, attribute = imports[name]
+                if module in self.modules:
+                    return self.find_class(module, attribute, seen)
+
+            for module in imports.get("*", ()):
+                if module in self.modules:
+                    found = self.find_class(module, name, seen)
+                    if found is not None:
+                        return found
+
+            return None
+
+        module, attribute = name.rsplit(".", 1)
+        if module in imports:
+            module = ".".join(imports[module])
+
+        if module in self.modules:
+            return self.find_class(module, attribute, seen)
+
+        return None
+
+    def is_base_step(self, module_name, name):
+        """Return whether a base name refers to BaseStep."""
+        if name.split(".")[-1] != "BaseStep":
+            return False
+
+        entry = self.modules.get(module_name)
+        imports = entry[2][0] if entry and entry[2] else {}
+        imported = imports.get(name)
+        return imported is None or imported[0] in STEP_MODULES
+
+    def get_class(self, module_name, name, seen=()):
+        """Return the StaticStep of a class, or None if it isn't a step.
+
+        'seen' contains the classes being read, to avoid reading
+        classes inheriting from themselves.
+
+        """
+        key = (module_name, name)
+        if key in self.steps:
+            return self.steps[key]
+
+        if key in seen:
+            return None
+
+        seen = seen + (key, )
+        line, bases, is_step, attributes = self.modules[module_name][2][1][
+                name]
+        step = StaticStep(name, module_name, line)
+        unknown = False
+        for base in bases:
+            if self.is_base_step(module_name, base):
+                is_step = True
+                continue
+
+            found = self.find_class(module_name, base)
+            if found is None:
+                # A base imported from a module that isn't a step module
+                unknown = unknown or "." in base or base in \
+                        self.modules[module_name][2][0]
+                continue
+
+            parent = self.get_class(found[0], found[1], seen)
+            if parent is None:
+                continue
+
+            is_step = True
+            step.ancestors.update(parent.ancestors)
+            step.ancestors.add(found)
+            step.complete = step.complete and parent.complete
+            step.contexts.update(parent.contexts)
+            step.events.update(parent.events)
+            step.postconditions.update(parent.postconditions)
+            step.lines.update(parent.lines)
+
+        if not is_step:
+            if unknown:
+                self.unknown.add(key)
+
+            self.steps[key] = None
+            return None
+
+        step.complete = step.complete and not unknown
+
+        # As in the class body, the last definition of a name is kept
+        methods = {}
+        for method_name, kind, pattern, method_line in attributes:
+            methods[method_name] = (kind, pattern, method_line)
+
+        for method_name, (kind, pattern, method_line) in methods.items():
+            if kind is None:
+                continue
+
+            if pattern is None:
+                step.complete = False
+                continue
+
+            expressions = getattr(step, DECORATORS[kind])
+            expression = compile_expression(pattern)[0]
+            expressions[expression] = method_name
+            step.lines[method_name] = method_line
+
+        step.build_indexes()
+        self.steps[key] = step
+        return step
+
+    def get_step(self, module_name):
+        """Return the step class of a module, as a StaticStep.
+
+        As when the module is imported (see 'StorySet.import_step'),
+        the step classes are the ones listed in 'croissant_steps' or
+        the ones defined in the module.  If there are several of them,
+        they are merged (see 'merge').  A KeyError is raised if the
+        module doesn't define any step class and a ValueError if it
+        cannot be read.  A ValueError is raised too if the step classes
+        cannot be found without importing modules (if they inherit
+        from classes defined outside the step modules, for instance).
+
+        """
+        entry = self.modules.get(module_name)
+        if entry is None:
+            raise KeyError(module_name)
+
+        if entry[2] is None:
+            raise ValueError("cannot read the step module {}".format(
+                    module_name))
+
+        declared = entry[2][2]
+        if declared is None:
+            classes = [self.get_class(module_name, name) for name in \
+                    entry[2][1]]
+            classes = [step for step in classes if step is not None]
+        else:
+            classes = []
+            for name in declared:
+                found = name and self.find_class(module_name, name)
+                step = found and self.get_class(found[0], found[1])
+                if step is None:
+                    raise ValueError("cannot find the step class {} of " \
+                            "{} without importing it".format(repr(name),
+                            module_name))
+
+                classes.append(step)
+
+        if len(classes) == 0:
+            if any(key[0] == module_name for key in self.unknown):
+                raise ValueError("cannot find the step class of {} " \
+                        "without importing it".format(module_name))
+
+            raise KeyError(module_name)
+
+        return self.merge(classes)
+
+    def merge(self, classes):
+        """Return the static step merging several step classes.
+
+        The classes are merged as by 'StepRegistry':  the bases of
+        other classes are removed, the expressions are gathered in
+        order and the methods hidden by a method of the same name in
+        a previous class get an alias ("Class.method").  As with
+        'StepRegistry', the merged step is created once for each
+        combination of classes.
+
+        """
+        keys = []
+        for step in classes:
+            key = (step.module, step.__name__)
+            if key not in keys and not any(key in other.ancestors for \
+                    other in classes):
+                keys.append(key)
+
+        if len(keys) == 1:
+            return self.steps[keys[0]]
+
+        key = tuple(keys)
+        merged = self.steps.get(key)
+        if merged is not None:
+            return merged
+
+        steps = [self.steps[key] for key in keys]
+        merged = StaticStep("+".join(step.__name__ for step in steps),
+                steps[0].module, steps[0].line)
+        for i, step in enumerate(steps):
+            hidden = set()
+            for previous in steps[:i]:
+                hidden.update(previous.lines)
+
+            merged.complete = merged.complete and step.complete
+            merged.ancestors.update(step.ancestors)
+            merged.ancestors.add((step.module, step.__name__))
+            for kind in DECORATORS.values():
+                expressions = getattr(merged, kind)
+                for expression, method_name in getattr(step, kind).items():
+                    if method_name in hidden:
+                        method_name = "{}.{}".format(step.__name__,
+                                method_name)
+
+                    expressions[expression] = method_name
+                    merged.lines[method_name] = step.lines.get(
+                            method_name.split(".")[-1])
+
+        merged.build_indexes()
+        self.steps[key] = merged
+        return merged
+
+    def get_expressions(self):
+        """Return all the expressions of the step classes.
+
+        A list of (module name, class name, kind, pattern, method name,
+        line) is returned, for editors and reports.  The expressions
+        inherited from a base class are only given once, in the base.
+
+        """
+        expressions = []
+        for module_name, entry in self.modules.items():
+            if entry[2] is None:
+                continue
+
+            for name, (line, bases, step, attributes) in \
+                    entry[2][1].items():
+                if self.get_class(module_name, name) is None:
+                    continue
+
+                for method_name, kind, pattern, method_line in attributes:
+                    if kind is not None and pattern is not None:
+                        expressions.append((module_name, name, kind,
+                                pattern, method_name, method_line))
+
+        return expressions
@@ -44,6 +44,15 @@ Here is the common hierarchy of story sets, stories and scenarios:
 Modules defined in this package:
     story_set -- definition of a story set
     story -- definition of a single story
-    scenario -- definition of a single scenario in a story.
+    scenario -- definition of a single scenario in a story
+    tokenizer -- the tokenizer of story files
+    parser -- the streaming parser of story files
+    cache -- the on-disk cache of parsed stories
+    discovery -- the discovery of steps and stories in a directory
+    tags -- the tags of stories and scenarios
+    selection -- the selection of stories and scenarios to run
+    watcher -- the watcher of changes in the steps and stories
+    plan -- the execution plans of scenarios
+    workers -- the execution of scenarios in worker processes.
 
 """
@@ -0,0 +1,234 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Module containing the StoryCache class, described below."""
+
+import hashlib
+import marshal
+import os
+import shutil
+
+from croissant.story.scenario import Scenario
+from croissant.story.story import Story
+
+# Name of the directory containing the cache, in the root directory
+CACHE_DIRECTORY = "__croissant_cache__"
+
+# Version of the format (increment it when the format changes)
+CACHE_VERSION = 2
+
+class HashedFile:
+
+    """A story file whose lines are hashed while they are read.
+
+    The file should be opened in binary mode.  Its lines are browsed
+    like the ones of the file (see 'Block.iter_lines'), one at a time:
+    the file is never loaded as a whole.  Once it's parsed, 'get_key'
+    returns the key of the content actually read (see 'StoryCache'),
+    so that the entry stored with it matches the parsed story even if
+    the file is modified meanwhile.
+
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.mtime = os.fstat(file.fileno()).st_mtime_ns
+        self.size = 0
+        self.digest = hashlib.sha1()
+
+    def __iter__(self):
+        for line in self.file:
+            self.size += len(line)
+            self.digest.update(line)
+            yield line
+
+    def get_key(self):
+        """Return the key (modification time, size, hash) of the file.
+
+        The lines that weren't read yet are hashed first.
+
+        """
+        for line in self:
+            pass
+
+        return (self.mtime, self.size, self.digest.digest())
+
+class StoryCache:
+
+    """Class representing an on-disk cache of parsed stories.
+
+    Parsing a story is the most expensive part of the loading.  The
+    cache keeps, for each story file, a compact binary entry (written
+    with 'marshal') containing the data of the parsed story.  An entry
+    is keyed by:
+        the relative path of the story (the name of the cache file)
+        the modification time and size of the story file
+        the hash of its content.
+
+    If the modification time and the size are unchanged, the entry is
+    used without reading the story file.  Otherwise, the content is
+    hashed:  if it still matches (the file was touched but not
+    modified), the entry is still used.  The default language is
+    stored in the entry too, since it changes the parsing of stories
+    without language header.
+
+    The cache files are stored in the root directory, in a sub-directory
+    named CACHE_DIRECTORY, mirroring the structure of the root.
+
+    """
+
+    def __init__(self, root, directory=CACHE_DIRECTORY):
+        self.root = root
+        self.directory = os.path.join(root, directory)
+
+    def get_cache_path(self, path):
+        """Return the path of the cache file for the given story path."""
+        return os.path.join(self.directory, path + ".cache")
+
+    @staticmethod
+    def hash_file(full_path):
+        """Return the hash of the content of a file."""
+        digest = hashlib.sha1()
+        with open(full_path, "rb") as file:
+            for chunk in iter(lambda: file.read(65536), b""):
+                digest.update(chunk)
+
+        return digest.digest()
+
+    def read_entry(self, path):
+        """Read and return the cache entry of a story, or None."""
+        try:
+            with open(self.get_cache_path(path), "rb") as file:
+                entry = marshal.loads(file.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+
+        if not isinstance(entry, tuple) or len(entry) != 6 or \
+                entry[0] != CACHE_VERSION:
+            return None
+
+        return entry
+
+    def write_entry(self, path, entry):
+        """Write the cache entry of a story.
+
+        The entry is written in a temporary file, then moved, so that
+        a concurrent reader never reads an incomplete entry.  If the
+        cache directory cannot be written, the entry is silently lost.
+
+        """
+        cache_path = self.get_cache_path(path)
+        tmp_path = "{}.{}.tmp".format(cache_path, os.getpid())
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(tmp_path, "wb") as file:
+                file.write(marshal.dumps(entry))
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
+
+    def load(self, path, language):
+        """Return the cached story or None if it's not in the cache.
+
+        Parameters:
+            path -- the path of the story, relative to the root
+            language -- the default language of the stories
+
+        """
+        entry = self.read_entry(path)
+        if entry is None:
+            return None
+
+        version, mtime, size, digest, default_language, data = entry
+        if default_language != language:
+            return None
+
+        full_path = os.path.join(self.root, path)
+        try:
+            stat = os.stat(full_path)
+        except OSError:
+            return None
+
+        if (stat.st_mtime_ns, stat.st_size) != (mtime, size):
+            if stat.st_size != size or self.hash_file(full_path) != digest:
+                return None
+
+            # The file was touched but its content remains the same
+            self.write_entry(path, (version, stat.st_mtime_ns, size, digest,
+                    default_language, data))
+
+        return self.restore(path, language, data)
+
+    def store(self, path, key, language, data):
+        """Store the data of a parsed story in the cache.
+
+        Parameters:
+            path -- the path of the story, relative to the root
+            key -- the key of the parsed content (see 'HashedFile')
+            language -- the default language of the stories
+            data -- the data of the parsed story (see 'dump')
+
+        """
+        mtime, size, digest = key
+        self.write_entry(path, (CACHE_VERSION, mtime, size, digest,
+                language, data))
+
+    def clear(self):
+        """Remove the cache directory and all its entries."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    @staticmethod
+    def dump(story):
+        """Return the data of a story as a tuple of simple values."""
+        scenarios = tuple((scenario.title, scenario.start_at,
+                tuple(scenario.contexts), scenario.event,
+                tuple(scenario.postconditions), tuple(scenario.tags)) \
+                for scenario in story.scenarios)
+        return (story.language, story.title, story.description,
+                tuple(story.tags), scenarios)
+
+    @staticmethod
+    def restore(path, default_language, data):
+        """Create and return a story from its data."""
+        language, title, description, tags, scenarios = data
+        story = Story(path, language=default_language)
+        story.language = language
+        story.title = title
+        story.description = description
+        story.tags = list(tags)
+        for title, start_at, contexts, event, postconditions, tags in \
+                scenarios:
+            scenario = Scenario(title)
+            scenario.start_at = start_at
+            scenario.contexts = list(contexts)
+            scenario.event = event
+            scenario.postconditions = list(postconditions)
+            scenario.tags = list(tags)
+            story.add_scenario(scenario)
+
+        return story
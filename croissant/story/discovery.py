@@ -0,0 +1,217 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Module containing the Discovery class, described below."""
+
+from fnmatch import fnmatch
+import marshal
+import os
+import time
+
+from croissant.story.cache import CACHE_DIRECTORY
+
+# Kinds of entries
+DIRECTORY = "directory"
+STEP = "step"
+STORY = "story"
+FILE = "file"
+
+# Directories that never contain steps or stories
+IGNORED_DIRECTORIES = (CACHE_DIRECTORY, "__pycache__")
+
+# Version of the format of the manifest
+MANIFEST_VERSION = 1
+
+class Discovery:
+
+    """Class to find the steps and stories of a root directory.
+
+    The directories are browsed with 'os.scandir', whose entries
+    already know whether they are directories.  An entry is either
+    a directory, a step (a '.py' file), a story (a '.feature' file)
+    or another file.  Entries matching one of the exclude patterns
+    (compared with their name and their path relative to the root,
+    with '/' as a separator) are ignored, as are the directories
+    of IGNORED_DIRECTORIES.
+
+    A manifest can be given:  it's a file containing, for each browsed
+    directory, its modification time and its entries (path, mtime,
+    size, kind).  When the manifest is read, a directory that hasn't
+    been modified since (adding, removing or renaming an entry updates
+    the modification time of the directory) isn't browsed again:  its
+    entries are read from the manifest.  The manifest is written again
+    after a walk that browsed modified directories.
+
+    """
+
+    def __init__(self, root, excludes=(), manifest=None):
+        self.root = root
+        self.excludes = tuple(excludes)
+        self.manifest = manifest
+        self.directories = {}
+        self.updated = {}
+        self.time = 0
+        self.scan_time = 0
+        self.modified = False
+        if manifest:
+            self.read_manifest()
+
+    def read_manifest(self):
+        """Read the manifest, if it exists and is valid."""
+        try:
+            with open(self.manifest, "rb") as file:
+                content = marshal.loads(file.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return
+
+        if isinstance(content, tuple) and len(content) == 3 and \
+                content[0] == MANIFEST_VERSION:
+            version, self.time, self.directories = content
+
+    def write_manifest(self):
+        """Write the manifest if browsed directories were modified."""
+        if not self.manifest or not self.modified:
+            return
+
+        content = (MANIFEST_VERSION, self.scan_time, self.updated)
+        tmp_path = "{}.{}.tmp".format(self.manifest, os.getpid())
+        try:
+            with open(tmp_path, "wb") as file:
+                file.write(marshal.dumps(content))
+            os.replace(tmp_path, self.manifest)
+        except OSError:
+            pass
+
+    def is_excluded(self, path):
+        """Return whether an entry is excluded by the patterns."""
+        name = os.path.basename(path)
+        path = path.replace(os.path.sep, "/")
+        for pattern in self.excludes:
+            if fnmatch(name, pattern) or fnmatch(path, pattern):
+                return True
+
+        return False
+
+    @staticmethod
+    def get_kind(entry):
+        """Return the kind of a DirEntry."""
+        name = entry.name
+        if name.endswith(".py"):
+            return STEP
+        elif name.endswith(".feature"):
+            return STORY
+        elif entry.is_dir():
+            return DIRECTORY
+
+        return FILE
+
+    def scan(self, directory):
+        """Return the entries of a directory as (path, mtime, size, kind).
+
+        The directory is browsed unless the manifest has its entries
+        and the directory wasn't modified since.  The modification
+        time and size of the entries are only read (with an additional
+        call to 'stat') when a manifest is used.  The entries of the
+        directories scanned during a walk are kept in 'updated'.
+
+        """
+        key = directory or ""
+        if key in self.updated:
+            return self.updated[key][1]
+
+        path = directory and os.path.join(self.root, directory) or self.root
+        mtime = 0
+        if self.manifest:
+            mtime = os.stat(path).st_mtime_ns
+            known = self.directories.get(key)
+
+            # A directory modified during the last walk is browsed again
+            if known and known[0] == mtime and mtime < self.time:
+                self.updated[key] = known
+                return known[1]
+
+        entries = []
+        prefix = directory and directory + os.path.sep or ""
+        with os.scandir(path) as iterator:
+            for entry in iterator:
+                rel_path = prefix + entry.name
+                kind = self.get_kind(entry)
+                if self.manifest:
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+
+                    entries.append((rel_path, stat.st_mtime_ns,
+                            stat.st_size, kind))
+                else:
+                    entries.append((rel_path, 0, 0, kind))
+
+        self.updated[key] = (mtime, entries)
+        self.modified = True
+        return entries
+
+    def is_nested(self):
+        """Return whether the root directory only contains directories.
+
+        The ignored directories (like the cache) are not considered.
+
+        """
+        return all(kind == DIRECTORY for path, mtime, size, kind in \
+                self.scan(None) if path not in IGNORED_DIRECTORIES)
+
+    def walk(self, directory=None):
+        """Yield the (path, kind) of the steps and stories, recursively.
+
+        The entries are yielded in the order of the directories, the
+        content of a sub-directory being yielded in place.
+
+        """
+        excludes = self.excludes
+        for path, mtime, size, kind in self.scan(directory):
+            if kind == FILE or excludes and self.is_excluded(path):
+                continue
+
+            if kind == DIRECTORY:
+                if os.path.basename(path) not in IGNORED_DIRECTORIES:
+                    yield from self.walk(path)
+            else:
+                yield (path, kind)
+
+    def find(self):
+        """Return the list of (path, kind) of the steps and stories.
+
+        The manifest, if any, is written afterwards.
+
+        """
+        self.scan_time = time.time_ns()
+        self.updated = {}
+        self.modified = False
+        entries = list(self.walk())
+        self.write_manifest()
+        return entries
@@ -0,0 +1,251 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Module containing the streaming parser of stories, described below."""
+
+from croissant.language.exceptions.syntax import *
+from croissant.language.header import *
+from croissant.language.keyword import keywords
+from croissant.organization.block import Block
+from croissant.story.scenario import Scenario
+from croissant.story.story import Story
+from croissant.story.tokenizer import *
+
+class Segment:
+
+    """A top-level block of a story, built from tokens.
+
+    A segment is either a line without indentation or a sequence of
+    indented lines.  An indented line belongs to the current segment
+    if it uses the same indentation character and is at least as
+    indented as the first line.  This is how 'Block.build' separates
+    the blocks of the first level.
+
+    """
+
+    __slots__ = ("tokens", "symbol", "base", "flat")
+
+    def __init__(self, token):
+        self.tokens = [token]
+        indentation = token.indentation
+        self.symbol = indentation and indentation[0] or None
+        self.base = len(indentation)
+        self.flat = True
+
+    @property
+    def start_at(self):
+        """Return the line number of the first token."""
+        return self.tokens[0].line
+
+    @property
+    def is_line(self):
+        """Return whether the segment is a line without indentation."""
+        return self.symbol is None
+
+    def accept(self, token):
+        """Add the token if it belongs to the segment.
+
+        Return whether the token was added.
+
+        """
+        indentation = token.indentation
+        if self.symbol is None or not indentation or \
+                indentation[0] != self.symbol or \
+                len(indentation) < self.base:
+            return False
+
+        if len(indentation) != self.base:
+            self.flat = False
+
+        self.tokens.append(token)
+        return True
+
+    def display(self):
+        """Return the text of the segment, without indentation."""
+        return "\n".join(token.text for token in self.tokens)
+
+    def get_lines(self, last=None):
+        """Return the lines of the segment, including blank lines."""
+        first = self.tokens[0].line
+        last = self.tokens[-1].line if last is None else last
+        lines = [""] * (last - first + 1)
+        for token in self.tokens:
+            lines[token.line - first] = token.indentation + token.text
+
+        return lines
+
+
+class StoryParser:
+
+    """Streaming parser of stories.
+
+    Unlike 'Story.parse', this parser doesn't build a hierarchy of
+    blocks:  the content is read by a tokenizer and a small state
+    machine creates the story and its scenarios directly from the
+    tokens.  The states are:
+        the language header (optional)
+        the story's title
+        the story's description
+        a scenario's title
+        a scenario's steps (contexts, event and postconditions).
+
+    Only the tokens of the current scenario are kept.  The errors
+    (and their line numbers) are the same as with 'Story.parse'.  A
+    scenario that doesn't have the expected structure (a title line
+    followed by indented steps) is read by 'Story.parse_scenarios'.
+
+    """
+
+    def __init__(self, path, father=None, language=DEFAULT_LANGUAGE):
+        self.path = path
+        self.father = father
+        self.language = language
+        self.tokenizer = None
+
+    @classmethod
+    def parse(cls, path, content, father=None, language=DEFAULT_LANGUAGE):
+        """Parse a content and create the corresponding story.
+
+        The arguments are the same as for 'Story.parse'.
+
+        """
+        return cls(path, father, language).read(content)
+
+    def read(self, content):
+        """Read the content and return the story."""
+        path = self.path
+        story = Story(path=path, father=self.father, language=self.language)
+        self.tokenizer = tokenizer = Tokenizer(content, self.language)
+        segments = self.iter_segments(tokenizer)
+
+        # The first segment can be the language header
+        segment = next(segments, None)
+        if segment is not None:
+            symbol = read_language(segment.display())
+            if symbol is not None:
+                if symbol not in get_languages():
+                    raise LanguageSyntaxError(path, segment.start_at + 1,
+                            "unknown language {}".format(repr(symbol)))
+
+                story.language = symbol
+                tokenizer.set_language(symbol)
+                segment = next(segments, None)
+
+                # The first token of this segment was already read
+                if segment is not None:
+                    tokenizer.classify(segment.tokens[0])
+
+        if segment is None:
+            raise EmptyFile(path)
+
+        # The story's title
+        symbol = story.language
+        path_title, story.title = self.classify(segment)
+        if path_title != "story.title":
+            story.title = None
+            raise MissingKeyword(path, segment.start_at + 1, symbol,
+                    keywords["story.title"])
+
+        # The story's description
+        description = next(segments, None)
+        if description is None:
+            raise StructureError(path, segment.start_at + 2,
+                    "the description couldn't be read")
+
+        story.set_description(description.display())
+
+        # The scenarios, by pairs of segments (title and steps)
+        scenarios = []
+        for title in segments:
+            body = next(segments, None)
+            if body is None:
+                break
+
+            scenarios.append(self.read_scenario(story, title, body))
+
+        for scenario in scenarios:
+            story.add_scenario(scenario)
+
+        return story
+
+    @staticmethod
+    def iter_segments(tokens):
+        """Yield the segments built from the tokens."""
+        segment = None
+        for token in tokens:
+            if token.kind == BLANK:
+                continue
+
+            if segment is not None:
+                if segment.accept(token):
+                    continue
+
+                yield segment
+
+            segment = Segment(token)
+
+        if segment is not None:
+            yield segment
+
+    def classify(self, segment):
+        """Return the keyword path and the rest of a segment."""
+        tokens = segment.tokens
+        if len(tokens) == 1:
+            token = tokens[0]
+            return token.kind, token.rest
+
+        path, rest = self.tokenizer.classifier(segment.display())
+        return path or TEXT, rest
+
+    def read_scenario(self, story, title, body):
+        """Read a scenario from its title and body segments."""
+        if not title.is_line or body.is_line or not body.flat:
+            lines = title.get_lines(body.tokens[-1].line)
+            for token in body.tokens:
+                lines[token.line - title.start_at] = token.indentation + \
+                        token.text
+
+            block = Block.build(lines, start_at=title.start_at)
+            return story.parse_scenarios(list(block))[0]
+
+        symbol = story.language
+        scenario = Scenario("unknown", story)
+        scenario.start_at = title.start_at + 1
+        token = title.tokens[0]
+        if token.kind != "scenario.title":
+            raise MissingKeyword(story.path, token.line + 1, symbol,
+                    keywords["scenario.title"])
+
+        scenario.title = token.rest
+        steps = [(token.kind, token.rest, token.line) for token in \
+                body.tokens]
+        scenario.tags, steps = scenario.split_tags(steps)
+        scenario.extract_contexts(body, symbol, steps)
+        scenario.extract_event(body, symbol, steps)
+        scenario.extract_postconditions(body, symbol, steps)
+        return scenario
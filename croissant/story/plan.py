@@ -0,0 +1,108 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Module containing the Plan class, described below."""
+
+from croissant.step.exceptions import *
+from croissant.step.functions import convert_arguments
+
+class Plan:
+
+    """The execution plan of a scenario.
+
+    A plan is created when the scenario is compiled (see 'compile'):
+    each context, event and postcondition is resolved to the method
+    of the step class and its arguments.  Running the plan then only
+    creates the step and calls these methods.
+
+    A plan has:
+        class_object -- the step class
+        calls -- a list of (method name, function, arguments, line,
+                converters):  the function is the decorated one (see
+                'step.functions') or None, if the method should be
+                called with the line.  The converters of the typed
+                arguments (see 'compile_expression') are applied when
+                the plan is run, so that each run gets its own values.
+
+    """
+
+    __slots__ = ("class_object", "calls")
+
+    def __init__(self, class_object, calls):
+        self.class_object = class_object
+        self.calls = calls
+
+    def __repr__(self):
+        return "<Plan of {} ({} calls)>".format(self.class_object.__name__,
+                len(self.calls))
+
+    @classmethod
+    def compile(cls, class_object, scenario, errors=None):
+        """Compile a scenario with a step class and return its plan.
+
+        If a step line cannot be found, StepNotFound is raised, unless
+        'errors' is a list:  in this case, an error is added for each
+        line that cannot be found and None is returned.
+
+        """
+        lines = [(class_object.context_index, context) for context in \
+                scenario.contexts]
+        lines.append((class_object.event_index, scenario.event))
+        lines.extend((class_object.postcondition_index, postcondition) for \
+                postcondition in scenario.postconditions)
+        calls = []
+        valid = True
+        for index, line in lines:
+            resolution = index.resolve(line)
+            if resolution is None:
+                error = StepNotFound(scenario, line)
+                if errors is None:
+                    raise error
+
+                errors.append(error)
+                valid = False
+                continue
+
+            method_name, args = resolution
+            method = getattr(class_object, method_name, None)
+            function = getattr(method, "_function", None)
+            converters = getattr(method, "_converters", None)
+            calls.append((method_name, function, args, line, converters))
+
+        return cls(class_object, calls) if valid else None
+
+    def run(self, scenario):
+        """Run the plan for the given scenario."""
+        step = self.class_object(scenario)
+        for method_name, function, args, line, converters in self.calls:
+            if function is None:
+                getattr(step, method_name)(line)
+            elif converters is None:
+                function(step, *args)
+            else:
+                function(step, *convert_arguments(converters, args))
@@ -30,8 +30,10 @@
 """Module containing the Scenario class, described below."""
 
 from croissant.language.exceptions.syntax import *
-from croissant.language.keyword import keywords
+from croissant.language.header import DEFAULT_LANGUAGE
+from croissant.language.keyword import get_classifier, keywords
 from croissant.organization.block import Block
+from croissant.story.tags import read_tags
 
 class Scenario:
 
@@ -41,7 +43,8 @@ class Scenario:
         title -- a simple title
         contexts -- lines of context
         event -- the event triggering the test
-        postconditions -- lines of postcondition.
+        postconditions -- lines of postcondition
+        tags -- the scenario's tags (see the 'story.tags' module).
 
     """
 
@@ -51,6 +54,7 @@ class Scenario:
         self.contexts = []
         self.event = ""
         self.postconditions = []
+        self.tags = []
         self.start_at = 0
 
     def __repr__(self):
@@ -63,6 +67,11 @@ class Scenario:
         """Return the father's path, if found."""
         return self.father and self.father.path or "[undefined]"
 
+    @property
+    def language(self):
+        """Return the father's language, or the default one."""
+        return getattr(self.father, "language", DEFAULT_LANGUAGE)
+
     @property
     def identifier(self):
         """Return path:line_no."""
@@ -91,92 +100,138 @@ class Scenario:
             raise ValueError("the scenario doesn't have a proper definition")
 
         # The first line of this block should be a context
-        # 'given something...'
-        scenario.extract_contexts(block)
-        scenario.extract_event(block)
-        scenario.extract_postconditions(block)
+        # 'given something...'.  Each line is classified only once.
+        symbol = scenario.language
+        steps = scenario.classify(block, symbol)
+        scenario.tags, steps = scenario.split_tags(steps)
+        scenario.extract_contexts(block, symbol, steps)
+        scenario.extract_event(block, symbol, steps)
+        scenario.extract_postconditions(block, symbol, steps)
         return scenario
 
+    @staticmethod
+    def classify(block, symbol=DEFAULT_LANGUAGE):
+        """Return the steps of a block.
+
+        A step is a tuple (keyword path, rest of the line, line number)
+        for each line of the block.  See the 'KeywordClassifier' class
+        for more details.
+
+        """
+        classify = get_classifier(symbol).classify
+        steps = []
+        for i in range(len(block)):
+            line = block[i]
+            path, rest = classify(line.display(indentation=False))
+            steps.append((path, rest, line.start_at))
+
+        return steps
+
+    @staticmethod
+    def split_tags(steps):
+        """Return the tags of the first steps and the following steps.
+
+        The tag lines (see the 'story.tags' module) can only be at the
+        beginning of the steps.
+
+        """
+        tags = []
+        for i, (path, rest, line) in enumerate(steps):
+            names = read_tags(rest)
+            if names is None:
+                return tags, steps[i:]
+
+            tags.extend(names)
+
+        return tags, []
+
+    @staticmethod
+    def get_start(block, steps):
+        """Return the line of the first step (after the tags)."""
+        return steps[0][2] if steps else block.start_at
+
     def extract_title(self, block):
         """Extract the title from a block."""
         block = block[0]
-        title = block.display(indentation=False)
-        keyword = keywords["scenario.title"]
-        symbol = "en"
-        title = keyword.parse(symbol, title)
-        if title is None:
-            path = self.path
-            raise MissingKeyword(path, block.start_at + 1, symbol, keyword)
+        symbol = self.language
+        path, title = get_classifier(symbol).classify(
+                block.display(indentation=False))
+        if path != "scenario.title":
+            keyword = keywords["scenario.title"]
+            raise MissingKeyword(self.path, block.start_at + 1, symbol,
+                    keyword)
 
         self.title = title
 
-    def extract_contexts(self, block, symbol="en"):
-        """Extract the contexts from a block."""
-        given = keywords["scenario.given"]
-        context = given.parse(symbol, block[0].display(indentation=False))
-        if context is None:
-            path = self.path
-            line = block.start_at + 1
-            raise MissingKeyword(path, line, symbol, given)
+    def extract_contexts(self, block, symbol=None, steps=None):
+        """Extract the contexts from a block.
 
-        contexts = [context]
-        still = True
-        i = 1
-        while still:
-            try:
-                line = block[i].display(indentation=False)
-            except IndexError:
-                break
+        If the steps are given (see 'classify'), only the 'start_at'
+        attribute of the block is used.  This is true for the event
+        and postconditions as well.  The tags should have been removed
+        from the steps (see 'split_tags').
 
-            keyword = keywords["scenario.and"]
-            context = keyword.parse(symbol, line)
-            if context:
+        """
+        symbol = symbol or self.language
+        if steps is None:
+            steps = self.classify(block, symbol)
+
+        if not steps or steps[0][0] != "scenario.given":
+            line = self.get_start(block, steps) + 1
+            raise MissingKeyword(self.path, line, symbol,
+                    keywords["scenario.given"])
+
+        path, context, line = steps[0]
+        contexts = [context]
+        for path, context, line in steps[1:]:
+            if path == "scenario.and" and context:
                 contexts.append(context)
-                i += 1
             else:
                 break
 
         self.contexts = contexts
 
-    def extract_event(self, block, symbol="en"):
+    def extract_event(self, block, symbol=None, steps=None):
         """Extract the contexts from a block."""
-        block = block[len(self.contexts)]
-        line = 1 + block.start_at
-        keyword = keywords["scenario.when"]
-        event = keyword.parse(symbol, block.display(indentation=False))
-        if event is None:
-            path = self.path
-            raise MissingKeyword(path, line, symbol, keyword)
+        symbol = symbol or self.language
+        if steps is None:
+            steps = self.classify(block, symbol)
+
+        if len(steps) <= len(self.contexts):
+            raise MissingKeyword(self.path, steps[-1][2] + 2, symbol,
+                    keywords["scenario.when"])
+
+        path, event, line = steps[len(self.contexts)]
+        if path != "scenario.when":
+            raise MissingKeyword(self.path, line + 1, symbol,
+                    keywords["scenario.when"])
 
         self.event = event
 
-    def extract_postconditions(self, block, symbol="en"):
+    def extract_postconditions(self, block, symbol=None, steps=None):
         """Extract the postconditions of a block."""
-        no_line = len(self.contexts) + 2 + block.start_at
-        keyword = keywords["scenario.then"]
-        ct_block = block[len(self.contexts) + 1]
-        condition = keyword.parse(symbol, ct_block.display(indentation=False))
-        if condition is None:
-            path = self.path
-            raise MissingKeyword(path, no_line, symbol, keyword)
+        symbol = symbol or self.language
+        if steps is None:
+            steps = self.classify(block, symbol)
 
-        conditions = [condition]
-        still = True
-        i = 2 + len(self.contexts)
-        while still:
-            try:
-                line = block[i].display(indentation=False)
-            except IndexError:
-                break
+        if len(steps) <= len(self.contexts) + 1:
+            raise MissingKeyword(self.path, steps[-1][2] + 2, symbol,
+                    keywords["scenario.then"])
+
+        path, condition, line = steps[len(self.contexts) + 1]
+        if path != "scenario.then":
+            no_line = len(self.contexts) + 2 + self.get_start(block, steps)
+            raise MissingKeyword(self.path, no_line, symbol,
+                    keywords["scenario.then"])
 
-            keyword = keywords["scenario.and"]
-            condition = keyword.parse(symbol, line)
-            if condition:
+        conditions = [condition]
+        for i in range(2 + len(self.contexts), len(steps)):
+            path, condition, line = steps[i]
+            if path == "scenario.and" and condition:
                 conditions.append(condition)
-                i += 1
             else:
-                path = self.path
-                no_line = i + 1 + block.start_at
-                raise MissingKeyword(path, no_line, symbol, keyword)
+                no_line = i + 1 + self.get_start(block, steps)
+                raise MissingKeyword(self.path, no_line, symbol,
+                        keywords["scenario.and"])
 
         self.postconditions = conditions
@@ -0,0 +1,191 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Module containing the Selection class, described below."""
+
+from fnmatch import fnmatch
+import re
+
+from croissant.language.header import *
+from croissant.language.keyword import get_classifier
+from croissant.organization.block import Block
+from croissant.story.tags import TagExpression, read_tags
+
+class Selection:
+
+    """Class representing a selection of stories and scenarios.
+
+    A selection has three optional filters:
+        stories -- glob patterns matched against the story names (like
+                "features.login*"), a story is selected if it matches
+                one of them
+        scenarios -- a regular expression searched in the titles of
+                the scenarios
+        tags -- a tag expression (see 'story.tags') evaluated on the
+                tags of the scenarios and of their story.
+
+    A story is selected if its name matches and at least one of its
+    scenarios matches the other filters.  Only these scenarios are
+    kept.  To avoid parsing stories that can't match, a story file
+    can be scanned first (see 'scan'):  only the titles and tags of
+    its scenarios are read.
+
+    A ValueError is raised if the regular expression or the tag
+    expression isn't valid.
+
+    """
+
+    def __init__(self, stories=(), scenarios=None, tags=None):
+        self.stories = list(stories)
+        self.scenarios = None
+        self.tags = None
+        if scenarios is not None:
+            try:
+                self.scenarios = re.compile(scenarios)
+            except re.error as err:
+                raise ValueError("invalid regular expression {}: {}".format(
+                        repr(scenarios), err))
+
+        if tags is not None:
+            self.tags = TagExpression(tags)
+
+    @property
+    def filters_scenarios(self):
+        """Return whether the scenarios are filtered."""
+        return self.scenarios is not None or self.tags is not None
+
+    def match_name(self, name):
+        """Return whether the story name is selected."""
+        if not self.stories:
+            return True
+
+        return any(fnmatch(name, pattern) for pattern in self.stories)
+
+    def find_unknown(self, names):
+        """Return the story patterns matching none of the names.
+
+        The names should be the ones of every story found, selected
+        or not (see 'StorySet.story_names').
+
+        """
+        return [pattern for pattern in self.stories if not any(
+                fnmatch(name, pattern) for name in names)]
+
+    def match_scenario(self, title, tags):
+        """Return whether a scenario is selected.
+
+        Parameters:
+            title -- the scenario's title
+            tags -- the tags of the scenario and its story.
+
+        """
+        if self.scenarios is not None and not self.scenarios.search(title):
+            return False
+
+        if self.tags is not None and not self.tags.match(set(tags)):
+            return False
+
+        return True
+
+    def filter(self, story):
+        """Remove the scenarios of the story that are not selected.
+
+        Return whether the story is selected:  if scenarios are
+        filtered, at least one of them should remain.
+
+        """
+        if not self.filters_scenarios:
+            return True
+
+        for scenario in list(story.scenarios):
+            if not self.match_scenario(scenario.title, story.tags + \
+                    scenario.tags):
+                story.remove_scenario(scenario)
+
+        return bool(story.scenarios)
+
+    def scan(self, content, language=DEFAULT_LANGUAGE):
+        """Return whether a story file could contain selected scenarios.
+
+        The content is read (see 'Block.iter_lines') but not parsed:
+        only the lines without indentation (the title of the story and
+        of the scenarios) and the tags following them are read.
+
+        """
+        if not self.filters_scenarios:
+            return True
+
+        classify = None
+        story_tags = None
+        title = None
+        tags = []
+        reading_tags = False
+        description = False
+        for line in Block.iter_lines(content):
+            text = line.strip()
+            if not text:
+                continue
+
+            # The description follows the title, even without indentation
+            if line[0] in " \t" or description:
+                description = False
+                if reading_tags:
+                    names = read_tags(text)
+                    if names is None:
+                        reading_tags = False
+                    else:
+                        tags.extend(names)
+
+                continue
+
+            # A line without indentation:  the language header or a title
+            if classify is None:
+                symbol = read_language(text)
+                if symbol is not None and symbol in get_languages():
+                    language = symbol
+
+                classify = get_classifier(language).classify
+                if symbol is not None:
+                    continue
+
+            if story_tags is None:
+                # The story's title, followed by the story's tags
+                story_tags = tags = []
+                description = True
+            else:
+                if title is not None and self.match_scenario(title,
+                        story_tags + tags):
+                    return True
+
+                path, title = classify(text)
+                tags = []
+
+            reading_tags = True
+
+        return title is not None and self.match_scenario(title,
+                story_tags + tags)
@@ -31,9 +31,11 @@
 import os
 
 from croissant.language.exceptions.syntax import *
-from croissant.language.keyword import keywords
+from croissant.language.header import *
+from croissant.language.keyword import get_classifier, keywords
 from croissant.organization.block import Block
 from croissant.story.scenario import Scenario
+from croissant.story.tags import split_tags
 
 class Story:
 
@@ -43,17 +45,26 @@ class Story:
         title -- the story's title
         description -- the story's description
         scenarios -- a list of scenarios defined in this story
+        language -- the language symbol (like "en")
+        tags -- the story's tags (see the 'story.tags' module)
+
+    The language is the default one, unless the first line of the
+    file specifies another one (see the 'language.header' module).
 
     The definition of this structure is explained in more details
     in the 'language.story' module.
 
     """
 
-    def __init__(self, path="[undefined]", father=None):
+    def __init__(self, path="[undefined]", father=None,
+            language=DEFAULT_LANGUAGE):
         self.path = path
         self.father = father
+        self.default_language = language
+        self.language = language
         self.title = "not set"
         self.description = "not set"
+        self.tags = []
         self.scenarios = []
 
     def __repr__(self):
@@ -75,54 +86,180 @@ class Story:
         scenario.father = None
 
     @classmethod
-    def parse(cls, path, content, father=None):
+    def parse(cls, path, content, father=None, language=DEFAULT_LANGUAGE):
         """Parse a file and create the corresponding story.
 
         The path should be the path leading to the story file.
-        If mentioned, the father argument should be the story set
-        that will add this story when it will be parsed.
+        The content can be a string, a file object, a memory-mapped
+        file or any iterable of lines (see 'Block.build').  If
+        mentioned, the father argument should be the story set that
+        will add this story when it will be parsed.  The language is
+        used if the file doesn't specify one.
 
         """
-        story = cls(path=path, father=father)
+        story = cls(path=path, father=father, language=language)
         block = Block.build(content)
+        for scenario in story.parse_scenarios(story.parse_header(block)):
+            story.add_scenario(scenario)
+
+        return story
+
+    @staticmethod
+    def find_language(blocks):
+        """Return the language specified in the first block, or None."""
+        if not blocks:
+            return None
+
+        return read_language(blocks[0].display(indentation=False))
+
+    def parse_header(self, block):
+        """Parse the story's language, title and description.
+
+        The block should be the one built from the story file:  its
+        first child is the title and its second one the description,
+        unless they are preceded by the language header.  The
+        following blocks (the scenarios) are returned.
+
+        """
+        path = self.path
+        blocks = list(block)
+        symbol = self.find_language(blocks)
+        if symbol is None:
+            self.language = self.default_language
+        elif symbol not in get_languages():
+            raise LanguageSyntaxError(path, blocks[0].start_at + 1,
+                    "unknown language {}".format(repr(symbol)))
+        else:
+            self.language = symbol
+            del blocks[0]
 
         # The first line should contain the title
-        if len(block) == 0:
+        if len(blocks) == 0:
             # The file is empty
-            raise EmptyFile("the story file {} is empty".format(
-                    repr(path)))
+            raise EmptyFile(path)
 
-        try:
-            block_title = block[0]
-        except IndexError:
-            raise MissingKeyword("the {} keyword should be the " \
-                    "first line of your {} file".format(
-                    repr(keyword.languages[symbol]), repr(file)))
-
-        symbol = "en"
-        title = block_title.display(indentation=False)
-        keyword = keywords["story.title"]
-        story.title = keyword.parse(symbol, title)
-        if story.title is None:
-            raise MissingKeyword(path, block.start_at + 1, symbol, keyword)
+        symbol = self.language
+        title = blocks[0].display(indentation=False)
+        keyword_path, self.title = get_classifier(symbol).classify(title)
+        if keyword_path != "story.title":
+            self.title = None
+            keyword = keywords["story.title"]
+            raise MissingKeyword(path, blocks[0].start_at + 1, symbol, keyword)
 
         # The description should be slightly indented then (2nd block)
         try:
-            description_block = block[1]
+            description_block = blocks[1]
         except IndexError:
-            raise StructureError("the descrption couldn't be read " \
-                    "from {}".format(repr(path)))
+            raise StructureError(path, blocks[0].start_at + 2,
+                    "the description couldn't be read")
+
+        self.set_description(description_block.display(indentation=False))
+        return blocks[2:]
+
+    def set_description(self, description):
+        """Set the description, reading the tags at its beginning."""
+        tags, lines = split_tags(description.split("\n"))
+        self.tags = tags
+        self.description = "\n".join(lines)
 
-        story.description = description_block.display(indentation=False)
-        scenario_blocks = block[2:]
+    def parse_scenarios(self, blocks):
+        """Parse and return the scenarios defined in the blocks.
+
+        The blocks should go by pairs:  the scenario's title and the
+        scenario's body.  The scenarios are not added to the story.
+
+        """
+        scenarios = []
         title = None
-        for sub_block in scenario_blocks:
+        for sub_block in blocks:
             if title:
-                title._children.append(sub_block)
-                scenario = Scenario.parse(title, story)
-                story.add_scenario(scenario)
+                title.append(sub_block)
+                scenarios.append(Scenario.parse(title, self))
                 title = None
             else:
                 title = sub_block
 
-        return story
+        return scenarios
+
+    def update(self, content, first, last, difference=0):
+        """Update the story after some of its lines were modified.
+
+        This method is useful when a story file is edited:  instead of
+        parsing the whole file again, only the parts (the header or
+        the scenarios) containing modified lines are parsed.  The
+        other scenarios are kept (their line numbers are updated).
+
+        Parameters:
+            content -- the new content of the story (see 'parse')
+            first -- the first modified line (starting at 0)
+            last -- the line after the last modified one, in the new
+                    content
+            difference -- the number of lines that were added (or
+                    removed, if negative).
+
+        The list of new scenarios is returned.
+
+        """
+        lines = list(Block.iter_lines(content))
+        old_last = max(first, last - difference)
+
+        # The story is divided in parts (the header, then each scenario)
+        # identified by the line on which they begin.  The parts to
+        # parse again go from the one containing the line before
+        # the modification to the one after the modification.
+        starts = [0] + [scenario.start_at - 1 for scenario in \
+                self.scenarios]
+        begin = 0
+        while begin + 1 < len(starts) and starts[begin + 1] < first:
+            begin += 1
+
+        end = begin + 1
+        while end < len(starts) and starts[end] < old_last:
+            end += 1
+
+        while True:
+            if end < len(starts):
+                region_end = starts[end] + difference
+            else:
+                region_end = len(lines)
+
+            block = Block.build(lines[starts[begin]:region_end],
+                    start_at=starts[begin])
+            blocks = list(block)
+            header = 0
+            if begin == 0:
+                symbol = self.find_language(blocks)
+                header = 2 if symbol is None else 3
+                symbol = symbol or self.default_language
+
+            if end < len(starts):
+                # The header needs its blocks, the following scenario
+                # is used if they are missing
+                if len(blocks) < header:
+                    end += 1
+                    continue
+
+                # A scenario title without body would be read, in the
+                # whole file, with the following scenario.  If the
+                # language changes, every scenario is read again.
+                if (len(blocks) - header) % 2 == 1 or (begin == 0 and \
+                        symbol != self.language):
+                    end = len(starts)
+                    continue
+
+            break
+
+        if begin == 0:
+            blocks = self.parse_header(block)
+
+        scenarios = self.parse_scenarios(blocks)
+        first_scenario = max(begin, 1) - 1
+        for scenario in self.scenarios[first_scenario:end - 1]:
+            scenario.father = None
+
+        following = self.scenarios[end - 1:]
+        for scenario in following:
+            scenario.start_at += difference
+
+        self.scenarios[first_scenario:] = scenarios + following
+        return scenarios
@@ -28,13 +28,73 @@
 
 """Module containing the class StorySet described below."""
 
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 import importlib
 import os
 import sys
 
+from croissant.language.exceptions.syntax import LanguageSyntaxError
+from croissant.language.header import DEFAULT_LANGUAGE
+from croissant.step.base import BaseStep
 from croissant.step.exceptions import *
+from croissant.step.functions import convert_arguments
+from croissant.step.index import StepIndex
+from croissant.step.meta import StepMeta
+from croissant.step.registry import StepRegistry
+from croissant.step.static import StaticIndex
+from croissant.story.cache import HashedFile, StoryCache
+from croissant.story.discovery import Discovery, STEP
+from croissant.story.parser import StoryParser
+from croissant.story.plan import Plan
 from croissant.story.story import Story
 
+# Name of the file of the static index of steps, in the cache directory
+STATIC_INDEX = "steps.index"
+
+# Parsing engines (functions creating a story from a file)
+ENGINES = {
+    "block": Story.parse,
+    "stream": StoryParser.parse,
+}
+
+def read_story(root, engine, language, hashed, path):
+    """Read and parse a story file.
+
+    Return the key of the parsed content (see 'HashedFile') and the
+    story.  The content is only hashed if 'hashed' is True (the key
+    is None otherwise).  A syntax error is raised if the story cannot
+    be parsed.
+
+    """
+    parse = ENGINES[engine]
+    full_path = os.path.join(root, path)
+    if not hashed:
+        with open(full_path, "r") as file:
+            return None, parse(path, file, language=language)
+
+    with open(full_path, "rb") as file:
+        content = HashedFile(file)
+        story = parse(path, content, language=language)
+        return content.get_key(), story
+
+def parse_story(root, engine, language, hashed, path):
+    """Parse a story file and return its key and data.
+
+    This function is called in the processes of the pool when the
+    stories are parsed in parallel:  it returns the data of the story
+    (see 'StoryCache.dump'), cheaper to send back than the story.
+    If the story cannot be parsed, the syntax error is returned, so
+    that the other stories of the chunk are parsed nonetheless.
+
+    """
+    try:
+        key, story = read_story(root, engine, language, hashed, path)
+    except LanguageSyntaxError as err:
+        return err
+
+    return key, StoryCache.dump(story)
+
 class StorySet:
 
     """Class containing a set of user's story.
@@ -45,15 +105,53 @@ class StorySet:
     steps.
 
     It contains:
-        steps -- the user's steps
+        steps -- the user's steps (imported when needed)
+        step_modules -- the names of the step modules
         stories -- the user's stories
+        story_names -- the names of the stories found, even unselected
+        language -- the default language of the stories
+        engine -- the name of the parsing engine (see ENGINES)
+        cache -- the cache of parsed stories (a StoryCache) or None
+        jobs -- the number of processes parsing the stories
+        collect_errors -- should syntax errors be collected?
+        syntax_errors -- the collected syntax errors
+        excludes -- glob patterns of paths to ignore (see 'Discovery')
+        manifest -- the path of the manifest of the root, or None
+        selection -- the selection of stories and scenarios, or None
+        min_depth -- the depth of the root (see 'load')
+        plans -- the execution plans of the scenarios (see 'compile')
+        import_errors -- the errors raised by the step modules that
+                cannot be imported, by story name (see 'find_step')
+        static_index -- the steps read without importing them, or None
+        registry -- the step classes merged from several classes
+
+    If 'collect_errors' is False (the default), the first syntax error
+    interrupts the loading.  Otherwise, every story is parsed and the
+    syntax errors are stored in 'syntax_errors', in the order of the
+    files:  only the valid stories are loaded.
 
     """
 
     def __init__(self):
         self.stories = {}
+        self.story_names = []
         self.steps = {}
+        self.step_modules = {}
         self.path = None
+        self.language = DEFAULT_LANGUAGE
+        self.engine = "stream"
+        self.cache = None
+        self.jobs = 1
+        self.collect_errors = False
+        self.syntax_errors = []
+        self.excludes = []
+        self.manifest = None
+        self.selection = None
+        self.min_depth = 0
+        self.plans = {}
+        self.import_errors = {}
+        self.static_index = None
+        self.registry = StepRegistry()
 
     def load(self, root):
         """Load the steps and stories in a directory.
@@ -87,77 +185,386 @@ class StorySet:
                 second.py
           Then the root directory will be 'example'.
 
+        The steps and stories are found by a 'Discovery' object,
+        which ignores the paths matching the 'excludes' patterns and
+        uses the manifest, if any, to avoid browsing the directories
+        that weren't modified.
+
+        If the 'jobs' attribute is greater than 1, the stories are
+        parsed by a pool of processes (see 'load_stories').
+
         """
         self.path = root
         sys.path.append(root)
+        discovery = Discovery(root, self.excludes, self.manifest)
+        entries = discovery.find()
 
         # If the root directory only contains sub-directory
-        if all(os.path.isdir(os.path.join(root, name)) for name in \
-                os.listdir(root)):
+        if discovery.is_nested():
             min_depth = 1
         else:
             min_depth = 0
 
-        self.load_directory(None, min_depth)
+        self.min_depth = min_depth
+        self.load_entries(entries, min_depth)
 
-    def load_directory(self, directory, min_depth):
-        """Recursively load a directory and its content.
+    def load_entries(self, entries, min_depth):
+        """Load the steps and stories found in the root directory.
 
         This method is automatically called by the 'load' method and
-        should not be called directly by the user.  Its role is to be
-        consistent with the structure of the root directory (which is
-        analyzed in the 'load' method).
-
-        """
-        path = directory and os.path.join(self.path, directory) or self.path
-        for file in os.listdir(path):
-            rel_path = directory and os.path.join(directory, file) or file
-            full_path = os.path.join(path, file)
-            if file.endswith(".py"):
-                self.load_step(rel_path, min_depth)
-            elif file.endswith(".feature"):
-                self.load_story(rel_path, min_depth)
-            elif os.path.isdir(full_path):
-                self.load_directory(rel_path, min_depth)
+        should not be called directly by the user.  The entries are
+        (path, kind) tuples, in the order of the discovery.
+
+        """
+        paths = []
+        for path, kind in entries:
+            if kind == STEP:
+                self.load_step(path, min_depth)
+                continue
+
+            self.story_names.append(self.get_story_name(path, min_depth))
+            if not self.is_selected(path, min_depth):
+                pass
+            elif self.jobs > 1:
+                paths.append(path)
+            else:
+                self.load_story(path, min_depth)
+
+        if paths:
+            self.load_stories(paths, min_depth)
 
     def load_story(self, path, min_depth):
-        """Load a specific story from a file."""
-        full_path = os.path.join(self.path, path)
-        with open(full_path, "r") as file:
-            content = file.read()
+        """Load a specific story from a file.
+
+        If the story set has a cache, the story is read from it when
+        the file hasn't changed.  Otherwise, the story is parsed and
+        then stored in the cache.
+
+        """
+        story = None
+        if self.cache is not None:
+            story = self.cache.load(path, self.language)
+
+        if story is None:
+            try:
+                key, story = read_story(self.path, self.engine,
+                        self.language, self.cache is not None, path)
+            except LanguageSyntaxError as err:
+                self.add_syntax_error(err)
+                return
+
+            if self.cache is not None:
+                self.cache.store(path, key, self.language,
+                        StoryCache.dump(story))
+
+        self.add_story(path, story, min_depth)
+
+    def load_stories(self, paths, min_depth):
+        """Load several stories, parsing them in a pool of processes.
+
+        The stories found in the cache (if any) are not parsed again.
+        The others are distributed among 'jobs' processes.  The stories
+        are then added in the order of the paths, whatever the order
+        in which they were parsed.  If a story cannot be parsed, the
+        first syntax error (in the order of the paths) is raised,
+        unless the syntax errors are collected.
+
+        """
+        stories = {}
+        if self.cache is not None:
+            for path in paths:
+                story = self.cache.load(path, self.language)
+                if story is not None:
+                    stories[path] = story
+
+        missing = [path for path in paths if path not in stories]
+        if missing:
+            parse = partial(parse_story, self.path, self.engine,
+                    self.language, self.cache is not None)
+            chunksize = max(1, len(missing) // (self.jobs * 4))
+            with ProcessPoolExecutor(self.jobs) as executor:
+                results = executor.map(parse, missing, chunksize=chunksize)
+                for path, result in zip(missing, results):
+                    if isinstance(result, LanguageSyntaxError):
+                        self.add_syntax_error(result)
+                        continue
+
+                    # The data was hashed and dumped in the process
+                    key, data = result
+                    if self.cache is not None:
+                        self.cache.store(path, key, self.language, data)
+
+                    stories[path] = StoryCache.restore(path, self.language,
+                            data)
+
+        for path in paths:
+            if path in stories:
+                self.add_story(path, stories[path], min_depth)
+
+    def add_syntax_error(self, error):
+        """Collect a syntax error, or raise it if they aren't collected."""
+        if not self.collect_errors:
+            raise error
+
+        self.syntax_errors.append(error)
+
+    def is_selected(self, path, min_depth):
+        """Return whether a story file could be selected.
+
+        If the story set has a selection, the name of the story is
+        checked, then the file is scanned (see 'Selection.scan').  A
+        story that isn't selected is not parsed.
+
+        """
+        selection = self.selection
+        if selection is None:
+            return True
+
+        if not selection.match_name(self.get_story_name(path, min_depth)):
+            return False
+
+        if selection.filters_scenarios:
+            with open(os.path.join(self.path, path), "r") as file:
+                return selection.scan(file, self.language)
 
-        story = Story.parse(path, content)
+        return True
+
+    def add_story(self, path, story, min_depth):
+        """Add a loaded story, named after its path.
+
+        If the story set has a selection, the scenarios that aren't
+        selected are removed and the story is only added if some
+        scenarios remain.
+
+        """
+        if self.selection is not None and not self.selection.filter(story):
+            return
+
+        self.stories[self.get_story_name(path, min_depth)] = story
+
+    def get_story_name(self, path, min_depth):
+        """Return the name of a story from its path."""
         name = os.path.basename(path)[:-8]
         basename = self.get_base_name(path, min_depth)
-        id_name = basename and basename + "." + name or name
-        self.stories[id_name] = story
+        return basename and basename + "." + name or name
+
+    def get_step_name(self, path, min_depth):
+        """Return the name of a step from its path."""
+        name = os.path.basename(path)[:-3]
+        basename = self.get_base_name(path, min_depth)
+        return basename and basename + "." + name or name
 
     def load_step(self, path, min_depth):
         """Load a step from a Python file.
 
-        This method loads the module (built from the specified path) and
-        use its content to find non-defined steps.  Parent steps are
-        supposedly NOT loaded.
+        The module (built from the specified path) is NOT imported here:
+        its name is only stored in 'step_modules', under the name of the
+        stories it applies to.  It will be imported by 'get_step' when
+        one of these stories is run.  Step modules can thus be slow to
+        import without slowing down the stories that don't use them.
 
         """
         dir_name = os.path.dirname(path)
-        basename = self.get_base_name(path, min_depth)
         name = os.path.basename(path)[:-3]
         package = dir_name.replace(os.path.sep, ".")
         module_name = package and package + "." + name or name
-        id_name = basename and basename + "." + name or name
-        module = importlib.import_module(module_name)
-        classes = [value for value in module.__dict__.values() if \
-                getattr(value, "croissant_path", None) == "unknown"]
-        if len(classes) == 0:
-            return
-        elif len(classes) > 1:
-            raise ValueError("multiple steps defined in the same file, it seems")
+        id_name = self.get_step_name(path, min_depth)
+        self.step_modules[id_name] = module_name
+
+    def get_step(self, name):
+        """Return the step class of a story, importing it if needed.
+
+        A KeyError is raised if no step is defined for this story.
+
+        """
+        class_object = self.steps.get(name)
+        if class_object is None:
+            class_object = self.import_step(name)
+
+        return class_object
+
+    def import_step(self, name):
+        """Import the step module of a story and return its step class.
+
+        This method imports the module and use its content to find
+        the steps defined in this module (not the imported ones, like
+        parent steps).  The classes are identified by their module
+        rather than by their 'croissant_path' attribute, which is
+        already set if the module is imported again or reloaded.
+
+        The module can also list the step classes of its stories in a
+        'croissant_steps' attribute, to use step libraries defined in
+        other modules.  If there are several step classes, they are
+        merged (see 'StepRegistry'):  the stories using the same
+        classes share the same merged class.
+
+        """
+        module = importlib.import_module(self.step_modules[name])
+        classes = getattr(module, "croissant_steps", None)
+        if classes is None:
+            classes = [value for value in module.__dict__.values() if \
+                    isinstance(value, StepMeta) and \
+                    value.__module__ == module.__name__]
         else:
-            class_object = classes[0]
+            classes = list(classes)
+
+        if len(classes) == 0:
+            raise KeyError(name)
+
+        class_object = self.registry.merge(classes)
+        if class_object in classes and \
+                class_object.__module__ == module.__name__:
+            class_object.croissant_path = name
+
+        self.steps[name] = class_object
+        return class_object
 
-        class_object.croissant_path = id_name
-        self.steps[id_name] = class_object
+    def index_steps(self):
+        """Read the step modules without importing them.
+
+        The static index (see 'StaticIndex') is built or updated from
+        the step modules, and stored in 'static_index'.  If the story
+        set has a cache, the index is written in the cache directory,
+        so that only the modified step files are read the next time.
+
+        """
+        if self.static_index is None:
+            path = None
+            if self.cache is not None:
+                path = os.path.join(self.cache.directory, STATIC_INDEX)
+
+            self.static_index = StaticIndex(self.path, path)
+
+        self.static_index.update(self.step_modules.values())
+        return self.static_index
+
+    def get_static_step(self, name):
+        """Return the step class of a story, read without importing it.
+
+        A StaticStep (see 'StaticIndex.get_step') is returned.  As
+        with 'get_step', a KeyError is raised if no step is defined for
+        this story.
+
+        """
+        if self.static_index is None:
+            self.index_steps()
+
+        module_name = self.step_modules.get(name)
+        if module_name is None:
+            raise KeyError(name)
+
+        step = self.static_index.get_step(module_name)
+        step.croissant_path = name
+        return step
+
+    def refresh(self, changed, removed=()):
+        """Load again the steps and stories whose files changed.
+
+        Parameters:
+            changed -- the (path, kind) of the added or modified files
+            removed -- the (path, kind) of the removed files.
+
+        The modified stories are parsed again.  The modified step
+        modules are removed from 'sys.modules', to be imported again
+        when needed:  unlike 'importlib.reload', the new module doesn't
+        keep the classes removed from the source.  The step modules
+        using their classes (see 'find_dependents') are imported again
+        as well.  The names of the added or removed stories are
+        updated in 'story_names'.  The scenarios affected by the
+        changes are returned as (story name, scenario) tuples:  the
+        scenarios of the stories whose steps changed and the new or
+        modified scenarios of the modified stories.
+
+        """
+        min_depth = self.min_depth
+        affected = {}
+
+        # The plans are compiled again when needed
+        self.plans.clear()
+        for path, kind in removed:
+            if kind == STEP:
+                name = self.get_step_name(path, min_depth)
+                self.step_modules.pop(name, None)
+                self.steps.pop(name, None)
+                self.import_errors.pop(name, None)
+            else:
+                name = self.get_story_name(path, min_depth)
+                self.stories.pop(name, None)
+                if name in self.story_names:
+                    self.story_names.remove(name)
+
+        importlib.invalidate_caches()
+        for path, kind in changed:
+            if kind == STEP:
+                name = self.get_step_name(path, min_depth)
+                self.load_step(path, min_depth)
+                module_name = self.step_modules[name]
+                names = [name] + self.find_dependents(module_name)
+                for name in names:
+                    self.steps.pop(name, None)
+                    self.import_errors.pop(name, None)
+                    sys.modules.pop(self.step_modules[name], None)
+
+                    # All the scenarios of the story are affected
+                    affected[name] = None
+            else:
+                name = self.get_story_name(path, min_depth)
+                if name not in self.story_names:
+                    self.story_names.append(name)
+
+                old = self.stories.pop(name, None)
+                if self.is_selected(path, min_depth):
+                    self.load_story(path, min_depth)
+
+                if name not in affected or affected[name] is not None:
+                    known = set()
+                    if old is not None:
+                        known = set(self.describe_scenario(scenario) for \
+                                scenario in old.scenarios)
+
+                    affected[name] = known
+
+        if self.static_index is not None:
+            self.index_steps()
+
+        # The scenarios are taken from the stories once they are loaded
+        scenarios = []
+        for name, known in affected.items():
+            story = self.stories.get(name)
+            if story is None:
+                continue
+
+            for scenario in story.scenarios:
+                if known is None or self.describe_scenario(
+                        scenario) not in known:
+                    scenarios.append((name, scenario))
+
+        return scenarios
+
+    def find_dependents(self, module_name):
+        """Return the stories whose step class uses a module.
+
+        The step classes already imported are checked:  if one of the
+        classes they inherit from (or merge, see 'StepRegistry') is
+        defined in the given module, the name of the story is returned.
+
+        """
+        names = []
+        for name, class_object in self.steps.items():
+            if self.step_modules.get(name) == module_name:
+                continue
+
+            if any(base.__module__ == module_name for base in \
+                    class_object.__mro__):
+                names.append(name)
+
+        return names
+
+    @staticmethod
+    def describe_scenario(scenario):
+        """Return what defines the behaviour of a scenario, as a tuple."""
+        return (scenario.title, tuple(scenario.contexts), scenario.event,
+                tuple(scenario.postconditions))
 
     def run_story(self, name):
         """Run the specified story."""
@@ -165,35 +572,174 @@ class StorySet:
         for scenario in story.scenarios:
             self.run_scenario(name, scenario)
 
+    def compile(self, static=False):
+        """Compile the scenarios of all the stories (see 'Plan').
+
+        The plans are stored in 'plans'.  The list of StepNotFound
+        errors (one for each step line that cannot be found, in all
+        the stories) is returned.  The stories whose step class cannot
+        be imported are not compiled:  the error is stored in
+        'import_errors' and will be raised when they are run.
+
+        If 'static' is True, the step modules aren't imported:  their
+        classes are read from the source (see 'get_static_step').
+        The plans, which cannot be run, aren't stored and the stories
+        whose step class is incomplete aren't checked.
+
+        """
+        errors = []
+        for name, story in self.stories.items():
+            class_object = self.find_step(name, static)
+            if class_object is None:
+                continue
+
+            for scenario in story.scenarios:
+                plan = Plan.compile(class_object, scenario, errors)
+                if plan is not None and not static:
+                    self.plans[scenario] = plan
+
+        return errors
+
+    def find_step(self, name, static=False):
+        """Return the step class used to check a story, or None.
+
+        Without step class, no step line can be found:  BaseStep is
+        returned.  None is returned if the step class cannot be
+        imported or, if 'static' is True, cannot be entirely read.
+        The error raised by a step module that cannot be imported is
+        stored in 'import_errors'.  Reading the step classes without
+        importing them shouldn't fail:  other errors are raised.
+
+        """
+        if static:
+            try:
+                class_object = self.get_static_step(name)
+            except KeyError:
+                return BaseStep
+        else:
+            try:
+                class_object = self.get_step(name)
+            except KeyError:
+                return BaseStep
+            except Exception as err:
+                self.import_errors[name] = err
+                return None
+
+            self.import_errors.pop(name, None)
+
+        if not getattr(class_object, "complete", True):
+            return None
+
+        return class_object
+
+    def find_ambiguous(self, static=False):
+        """Return the step lines matching several expressions.
+
+        A list of (scenario, line, matches) is returned, where matches
+        is the list of (expression, method name) matching the line,
+        in order (only the first one is called).  Each line is only
+        given once per step class.  If 'static' is True, the step
+        modules aren't imported (see 'compile').
+
+        """
+        ambiguous = []
+        seen = set()
+        for name, story in self.stories.items():
+            class_object = self.find_step(name, static)
+            if class_object is None:
+                continue
+
+            for scenario in story.scenarios:
+                lines = [(class_object.context_index, context) for \
+                        context in scenario.contexts]
+                lines.append((class_object.event_index, scenario.event))
+                lines.extend((class_object.postcondition_index,
+                        postcondition) for postcondition in \
+                        scenario.postconditions)
+                for index, line in lines:
+                    if (index, line) in seen:
+                        continue
+
+                    seen.add((index, line))
+                    matches = index.find_all(line)
+                    if len(matches) > 1:
+                        ambiguous.append((scenario, line, matches))
+
+        return ambiguous
+
+    def find_conflicts(self, static=False):
+        """Return the step classes whose expressions are in conflict.
+
+        Every step module is checked, even if no story uses it.  The
+        conflicts of each class are stored in its 'conflicts' attribute
+        (see 'StepMeta').  If 'static' is True, the step modules aren't
+        imported (see 'compile').
+
+        """
+        classes = []
+        for name in self.step_modules:
+            class_object = self.find_step(name, static)
+            if class_object is not None and class_object.conflicts and \
+                    class_object not in classes:
+                classes.append(class_object)
+
+        return classes
+
     def run_scenario(self, story_name, scenario):
-        """Run the specified scenario."""
-        # Create the step for this scenario
-        class_object = self.steps[story_name]
-        step = class_object(scenario)
-
-        # Call the contexts
-        for context in scenario.contexts:
-            method_name = self.find_expression(class_object.contexts,
-                    scenario, context)
-            getattr(step, method_name)(context)
-
-        # Call the event
-        method_name = self.find_expression(class_object.events,
-                scenario, scenario.event)
-        getattr(step, method_name)(scenario.event)
-
-        # Call the postconditions
-        for postcondition in scenario.postconditions:
-            method_name = self.find_expression(class_object.postconditions,
-                    scenario, postcondition)
-            getattr(step, method_name)(postcondition)
+        """Run the specified scenario.
+
+        The scenario is compiled if it wasn't (see 'compile'), then its
+        plan is run.
+
+        """
+        plan = self.plans.get(scenario)
+        if plan is None:
+            plan = Plan.compile(self.get_step(story_name), scenario)
+            self.plans[scenario] = plan
+
+        plan.run(scenario)
+
+    @staticmethod
+    def call_step(step, index, scenario, message):
+        """Find and call the method of a step line.
+
+        The index (see 'StepIndex') returns the method name and the
+        arguments, converted if needed (see 'convert_arguments') and
+        given to the decorated function.  If the method wasn't
+        decorated (it overrides a decorated method, for instance),
+        it's called with the step line, as before.
+
+        """
+        resolution = index.resolve(message)
+        if resolution is None:
+            raise StepNotFound(scenario, message)
+
+        method_name, args = resolution
+        method = getattr(type(step), method_name, None)
+        function = getattr(method, "_function", None)
+        if function is None:
+            return getattr(step, method_name)(message)
+
+        converters = getattr(method, "_converters", None)
+        return function(step, *convert_arguments(converters, args))
 
     @staticmethod
     def find_expression(expressions, scenario, message):
-        """Find the method name corresponding to the specified expression."""
-        for expression, method_name in expressions.items():
-            if expression.search(message):
+        """Find the method name corresponding to the specified expression.
+
+        The expressions are either a StepIndex (see 'StepMeta') or a
+        dictionary {expression: method name} whose expressions are
+        tried in order.  The result is the same in both cases.
+
+        """
+        if isinstance(expressions, StepIndex):
+            method_name = expressions.find(message)
+            if method_name is not None:
                 return method_name
+        else:
+            for expression, method_name in expressions.items():
+                if expression.search(message):
+                    return method_name
 
         raise StepNotFound(scenario, message)
 
@@ -0,0 +1,193 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Module containing the tags of stories and scenarios.
+
+Tags are written at the beginning of the description of a story or
+of the steps of a scenario, on lines containing only words beginning
+with '@':
+
+    Feature: a tagged story
+        @slow @database
+        The description
+
+    Scenario: a tagged scenario
+        @smoke
+        Given a context
+        ...
+
+The tags of a story apply to all its scenarios.  Scenarios can be
+selected with a tag expression (see the TagExpression class).
+
+"""
+
+import re
+
+RE_TOKEN = re.compile(r"\s*(?:(\()|(\))|(@[^\s()]+)|([^\s()]+))")
+
+def read_tags(line):
+    """Return the tags of a line (without '@'), or None.
+
+    A line contains tags if all its words begin with '@'.
+
+    """
+    words = line.split()
+    if not words or not all(word.startswith("@") and len(word) > 1 for \
+            word in words):
+        return None
+
+    return [word[1:] for word in words]
+
+def split_tags(lines):
+    """Return the tags of the first lines and the following lines.
+
+    The tag lines must be at the beginning:  a tag line after another
+    line is not read.
+
+    """
+    tags = []
+    for i, line in enumerate(lines):
+        names = read_tags(line)
+        if names is None:
+            return tags, lines[i:]
+
+        tags.extend(names)
+
+    return tags, []
+
+
+class TagExpression:
+
+    """A boolean expression on tags.
+
+    The expression contains tags (beginning with '@'), the operators
+    'and', 'or' and 'not' (from the lowest priority to the highest)
+    and parentheses.  For instance:
+        @smoke or (@slow and not @database)
+
+    The expression is parsed once and compiled to nested functions.
+    Call 'match' with a set of tags (without '@') to evaluate it.
+    A ValueError is raised if the expression is not valid.
+
+    """
+
+    def __init__(self, expression):
+        self.expression = expression
+        self.tokens = self.tokenize(expression)
+        self.position = 0
+        self.function = self.read_or()
+        if self.position < len(self.tokens):
+            self.error("unexpected {}".format(repr(self.tokens[
+                    self.position])))
+
+        del self.tokens
+
+    def __repr__(self):
+        return "<TagExpression {}>".format(repr(self.expression))
+
+    def match(self, tags):
+        """Return whether the set of tags matches the expression."""
+        return self.function(tags)
+
+    def error(self, message):
+        """Raise a ValueError for the expression."""
+        raise ValueError("invalid tag expression {}: {}".format(
+                repr(self.expression), message))
+
+    def tokenize(self, expression):
+        """Return the list of tokens of the expression."""
+        tokens = []
+        position = 0
+        expression = expression.rstrip()
+        while position < len(expression):
+            match = RE_TOKEN.match(expression, position)
+            word = match.group(4)
+            if word is not None and word not in ("and", "or", "not"):
+                self.error("unexpected {}".format(repr(word)))
+
+            tokens.append(match.group(match.lastindex))
+            position = match.end()
+
+        if not tokens:
+            self.error("the expression is empty")
+
+        return tokens
+
+    def next(self):
+        """Return the next token, or None at the end."""
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+
+        return None
+
+    def read_or(self):
+        """Read operands separated by 'or'."""
+        functions = [self.read_and()]
+        while self.next() == "or":
+            self.position += 1
+            functions.append(self.read_and())
+
+        if len(functions) == 1:
+            return functions[0]
+
+        return lambda tags: any(function(tags) for function in functions)
+
+    def read_and(self):
+        """Read operands separated by 'and'."""
+        functions = [self.read_not()]
+        while self.next() == "and":
+            self.position += 1
+            functions.append(self.read_not())
+
+        if len(functions) == 1:
+            return functions[0]
+
+        return lambda tags: all(function(tags) for function in functions)
+
+    def read_not(self):
+        """Read an operand, maybe preceded by 'not'."""
+        token = self.next()
+        if token == "not":
+            self.position += 1
+            function = self.read_not()
+            return lambda tags: not function(tags)
+        elif token == "(":
+            self.position += 1
+            function = self.read_or()
+            if self.next() != ")":
+                self.error("missing ')'")
+
+            self.position += 1
+            return function
+        elif token is not None and token.startswith("@"):
+            self.position += 1
+            tag = token[1:]
+            return lambda tags: tag in tags
+
+        self.error("expecting a tag, found {}".format(
+                repr(token) if token else "the end"))
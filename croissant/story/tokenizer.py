@@ -0,0 +1,114 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Module containing the tokenizer of stories, described below."""
+
+from croissant.language.header import DEFAULT_LANGUAGE
+from croissant.language.keyword import get_classifier
+from croissant.organization.block import Block
+
+BLANK = "blank"
+TEXT = "text"
+
+class Token:
+
+    """A line of a story file, read by the tokenizer.
+
+    A token has:
+        kind -- the kind of line:  BLANK, TEXT (a line without keyword)
+                or the path of the keyword (like "scenario.given")
+        line -- the line number (starting at 0)
+        indentation -- the indentation of the line
+        text -- the line without its indentation
+        rest -- the text after the keyword (the text itself if there
+                is no keyword).
+
+    """
+
+    __slots__ = ("kind", "line", "indentation", "text", "rest")
+
+    def __init__(self, kind, line, indentation, text, rest):
+        self.kind = kind
+        self.line = line
+        self.indentation = indentation
+        self.text = text
+        self.rest = rest
+
+    def __repr__(self):
+        return "<Token {} at line {}: {}>".format(self.kind, self.line + 1,
+                repr(self.text))
+
+
+class Tokenizer:
+
+    """Tokenizer of stories, reading one line at a time.
+
+    The tokenizer is built with a content (a string, a file object or
+    any content accepted by 'Block.iter_lines').  Iterating over the
+    tokenizer yields a token per line.  The indentation of each line
+    is made of its first character (a space or a tabulation) and the
+    following identical characters.  The keyword is found with the
+    classifier of the tokenizer's language, which can be changed
+    while reading (see 'set_language').
+
+    """
+
+    def __init__(self, content, symbol=DEFAULT_LANGUAGE, start_at=0):
+        self.lines = Block.iter_lines(content)
+        self.start_at = start_at
+        self.symbol = None
+        self.classifier = None
+        self.set_language(symbol)
+
+    def __iter__(self):
+        for i, line in enumerate(self.lines, self.start_at):
+            if line.strip() == "":
+                yield Token(BLANK, i, "", "", "")
+                continue
+
+            symbol = line[0]
+            if symbol == " " or symbol == "\t":
+                text = line.lstrip(symbol)
+                indentation = line[:len(line) - len(text)]
+            else:
+                text = line
+                indentation = ""
+
+            path, rest = self.classifier(text)
+            yield Token(path or TEXT, i, indentation, text, rest)
+
+    def set_language(self, symbol):
+        """Change the language used to find keywords."""
+        self.symbol = symbol
+        self.classifier = get_classifier(symbol).classify
+
+    def classify(self, token):
+        """Find the keyword of a token again, after changing language."""
+        if token.kind != BLANK:
+            path, token.rest = self.classifier(token.text)
+            token.kind = path or TEXT
@@ -0,0 +1,94 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Module containing the Watcher class, described below."""
+
+import os
+import time
+
+from croissant.story.discovery import Discovery
+
+class Watcher:
+
+    """Class watching the steps and stories of a story set.
+
+    The watcher polls the root directory of a loaded story set:  the
+    steps and stories are found again (see 'Discovery') and their
+    modification time and size are compared to the previous ones.
+    Polling is portable and doesn't need any dependency.
+
+    Parameters:
+        story_set -- the loaded story set
+        interval -- the time between two polls, in seconds.
+
+    """
+
+    def __init__(self, story_set, interval=1.0):
+        self.story_set = story_set
+        self.interval = interval
+        self.files = self.take_snapshot()
+
+    def take_snapshot(self):
+        """Return a dictionary {path: (kind, mtime, size)}."""
+        story_set = self.story_set
+        root = story_set.path
+        files = {}
+        discovery = Discovery(root, story_set.excludes)
+        for path, kind in discovery.find():
+            try:
+                stat = os.stat(os.path.join(root, path))
+            except OSError:
+                continue
+
+            files[path] = (kind, stat.st_mtime_ns, stat.st_size)
+
+        return files
+
+    def poll(self):
+        """Return the changes since the last poll.
+
+        The changes are returned as a tuple of two lists of (path,
+        kind):  the added or modified files and the removed ones.
+
+        """
+        previous = self.files
+        self.files = files = self.take_snapshot()
+        changed = [(path, info[0]) for path, info in files.items() if \
+                previous.get(path) != info]
+        removed = [(path, info[0]) for path, info in previous.items() if \
+                path not in files]
+        return changed, removed
+
+    def wait(self):
+        """Wait for changes and return them (see 'poll')."""
+        while True:
+            changed, removed = self.poll()
+            if changed or removed:
+                return changed, removed
+
+            time.sleep(self.interval)
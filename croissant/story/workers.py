@@ -0,0 +1,248 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Module containing the functions running scenarios in worker processes.
+
+The scenarios are identified by the name of their story and their
+position in it, and distributed in batches to a pool of processes (see
+'run_parallel').  If the processes can be forked, they share the story
+set of the main process, whose step modules are already imported and
+whose scenarios are already compiled (see 'StorySet.compile').
+Otherwise, each process loads and compiles the story set once, when
+it starts (see 'init_worker').
+
+The result of a scenario only contains strings and numbers, to be sent
+back to the main process:
+    status -- SUCCESS, NOT_FOUND, FAILURE or ERROR
+    message -- the message of the error, if any
+    trace -- the formatted traceback of the error, if any
+    duration -- the time taken by the scenario, in seconds
+    detail -- the step path of a failure or the type of an error.
+
+The main process creates the errors again from the results (see
+'rebuild_error'), to give them to the output.
+
+"""
+
+import multiprocessing
+import time
+import traceback
+
+from croissant.step.exceptions import *
+from croissant.story.cache import StoryCache
+from croissant.story.selection import Selection
+from croissant.story.story_set import StorySet
+
+# Status of the scenarios
+SUCCESS = "success"
+NOT_FOUND = "not found"
+FAILURE = "failure"
+ERROR = "error"
+
+# Number of batches per worker, to balance the work
+BATCHES_PER_WORKER = 4
+
+# The story set of the worker process (see 'init_worker')
+worker_set = None
+
+class RemoteStep:
+
+    """The step of a failure in a worker process (see 'rebuild_error')."""
+
+    def __init__(self, scenario, croissant_path):
+        self.scenario = scenario
+        self.croissant_path = croissant_path
+
+
+class RemoteError(Exception):
+
+    """An error raised in a worker process (see 'rebuild_error').
+
+    The original exception may not be sent to the main process:  only
+    its type name ('error_type') and its message are kept.
+
+    """
+
+    def __init__(self, error_type, message):
+        Exception.__init__(self, message)
+        self.error_type = error_type
+        self.message = message
+
+    def __str__(self):
+        return self.message
+
+
+def run_scenario(story_set, story_name, scenario):
+    """Run a scenario and return its result (see above)."""
+    begin = time.perf_counter()
+    message = trace = detail = ""
+    try:
+        story_set.run_scenario(story_name, scenario)
+    except StepNotFound as err:
+        status = NOT_FOUND
+        message = err.message
+        trace = traceback.format_exc()
+    except StepAssertionError as err:
+        status = FAILURE
+        message = err.message
+        trace = traceback.format_exc()
+        detail = str(getattr(err.step, "croissant_path", ""))
+    except Exception as err:
+        status = ERROR
+        message = str(err)
+        trace = traceback.format_exc()
+        detail = type(err).__name__
+    else:
+        status = SUCCESS
+
+    return (status, message, trace, time.perf_counter() - begin, detail)
+
+def rebuild_error(scenario, result):
+    """Return the error of a scenario from its result, or None.
+
+    The error has the type expected by the output:  StepNotFound,
+    StepAssertionError (whose step is a RemoteStep) or RemoteError.
+
+    """
+    status, message, trace, duration, detail = result
+    if status == NOT_FOUND:
+        error = StepNotFound(scenario, "")
+        error.message = message
+    elif status == FAILURE:
+        error = StepAssertionError(RemoteStep(scenario, detail), message)
+    elif status == ERROR:
+        error = RemoteError(detail, message)
+    else:
+        error = None
+
+    return error
+
+def get_settings(story_set):
+    """Return the settings needed to load a story set again.
+
+    The settings are sent to the worker processes that cannot be
+    forked (see 'init_worker').
+
+    """
+    selection = story_set.selection
+    if selection is not None:
+        selection = (selection.stories, selection.scenarios and \
+                selection.scenarios.pattern, selection.tags and \
+                selection.tags.expression)
+
+    return {
+        "root": story_set.path,
+        "language": story_set.language,
+        "engine": story_set.engine,
+        "excludes": story_set.excludes,
+        "manifest": story_set.manifest,
+        "cache": story_set.cache is not None,
+        "selection": selection,
+    }
+
+def init_worker(settings):
+    """Load and compile the story set of a worker process.
+
+    The story set is loaded as in the main process, so that the
+    stories and their scenarios are in the same order.
+
+    """
+    global worker_set
+    story_set = StorySet()
+    story_set.language = settings["language"]
+    story_set.engine = settings["engine"]
+    story_set.excludes = settings["excludes"]
+    story_set.manifest = settings["manifest"]
+    story_set.collect_errors = True
+    if settings["cache"]:
+        story_set.cache = StoryCache(settings["root"])
+
+    if settings["selection"] is not None:
+        story_set.selection = Selection(*settings["selection"])
+
+    story_set.load(settings["root"])
+    story_set.compile()
+    worker_set = story_set
+
+def run_batch(batch):
+    """Run a batch of (story name, position) and return the results."""
+    results = []
+    for story_name, position in batch:
+        scenario = worker_set.stories[story_name].scenarios[position]
+        results.append(run_scenario(worker_set, story_name, scenario))
+
+    return results
+
+def get_batches(scenarios, workers):
+    """Split the scenario identifiers in batches."""
+    size = max(1, len(scenarios) // (workers * BATCHES_PER_WORKER))
+    return [scenarios[i:i + size] for i in range(0, len(scenarios), size)]
+
+def run_parallel(story_set, workers, start_method=None):
+    """Run the scenarios of a story set in worker processes.
+
+    Parameters:
+        story_set -- the story set, loaded (and usually compiled)
+        workers -- the number of processes
+        start_method -- the multiprocessing start method, by default
+                "fork" if available, "spawn" otherwise.
+
+    The (story name, scenario, result) are yielded in the order of the
+    stories and scenarios, as soon as the batch of the scenario is run.
+
+    """
+    global worker_set
+    scenarios = [(story_name, position) for story_name, story in \
+            story_set.stories.items() for position in range(len(
+            story.scenarios))]
+    if not scenarios:
+        return
+
+    if start_method is None:
+        methods = multiprocessing.get_all_start_methods()
+        start_method = "fork" if "fork" in methods else "spawn"
+
+    context = multiprocessing.get_context(start_method)
+    if start_method == "fork":
+        # The forked processes inherit the story set
+        worker_set = story_set
+        pool = context.Pool(workers)
+    else:
+        pool = context.Pool(workers, initializer=init_worker,
+                initargs=(get_settings(story_set), ))
+
+    try:
+        batches = get_batches(scenarios, workers)
+        for batch, results in zip(batches, pool.imap(run_batch, batches)):
+            for (story_name, position), result in zip(batch, results):
+                scenario = story_set.stories[story_name].scenarios[position]
+                yield story_name, scenario, result
+    finally:
+        pool.terminate()
+        pool.join()
+        worker_set = None
@@ -0,0 +1,76 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Module containing the tests for the keyword classifier."""
+
+import unittest
+
+from croissant.language.keyword import get_classifier, keywords
+
+class KeywordClassifierTest(unittest.TestCase):
+
+    """Class to test (with unittest) the keyword classifier.
+
+    The classifier should find the same keywords as the 'parse' method
+    of each keyword.
+
+    """
+
+    def test_classify(self):
+        """Test that lines are classified with the right keyword."""
+        classifier = get_classifier("en")
+        self.assertEqual(classifier.classify("Feature: a story"),
+                ("story.title", "a story"))
+        self.assertEqual(classifier.classify("GIVEN  a context"),
+                ("scenario.given", "a context"))
+        self.assertEqual(classifier.classify("and"), ("scenario.and", ""))
+        self.assertEqual(classifier.classify("A description"),
+                (None, "A description"))
+
+    def test_same_as_keywords(self):
+        """Test that the classifier agrees with the keywords."""
+        lines = ("Scenario: a title", "scénario: un titre", "When it's done",
+                "then", "Et puis", "Si ça marche", "nothing special")
+        for symbol in ("en", "fr"):
+            classifier = get_classifier(symbol)
+            for line in lines:
+                path, rest = classifier.classify(line)
+                for keyword in keywords.values():
+                    expected = keyword.parse(symbol, line)
+                    if keyword.path == path:
+                        self.assertEqual(rest, expected)
+                    else:
+                        self.assertIsNone(expected)
+
+    def test_cache(self):
+        """Test that classifiers are kept until a language is added."""
+        classifier = get_classifier("en")
+        self.assertIs(get_classifier("en"), classifier)
+        keyword = keywords["scenario.and"]
+        keyword.add_language("en", *keyword.languages["en"])
+        self.assertIsNot(get_classifier("en"), classifier)
@@ -41,3 +41,11 @@ Well for now, nothing's indented
     Let's try it
   And that will do
 For now on."""
+
+CONTENT_WITH_BLANK_LINES = """A first line
+  An indented block
+
+  Which continues after a blank line
+    And goes deeper
+
+Back to the first level"""
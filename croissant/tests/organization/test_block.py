@@ -28,11 +28,25 @@
 
 """Module containing the tests for the block object."""
 
+import io
+import mmap
+import tempfile
 import unittest
 
 from croissant.organization.block import Block
 from croissant.tests.organization.contents import *
 
+def count_lines(block):
+    """Recursively count the lines of a block, without the cache."""
+    nb = 0
+    for child in block:
+        if isinstance(child, str):
+            nb += 1
+        else:
+            nb += count_lines(child)
+
+    return nb
+
 class BlockTest(unittest.TestCase):
 
     """Class to test (with unittest) the behavior of the Block object.
@@ -65,3 +79,124 @@ class BlockTest(unittest.TestCase):
         self.assertIs(block[1].previous, block[0])
         self.assertIs(block[3][0].next, block[3][1])
         self.assertIs(block[3][0], block[3][1].previous)
+
+    def test_blank_lines(self):
+        """Test that blank lines are skipped but counted in line numbers."""
+        content = CONTENT_WITH_BLANK_LINES
+        block = Block.build(content)
+        self.assertEqual(len(block), 3)
+        self.assertEqual(len(block[1]), 3)
+        self.assertEqual(block[1][1], "Which continues after a blank line")
+        self.assertEqual(block[1][1].start_at, 3)
+        self.assertEqual(block[1][2][0].start_at, 4)
+        self.assertEqual(block[2], "Back to the first level")
+        self.assertEqual(block[2].start_at, 6)
+
+    def test_cached_nb_lines(self):
+        """Test that the cached number of lines follows mutations."""
+        block = Block.build(CONTENT_WITH_INDENTATION)
+        sub_block = block[3]
+        self.assertEqual(block.nb_lines, count_lines(block))
+        self.assertEqual(sub_block.nb_lines, count_lines(sub_block))
+
+        # Append a line to a sub-block and a block to the root
+        sub_block[2].append("One more line")
+        block.append(Block.build("Another\n  block", start_at=8))
+        self.assertEqual(sub_block.nb_lines, count_lines(sub_block))
+        self.assertEqual(block.nb_lines, count_lines(block))
+        self.assertEqual(block.nb_lines, 11)
+
+        # Insert a line at the beginning of a sub-block
+        start_at = sub_block.start_at
+        sub_block.insert("A new first line")
+        self.assertEqual(sub_block.start_at, start_at - 1)
+        self.assertEqual(sub_block.nb_lines, count_lines(sub_block))
+        self.assertEqual(block.nb_lines, count_lines(block))
+        self.assertEqual(block.end_at, block.start_at + count_lines(block))
+
+        # Append a block the way Story.parse appends a scenario's body
+        title = block[0]
+        body = block[1]
+        title.append(body)
+        self.assertEqual(title.nb_lines, count_lines(title))
+        self.assertEqual(block.nb_lines, count_lines(block))
+        self.assertIs(body.parent, title)
+        self.assertIs(block[2], sub_block)
+
+        # The moved block is then modified
+        body.append("x")
+        self.assertEqual(title.nb_lines, count_lines(title))
+        self.assertEqual(block.nb_lines, count_lines(block))
+        body.append(Block.build("Nested\n  block"))
+        body[-1].append("y")
+        self.assertEqual(title.nb_lines, count_lines(title))
+        self.assertEqual(block.nb_lines, count_lines(block))
+        sub_block.insert(Block.build("First"))
+        sub_block[0].append("z")
+        self.assertEqual(block.nb_lines, count_lines(block))
+
+        # Append and insert a line view (see 'Line')
+        nb_lines = block.nb_lines
+        block.append(title[0])
+        block.insert(title[0])
+        self.assertEqual(block.nb_lines, nb_lines + 2)
+
+    def test_line_views(self):
+        """Test that the line views are cached and behave like blocks."""
+        content = CONTENT_WITH_INDENTATION
+        block = Block.build(content)
+        line = block[0][0]
+        self.assertIs(line, block[0][0])
+        self.assertIs(line.parent, block[0])
+        self.assertEqual(line.start_at, 0)
+        self.assertEqual(line, "We now try a different content")
+        self.assertEqual(line, block[0])
+        self.assertEqual(block[0], line)
+        self.assertEqual(len(line), 1)
+        self.assertEqual(list(line), ["We now try a different content"])
+        with self.assertRaises(IndexError):
+            block[0][1]
+
+        # Adding a line clears the cache
+        block[0].append("And a second line")
+        self.assertEqual(block[0][1], "And a second line")
+        self.assertEqual(block[0][0], "We now try a different content")
+
+    def test_build_from_lines(self):
+        """Test that a block can be built from iterables of lines."""
+        content = CONTENT_WITH_BLANK_LINES
+        expected = Block.build(content)
+        from_list = Block.build(content.splitlines())
+        from_file = Block.build(io.StringIO(content.replace("\n", "\r\n")))
+        from_bytes = Block.build(io.BytesIO(content.encode("utf-8")))
+        for block in (from_list, from_file, from_bytes):
+            self.assertEqual(str(block), str(expected))
+            self.assertEqual(block[2].start_at, 6)
+
+    def test_build_from_mmap(self):
+        """Test that a block can be built from a memory-mapped file."""
+        content = CONTENT_WITH_BLANK_LINES
+        expected = Block.build(content)
+        with tempfile.TemporaryFile() as file:
+            file.write(content.encode("utf-8"))
+            file.flush()
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as \
+                    mapped:
+                block = Block.build(mapped)
+
+        self.assertEqual(str(block), str(expected))
+        self.assertEqual(block[1][2][0].start_at, 4)
+
+    def test_write(self):
+        """Test that writing a block gives the same text as displaying it."""
+        block = Block.build(CONTENT_WITH_INDENTATION)
+        for show_lines in (False, True):
+            for indentation in (False, True):
+                file = io.StringIO()
+                block.write(file, show_lines, indentation)
+                self.assertEqual(file.getvalue(),
+                        block.display(show_lines, indentation))
+
+        self.assertEqual(block[3].display(), "  But now we start\n" \
+                "  And go on, what about a fird block?\n    Let's try it\n" \
+                "  And that will do")
@@ -0,0 +1,101 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Module containing the tests for the flat block storage."""
+
+import pickle
+import unittest
+
+from croissant.organization.block import Block
+from croissant.organization.flat import CHILDREN_CACHE_SIZE, FlatBlock
+from croissant.tests.organization.contents import *
+
+class FlatBlockTest(unittest.TestCase):
+
+    """Class to test (with unittest) the behavior of the FlatBlock object.
+
+    The flat blocks should offer the same structure and navigation
+    as the blocks built from the same content.
+
+    """
+
+    def test_nb_lines(self):
+        """Test that the number of lines of a given content is consistent."""
+        content = CONTENT_WITHOUT_INDENTATION
+        block = FlatBlock.build(content)
+        self.assertEqual(block.nb_lines, len(content.splitlines()))
+
+    def test_sub_blocks(self):
+        """Test that an indented content creates sub-blocks."""
+        content = CONTENT_WITH_INDENTATION
+        block = FlatBlock.build(content)
+        self.assertEqual(len(block), 5)
+        self.assertEqual(block[0], "We now try a different content")
+        self.assertEqual(block[3][2], "Let's try it")
+        self.assertEqual(block[3].indentation, "  ")
+        self.assertEqual(block[3].nb_lines, 4)
+
+    def test_hierarchy(self):
+        """Test the hierarchy consistence, parent, children and siblings."""
+        content = CONTENT_WITH_INDENTATION
+        block = FlatBlock.build(content)
+        self.assertEqual(block[0].parent.index, block.index)
+        self.assertEqual(block[1].index, block[0].next.index)
+        self.assertEqual(block[1].previous.index, block[0].index)
+        self.assertEqual(block[3][0].next.index, block[3][1].index)
+        self.assertIsNone(block[0].previous)
+        self.assertIsNone(block[4].next)
+        self.assertIsNone(block.parent)
+
+    def test_same_as_block(self):
+        """Test that flat blocks and blocks display the same content."""
+        for content in (CONTENT_WITHOUT_INDENTATION,
+                CONTENT_WITH_INDENTATION, CONTENT_WITH_BLANK_LINES):
+            block = Block.build(content, start_at=3)
+            flat = FlatBlock.build(content, start_at=3)
+            self.assertEqual(str(flat), str(block))
+            self.assertEqual(flat, block)
+            self.assertEqual([child.start_at for child in flat],
+                    [child.start_at for child in block])
+
+    def test_children_cache(self):
+        """Test that only the last lists of children are kept."""
+        content = "\n".join("Block {}\n  line".format(i) for i in range(50))
+        block = FlatBlock.build(content)
+        self.assertEqual(len(block), 100)
+        self.assertEqual([block[i][0].start_at for i in range(1, 100, 2)],
+                list(range(1, 100, 2)))
+        self.assertEqual(len(block.arena.children), CHILDREN_CACHE_SIZE)
+
+    def test_pickle(self):
+        """Test that a flat block can be pickled."""
+        block = FlatBlock.build(CONTENT_WITH_INDENTATION)
+        copy = pickle.loads(pickle.dumps(block[3]))
+        self.assertEqual(copy.arena.children, {})
+        self.assertEqual(copy, block[3])
+        self.assertEqual(copy.parent, block)
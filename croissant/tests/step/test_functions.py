@@ -0,0 +1,112 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Module containing the tests for the typed placeholders of steps."""
+
+import unittest
+
+from croissant.step import *
+from croissant.step.functions import TYPES, compile_expression, \
+        convert_arguments, register_type
+from croissant.story.plan import Plan
+from croissant.story.scenario import Scenario
+from croissant.story.story_set import StorySet
+
+class FunctionsTest(unittest.TestCase):
+
+    """Class to test (with unittest) the typed placeholders of steps.
+
+    The following checks are done:
+        compile -- are placeholders replaced by groups and converters?
+        call -- are the arguments converted when steps are called?
+        cache -- are the conversions of cached types kept?
+
+    """
+
+    def test_compile(self):
+        """Test that placeholders are replaced by groups and converters."""
+        regex, converters = compile_expression(
+                r"(\w+) has {count:int} items at {price:float} \d{2}")
+        self.assertEqual(regex.groupindex, {"count": 2, "price": 3})
+        self.assertEqual(converters, (None, int, float))
+        match = regex.search("Alice has -3 items at 2.5 12")
+        self.assertEqual(convert_arguments(converters, match.groups()),
+                ("Alice", -3, 2.5))
+        self.assertIsNone(regex.search("Alice has 3 items at 2.5 1"))
+
+        regex, converters = compile_expression(r"a number (\d+) \{n:int}")
+        self.assertIsNone(converters)
+        self.assertTrue(regex.search("a number 5 {n:int}"))
+        with self.assertRaises(ValueError):
+            compile_expression("a {value:unknown}")
+
+    def test_call(self):
+        """Test that the arguments are converted when steps are called."""
+        class Typed(BaseStep):
+            @context("a list {values:json}")
+            def given(self, values):
+                self.values = values
+
+            @event("I append {value:int}")
+            def when(self, value):
+                self.values.append(value)
+
+            @postcondition("I get {values:json}")
+            def then(self, values):
+                self.assertEqual(self.values, values)
+
+        scenario = Scenario("a scenario")
+        scenario.contexts = ["a list [1, 2]"]
+        scenario.event = "I append 3"
+        scenario.postconditions = ["I get [1, 2, 3]"]
+        plan = Plan.compile(Typed, scenario)
+        plan.run(scenario)
+        plan.run(scenario)
+
+        step = Typed(scenario)
+        StorySet.call_step(step, Typed.context_index, scenario,
+                "a list [4]")
+        Typed.when(step, "I append 5")
+        self.assertEqual(step.values, [4, 5])
+
+    def test_cache(self):
+        """Test that the conversions of cached types are kept."""
+        conversions = []
+        def convert(value):
+            conversions.append(value)
+            return value.upper()
+
+        self.addCleanup(TYPES.pop, "upper", None)
+        register_type("upper", r"[a-z]+", convert, cache=True)
+        regex, converters = compile_expression("{name:upper} user")
+        for name in ("alice", "bob", "alice"):
+            match = regex.search(name + " user")
+            self.assertEqual(convert_arguments(converters, match.groups()),
+                    (name.upper(), ))
+
+        self.assertEqual(conversions, ["alice", "bob"])
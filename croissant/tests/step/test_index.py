@@ -0,0 +1,221 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Module containing the tests for the index of step expressions."""
+
+import random
+import re
+import unittest
+
+from croissant.step import *
+from croissant.step.exceptions import StepNotFound
+from croissant.step.index import StepIndex, get_example, get_words
+from croissant.story.story_set import StorySet
+
+class CountingExpression:
+
+    """An expression counting its searches."""
+
+    def __init__(self, pattern):
+        self.expression = re.compile(pattern)
+        self.pattern = pattern
+        self.flags = self.expression.flags
+        self.nb_searches = 0
+
+    def search(self, message):
+        self.nb_searches += 1
+        return self.expression.search(message)
+
+
+class IndexTest(unittest.TestCase):
+
+    """Class to test (with unittest) the index of step expressions.
+
+    The following checks are done:
+        words -- are the required words of expressions found?
+        order -- is the first matching expression returned?
+        meta -- are the indexes built for step classes?
+        random -- does the index agree with a linear search?
+        resolve -- are step lines resolved once, with their arguments?
+        call -- are step methods called with the arguments?
+        example -- are step lines matched by expressions built?
+        conflicts -- are shadowed and ambiguous expressions found?
+
+    """
+
+    def test_words(self):
+        """Test that the required words of expressions are found."""
+        cases = (
+            (r"a number (\d+)", {"number"}),
+            ("I square it", {"square"}),
+            (r"^I get (\d+)$", {"I", "get"}),
+            (r"\bfoo\b bar", {"foo"}),
+            (r"(?:the )?user is", set()),
+            (r"(?i)the thing is", set()),
+            (r"the (\w+) is here", {"is"}),
+        )
+        for pattern, words in cases:
+            self.assertEqual(get_words(re.compile(pattern)), words)
+
+    def test_order(self):
+        """Test that the first matching expression is returned."""
+        expressions = {re.compile("number"): "first",
+                re.compile(r"a number (\d+)"): "second",
+                re.compile(r"(\d+)"): "third"}
+        index = StepIndex(expressions)
+        self.assertEqual(index.find("a number 5"), "first")
+        self.assertEqual(index.find("no digit"), None)
+        self.assertEqual(index.find("only 5"), "third")
+
+    def test_meta(self):
+        """Test that the indexes are built for step classes."""
+        class Parent(BaseStep):
+            @context("a parent context")
+            def parent(self):
+                pass
+
+        class Child(Parent):
+            @context(r"a (\w+) context")
+            def child(self, name):
+                pass
+
+        self.assertEqual(len(Child.context_index), 2)
+        self.assertEqual(Child.context_index.find("a parent context"),
+                "parent")
+        self.assertEqual(Child.context_index.find("a child context"),
+                "child")
+        self.assertEqual(Child.event_index.find("something"), None)
+
+    def test_random(self):
+        """Test that the index agrees with a linear search."""
+        generator = random.Random(0)
+        parts = ["a", "the", "user", "number", r"(\d+)", r"\w+", "is",
+                "(?:big|small)", "x?", r"\b", "^", "$", ".*"]
+        words = ["a", "the", "user", "number", "12", "is", "big", "small",
+                "x", "superuser", "theis", "ab"]
+        for i in range(200):
+            expressions = {}
+            for j in range(generator.randint(1, 20)):
+                pattern = " ".join(generator.choice(parts) for k in \
+                        range(generator.randint(1, 4)))
+                if generator.random() < 0.3:
+                    pattern = pattern.replace(" ", "")
+                expressions[re.compile(pattern)] = "method{}".format(j)
+
+            index = StepIndex(expressions)
+            for j in range(50):
+                message = " ".join(generator.choice(words) for k in \
+                        range(generator.randint(0, 5)))
+                expected = None
+                for expression, name in expressions.items():
+                    if expression.search(message):
+                        expected = name
+                        break
+
+                self.assertEqual(index.find(message), expected)
+
+    def test_resolve(self):
+        """Test that step lines are resolved once, with their arguments."""
+        expression = CountingExpression(r"a number (\d+) and (\w+)")
+        index = StepIndex({expression: "method"})
+        for i in range(3):
+            self.assertEqual(index.resolve("a number 5 and six"),
+                    ("method", ("5", "six")))
+
+        self.assertEqual(expression.nb_searches, 1)
+        self.assertEqual(index.find("a number 5 and six"), "method")
+        self.assertEqual(index.resolve("a number"), None)
+
+    def test_call(self):
+        """Test that step methods are called with the arguments."""
+        class Parent(BaseStep):
+            @context(r"a number (\d+)")
+            def number(self, number):
+                self.number = int(number)
+
+            @event(r"something (\w+) happens")
+            def happen(self, what):
+                self.what = what
+
+        class Child(Parent):
+            def happen(self, message):
+                self.what = message
+
+        step = Parent(None)
+        StorySet.call_step(step, Parent.context_index, None, "a number 4")
+        self.assertEqual(step.number, 4)
+        step = Child(None)
+        StorySet.call_step(step, Child.event_index, None,
+                "something strange happens")
+        self.assertEqual(step.what, "something strange happens")
+        with self.assertRaises(StepNotFound):
+            StorySet.call_step(step, Child.event_index, None, "nothing")
+
+    def test_example(self):
+        """Test that step lines matched by expressions are built."""
+        cases = (
+            (r"a number (\d+)", "a number 0"),
+            (r"(a|another) (.*)", "a a"),
+            (r"^(?P<name>\w+) and (?P=name)$", "a and a"),
+            (r"[^abc]+ [A-F]{2,3}", "0 AA"),
+            (r"(?:the )?user is\b", "the user is"),
+            (r"a(?=b)", None),
+        )
+        for pattern, example in cases:
+            self.assertEqual(get_example(re.compile(pattern)), example)
+
+    def test_conflicts(self):
+        """Test that shadowed and ambiguous expressions are found."""
+        class Parent(BaseStep):
+            @context(r"a (\w+) user")
+            def user(self, name):
+                pass
+
+            @postcondition(r"I get (\d+)")
+            def result(self, number):
+                pass
+
+        class Child(Parent):
+            @context("an admin user")
+            def admin(self):
+                pass
+
+            @context("a guest user")
+            def guest(self):
+                pass
+
+            @postcondition("I get nothing")
+            def nothing(self):
+                pass
+
+        self.assertEqual(Parent.conflicts, [])
+        self.assertEqual([(kind, expression.pattern, name, example,
+                [name for expression, name in matches]) for kind,
+                expression, name, example, matches in Child.conflicts], [
+                ("context", "a guest user", "guest", "a guest user",
+                ["user", "guest"])])
@@ -0,0 +1,107 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Module containing the tests for the registry of merged steps."""
+
+import unittest
+
+from croissant.step import *
+from croissant.step.registry import StepRegistry
+from croissant.story.plan import Plan
+from croissant.story.scenario import Scenario
+
+class Login(BaseStep):
+
+    @context("a user named {name:word}")
+    def given(self, name):
+        self.user = name
+
+    @postcondition("the user is logged in")
+    def then(self):
+        self.assertEqual(self.user, "alice")
+
+
+class Cart(BaseStep):
+
+    @context("a cart with {count:int} items")
+    def given(self, count):
+        self.items = count
+
+    @event("the user buys the cart")
+    def buy(self):
+        self.bought = (self.user, self.items)
+
+
+class SpecialCart(Cart):
+
+    @postcondition("nothing is bought")
+    def nothing(self):
+        self.assertEqual(self.bought, None)
+
+
+class RegistryTest(unittest.TestCase):
+
+    """Class to test (with unittest) the registry of merged steps.
+
+    The following checks are done:
+        merge -- are the classes merged once per combination?
+        aliases -- are the methods with the same name kept apart?
+
+    """
+
+    def test_merge(self):
+        """Test that the classes are merged once per combination."""
+        registry = StepRegistry()
+        self.assertIs(registry.merge([Login]), Login)
+        self.assertIs(registry.merge([Cart, SpecialCart]), SpecialCart)
+        merged = registry.merge([Login, Cart])
+        self.assertIs(registry.merge([Login, Cart, Login]), merged)
+        self.assertIsNot(registry.merge([Cart, Login]), merged)
+        self.assertTrue(issubclass(merged, Login))
+        self.assertTrue(issubclass(merged, Cart))
+        self.assertEqual(merged.__name__, "Login+Cart")
+        self.assertEqual(len(merged.context_index), 2)
+        self.assertEqual(len(merged.event_index), 1)
+        self.assertEqual(merged.conflicts, [])
+
+        registry.clear()
+        self.assertIsNot(registry.merge([Login, Cart]), merged)
+
+    def test_aliases(self):
+        """Test that the methods with the same name are kept apart."""
+        merged = StepRegistry().merge([Login, Cart])
+        self.assertEqual(list(merged.contexts.values()), ["given",
+                "Cart.given"])
+        scenario = Scenario("a scenario")
+        scenario.contexts = ["a user named alice", "a cart with 3 items"]
+        scenario.event = "the user buys the cart"
+        scenario.postconditions = ["the user is logged in"]
+        plan = Plan.compile(merged, scenario)
+        self.assertEqual([call[0] for call in plan.calls], ["given",
+                "Cart.given", "buy", "then"])
+        plan.run(scenario)
@@ -0,0 +1,242 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Module containing the tests for the static index of steps."""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from croissant.step import static
+from croissant.step.static import StaticIndex, read_module
+from croissant.story.cache import StoryCache
+from croissant.story.story_set import StorySet
+from croissant.tests.story.contents import STORY
+
+BASE = """from croissant.step import BaseStep, context as given
+
+class Common(BaseStep):
+
+    @given(r"(a|another) (.*)")
+    def article(self, article, name):
+        pass
+"""
+
+STEPS = """import croissant.step
+from croissant.step import *
+from static_base import Common
+
+raise ImportError("imported")
+
+class Helper:
+
+    @context("not a step")
+    def helper(self):
+        pass
+
+class Steps(Common):
+
+    @postcondition("replaced")
+    def first(self):
+        pass
+
+    @context("a first")
+    def first(self):
+        pass
+
+    @croissant.step.event("something (.*)happens")
+    def when(self, what):
+        pass
+
+    @postcondition("(.*) is true")
+    def then(self, what):
+        pass
+"""
+
+class StaticTest(unittest.TestCase):
+
+    """Class to test (with unittest) the static index of steps.
+
+    The following checks are done:
+        read -- are the step methods read from the source?
+        step -- are the expressions gathered as when importing?
+        incomplete -- are dynamic expressions and classes detected?
+        write -- is the index written and read again?
+        story_set -- are the stories checked without importing steps?
+
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def write(self, name, content):
+        """Write a file in the root directory."""
+        with open(os.path.join(self.root, name), "w") as file:
+            file.write(content)
+
+    def test_read(self):
+        """Test that the step methods are read from the source."""
+        imports, classes, declared = read_module("steps.first",
+                "from .common " \
+                "import Common\nfrom croissant.step.functions import " \
+                "event as when\n\nclass First(Common):\n\n" \
+                "    @when('it ' 'happens')\n    def happen(self):\n" \
+                "        pass\n\n    other = happen\n\n" \
+                "croissant_steps = [First, steps.Other]\n")
+        self.assertEqual(imports, {"Common": ("steps.common", "Common"),
+                "when": ("croissant.step.functions", "event")})
+        self.assertEqual(classes, {"First": (4, ["Common"], False, [
+                ("happen", "event", "it happens", 7),
+                ("other", None, None, 10)])})
+        self.assertEqual(declared, ["First", "steps.Other"])
+
+    def test_step(self):
+        """Test that the expressions are gathered as when importing."""
+        self.write("static_base.py", BASE)
+        self.write("static_steps.py", STEPS)
+        index = StaticIndex(self.root)
+        index.update(["static_base", "static_steps"])
+        step = index.get_step("static_steps")
+        self.assertEqual(step.__name__, "Steps")
+        self.assertTrue(step.complete)
+        self.assertEqual([(expression.pattern, name) for expression, name \
+                in step.contexts.items()], [("(a|another) (.*)",
+                "article"), ("a first", "first")])
+        self.assertEqual([expression.pattern for expression in step.events],
+                ["something (.*)happens"])
+        self.assertEqual([(expression.pattern, name) for expression, name \
+                in step.postconditions.items()], [("(.*) is true", "then")])
+        self.assertEqual(step.context_index.resolve("a first context"),
+                ("article", ("a", "first context")))
+        self.assertEqual(step.lines["first"], 20)
+        self.assertNotIn("static_steps", sys.modules)
+
+        # The expressions are the ones of the imported classes
+        namespace = {}
+        exec(BASE, namespace)
+        self.assertEqual([(expression.pattern, name) for expression, name \
+                in namespace["Common"].contexts.items()],
+                [(expression.pattern, name) for expression, name in \
+                index.get_step("static_base").contexts.items()])
+
+        with self.assertRaises(KeyError):
+            index.get_step("unknown")
+
+    def test_incomplete(self):
+        """Test that dynamic expressions and classes are detected."""
+        self.write("dynamic.py", "from croissant.step import *\n\n" \
+                "PATTERN = 'a (.*)'\n\nclass Dynamic(BaseStep):\n\n" \
+                "    @context(PATTERN)\n    def given(self, name):\n" \
+                "        pass\n")
+        self.write("library.py", "from library_steps import Library\n\n" \
+                "class Steps(Library):\n    pass\n")
+        self.write("invalid.py", "class Invalid(\n")
+        self.write("multiple.py", "from croissant.step import *\n\n" \
+                "class First(BaseStep):\n    pass\n\n" \
+                "class Second(First):\n    pass\n")
+        index = StaticIndex(self.root)
+        index.update(["dynamic", "library", "invalid", "multiple"])
+        self.assertFalse(index.get_step("dynamic").complete)
+        self.assertEqual(index.get_step("multiple").__name__, "Second")
+        for module in ("library", "invalid"):
+            with self.assertRaises(ValueError):
+                index.get_step(module)
+
+    def test_write(self):
+        """Test that the index is written and read again."""
+        self.write("static_base.py", BASE)
+        path = os.path.join(self.root, "cache", "steps.index")
+        index = StaticIndex(self.root, path)
+        index.update(["static_base"])
+        self.assertTrue(os.path.exists(path))
+
+        index = StaticIndex(self.root, path)
+        self.assertEqual(list(index.modules), ["static_base"])
+        with mock.patch.object(static, "read_module") as read:
+            index.update(["static_base"])
+        self.assertFalse(read.called)
+        self.assertEqual(len(index.get_step("static_base").contexts), 1)
+
+        # A modified module is read again
+        self.write("static_base.py", BASE + "\n\n")
+        index.update(["static_base"])
+        self.assertEqual(index.modules["static_base"][1], len(BASE) + 2)
+
+        # If the index cannot be written, it's kept in memory
+        self.write("cache.file", "")
+        index = StaticIndex(self.root, os.path.join(self.root, "cache.file",
+                "steps.index"))
+        index.update(["static_base"])
+        self.assertEqual(len(index.get_step("static_base").contexts), 1)
+
+    def test_story_set(self):
+        """Test that the stories are checked without importing steps."""
+        self.write("static_steps.feature", STORY)
+        self.write("static_steps.py", STEPS)
+        self.write("static_base.py", BASE)
+        story_set = StorySet()
+        story_set.cache = StoryCache(self.root)
+        story_set.load(self.root)
+        self.addCleanup(sys.path.remove, self.root)
+        errors = story_set.compile(static=True)
+        self.assertEqual([error.scenario.title for error in errors],
+                ["the third scenario"])
+        self.assertEqual(story_set.plans, {})
+        self.assertEqual(story_set.steps, {})
+        self.assertNotIn("static_steps", sys.modules)
+        self.assertTrue(os.path.exists(os.path.join(self.root,
+                "__croissant_cache__", "steps.index")))
+
+        ambiguous = story_set.find_ambiguous(static=True)
+        self.assertEqual([(line, [name for expression, name in matches]) \
+                for scenario, line, matches in ambiguous], [
+                ("a first context", ["article", "first"])])
+
+        # The expression of 'first' is shadowed by the one of 'article'
+        classes = story_set.find_conflicts(static=True)
+        self.assertEqual([step.__name__ for step in classes], ["Steps"])
+        self.assertEqual([(kind, name, example) for kind, expression, name,
+                example, matches in classes[0].conflicts], [("context",
+                "first", "a first")])
+
+        # Without cache directory, every story is checked nonetheless
+        self.write("other_steps.feature", STORY)
+        self.write("other_steps.py", STEPS)
+        shutil.rmtree(os.path.join(self.root, "__croissant_cache__"))
+        self.write("__croissant_cache__", "")
+        story_set = StorySet()
+        story_set.cache = StoryCache(self.root)
+        story_set.load(self.root)
+        self.addCleanup(sys.path.remove, self.root)
+        errors = story_set.compile(static=True)
+        self.assertEqual([error.scenario.title for error in errors],
+                ["the third scenario", "the third scenario"])
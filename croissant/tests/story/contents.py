@@ -0,0 +1,83 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Module containing default stories used by the tests."""
+
+STORY = """Feature: a story to test
+    Its description
+
+Scenario: the first scenario
+    Given a first context
+    And a second context
+    When something happens
+    Then something is true
+
+Scenario: the second scenario
+    Given a context
+    When something else happens
+    Then something else is true
+    And another thing is true
+
+Scenario: the third scenario
+    Given a context
+    When nothing happens
+    Then nothing is true
+"""
+
+FRENCH_STORY = """# language: fr
+Fonctionnalité: une histoire en français
+    Sa description
+
+Scénario: le premier scénario
+    Quand un contexte
+    Et un second contexte
+    Si quelque chose arrive
+    Alors quelque chose est vrai
+"""
+
+TAGGED_STORY = """Feature: a tagged story
+    @web @slow
+    Its description
+
+Scenario: the login
+    @smoke
+    Given a user
+    When the user logs in
+    Then the user is connected
+
+Scenario: the logout
+    Given a connected user
+    When the user logs out
+    Then the user is disconnected
+
+Scenario: the registration
+    @smoke @database
+    Given a visitor
+    When the visitor registers
+    Then a user is created
+"""
@@ -0,0 +1,152 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Module containing the tests for the cache of parsed stories."""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+
+from croissant.story.cache import HashedFile, StoryCache
+from croissant.story.story import Story
+from croissant.story.story_set import StorySet
+from croissant.tests.story.contents import *
+from croissant.tests.story.test_story import describe
+
+class CacheTest(unittest.TestCase):
+
+    """Class to test (with unittest) the cache of parsed stories.
+
+    The following checks are done:
+        store -- is a stored story loaded from the cache?
+        modify -- is a modified story parsed again?
+        touch -- is a touched but unmodified story still cached?
+        language -- is the default language part of the key?
+        race -- is the key the one of the parsed content?
+        jobs -- are the stories parsed in processes stored?
+        clear -- is the cache removed?
+
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, "story.feature")
+        with open(self.path, "w") as file:
+            file.write(STORY)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def load(self, cache=None):
+        """Load the root directory and return the story."""
+        story_set = StorySet()
+        story_set.cache = cache or StoryCache(self.root)
+        story_set.load(self.root)
+        return story_set.stories["story"]
+
+    def test_store(self):
+        """Test that a stored story is loaded from the cache."""
+        cache = StoryCache(self.root)
+        self.assertIsNone(cache.load("story.feature", "en"))
+        parsed = self.load(cache)
+        cached = cache.load("story.feature", "en")
+        self.assertIsNotNone(cached)
+        self.assertEqual(describe(cached), describe(parsed))
+        self.assertEqual(cached.language, "en")
+        self.assertIs(cached.scenarios[0].father, cached)
+
+    def test_modify(self):
+        """Test that a modified story is parsed again."""
+        self.load()
+        with open(self.path, "w") as file:
+            file.write(STORY.replace("a story to test", "a modified story"))
+        os.utime(self.path, ns=(0, 0))
+        self.assertEqual(self.load().title, "a modified story")
+
+    def test_touch(self):
+        """Test that a touched but unmodified story is still cached."""
+        cache = StoryCache(self.root)
+        self.load(cache)
+        os.utime(self.path, ns=(0, 0))
+        self.assertIsNotNone(cache.load("story.feature", "en"))
+        entry = cache.read_entry("story.feature")
+        self.assertEqual(entry[1], 0)
+
+    def test_language(self):
+        """Test that the default language is part of the key."""
+        cache = StoryCache(self.root)
+        self.load(cache)
+        self.assertIsNone(cache.load("story.feature", "fr"))
+
+    def test_race(self):
+        """Test that the stored key is the one of the parsed content."""
+        cache = StoryCache(self.root)
+        with open(self.path, "rb") as file:
+            content = HashedFile(file)
+            story = Story.parse("story.feature", content)
+            key = content.get_key()
+
+        data = STORY.encode()
+        self.assertEqual(key, (os.stat(self.path).st_mtime_ns, len(data),
+                hashlib.sha1(data).digest()))
+
+        # The lines that weren't read are hashed as well
+        with open(self.path, "rb") as file:
+            content = HashedFile(file)
+            next(iter(content))
+            self.assertEqual(content.get_key(), key)
+
+        with open(self.path, "w") as file:
+            file.write(STORY.replace("a story to test", "a modified story"))
+        os.utime(self.path, ns=(0, 0))
+        cache.store("story.feature", key, "en", cache.dump(story))
+        self.assertIsNone(cache.load("story.feature", "en"))
+        self.assertEqual(self.load(cache).title, "a modified story")
+
+    def test_jobs(self):
+        """Test that the stories parsed in processes are stored."""
+        cache = StoryCache(self.root)
+        story_set = StorySet()
+        story_set.cache = cache
+        story_set.jobs = 2
+        story_set.load(self.root)
+        cached = cache.load("story.feature", "en")
+        self.assertIsNotNone(cached)
+        self.assertEqual(describe(cached),
+                describe(story_set.stories["story"]))
+
+    def test_clear(self):
+        """Test that the cache is cleared."""
+        cache = StoryCache(self.root)
+        self.load(cache)
+        self.assertTrue(os.path.isdir(cache.directory))
+        cache.clear()
+        self.assertFalse(os.path.isdir(cache.directory))
+        self.assertIsNone(cache.load("story.feature", "en"))
@@ -0,0 +1,118 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Module containing the tests for the discovery of steps and stories."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from croissant.story.discovery import *
+
+class DiscoveryTest(unittest.TestCase):
+
+    """Class to test (with unittest) the discovery of steps and stories.
+
+    The following checks are done:
+        find -- are steps and stories found in order?
+        excludes -- are excluded paths ignored?
+        manifest -- are unmodified directories read from the manifest?
+
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for path in ("features/first.feature", "features/first.py",
+                "features/README", "features/sub/second.feature",
+                "steps/second.py", "__croissant_cache__/x.feature"):
+            self.write(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, path):
+        """Create an empty file in the root directory."""
+        full_path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w"):
+            pass
+
+    def age(self):
+        """Set the modification time of the directories in the past."""
+        for directory, dirs, files in os.walk(self.root):
+            os.utime(directory, ns=(0, 0))
+
+    def test_find(self):
+        """Test that steps and stories are found in order."""
+        discovery = Discovery(self.root)
+        entries = discovery.find()
+        self.assertEqual(sorted(entries), [
+                (os.path.join("features", "first.feature"), STORY),
+                (os.path.join("features", "first.py"), STEP),
+                (os.path.join("features", "sub", "second.feature"), STORY),
+                (os.path.join("steps", "second.py"), STEP),
+        ])
+        self.assertTrue(discovery.is_nested())
+        names = [name for name in os.listdir(os.path.join(self.root,
+                "features")) if name.endswith((".py", ".feature"))]
+        self.assertEqual([os.path.basename(path) for path, kind in \
+                entries if path.count(os.path.sep) == 1 and \
+                path.startswith("features")], names)
+
+    def test_excludes(self):
+        """Test that excluded paths are ignored."""
+        discovery = Discovery(self.root, ["sub", "steps/*.py"])
+        self.assertEqual(sorted(discovery.find()), [
+                (os.path.join("features", "first.feature"), STORY),
+                (os.path.join("features", "first.py"), STEP),
+        ])
+
+    def test_manifest(self):
+        """Test that unmodified directories are read from the manifest."""
+        manifest = os.path.join(self.root, "__croissant_cache__",
+                "manifest")
+        self.age()
+        entries = Discovery(self.root, manifest=manifest).find()
+        self.assertTrue(os.path.exists(manifest))
+
+        # Nothing was modified, the manifest is used
+        discovery = Discovery(self.root, manifest=manifest)
+        self.assertEqual(discovery.find(), entries)
+        self.assertFalse(discovery.modified)
+        path, mtime, size, kind = discovery.updated["features"][1][0]
+        self.assertEqual(size, 0)
+
+        # A story is added
+        self.write("features/sub/third.feature")
+        discovery = Discovery(self.root, manifest=manifest)
+        self.assertIn((os.path.join("features", "sub", "third.feature"),
+                STORY), discovery.find())
+        self.assertTrue(discovery.modified)
+        self.assertEqual(sorted(discovery.directories), sorted(
+                discovery.updated))
@@ -0,0 +1,125 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Module containing the tests for the streaming parser."""
+
+import random
+import unittest
+
+from croissant.language.exceptions.syntax import MissingKeyword
+from croissant.story.parser import StoryParser
+from croissant.story.story import Story
+from croissant.story.tokenizer import *
+from croissant.tests.story.contents import *
+
+# Lines inserted in the generated stories
+LINES = ("Scenario: a scenario", "    Given a context", "    And another",
+        "    and", "    When it happens", "    Then it is true", "",
+        "Feature: a story", "  A description", "   Given more indented",
+        "        And much more", "    Whenever", "Given not indented",
+        "\tGiven a tabulation", "  \tWhen mixed", "# language: fr",
+        "# language: xx", "    Si ça arrive", "Scénario: un scénario")
+
+def generate(seed):
+    """Return the content of a story, with random modifications."""
+    generator = random.Random(seed)
+    lines = ["Feature: a story", "    Its description", ""]
+    for i in range(generator.randint(0, 3)):
+        lines += ["Scenario: number {}".format(i), "    Given a context",
+                "    And another", "    When it happens",
+                "    Then it is true", "    And it works", ""]
+
+    for i in range(generator.randint(0, 5)):
+        position = generator.randint(0, len(lines))
+        choice = generator.random()
+        if choice < 0.5:
+            lines.insert(position, generator.choice(LINES))
+        elif lines and choice < 0.8:
+            del lines[min(position, len(lines) - 1)]
+        elif lines:
+            position = min(position, len(lines) - 1)
+            lines[position] = generator.choice(" \t") + lines[position]
+
+    return "\n".join(lines)
+
+def describe(function, content):
+    """Parse the content and describe the story or the error."""
+    try:
+        story = function("story.feature", content)
+    except Exception as error:
+        return (type(error), str(error))
+
+    scenarios = [(scenario.title, scenario.contexts, scenario.event,
+            scenario.postconditions, scenario.start_at) for scenario in \
+            story.scenarios]
+    return (story.title, story.description, story.language, scenarios)
+
+class StoryParserTest(unittest.TestCase):
+
+    """Class to test (with unittest) the streaming parser.
+
+    The streaming parser should create the same stories, and raise the
+    same errors, as 'Story.parse'.
+
+    """
+
+    def test_tokens(self):
+        """Test that the tokenizer finds the kinds and indentation."""
+        tokens = list(Tokenizer(STORY))
+        self.assertEqual(tokens[0].kind, "story.title")
+        self.assertEqual(tokens[1].kind, TEXT)
+        self.assertEqual(tokens[1].indentation, "    ")
+        self.assertEqual(tokens[2].kind, BLANK)
+        self.assertEqual(tokens[4].kind, "scenario.given")
+        self.assertEqual(tokens[4].rest, "a first context")
+        self.assertEqual(tokens[4].line, 4)
+
+    def test_parse(self):
+        """Test that the stories are parsed like Story.parse does."""
+        for content in (STORY, FRENCH_STORY):
+            self.assertEqual(describe(StoryParser.parse, content),
+                    describe(Story.parse, content))
+
+    def test_missing_title(self):
+        """Test that both parsers report the line of a missing title."""
+        for content in ("Nope\n  desc\n", "# language: fr\nNope\n  desc\n"):
+            self.assertEqual(describe(StoryParser.parse, content),
+                    describe(Story.parse, content))
+
+        with self.assertRaises(MissingKeyword) as context:
+            StoryParser.parse("story.feature",
+                    "# language: fr\nNope\n  desc\n")
+
+        self.assertEqual(context.exception.line, 2)
+
+    def test_generated(self):
+        """Test both parsers on generated stories."""
+        for seed in range(2000):
+            content = generate(seed)
+            self.assertEqual(describe(StoryParser.parse, content),
+                    describe(Story.parse, content), content)
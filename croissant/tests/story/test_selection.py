@@ -0,0 +1,128 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Module containing the tests for tags and selections."""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from croissant.story.parser import StoryParser
+from croissant.story.selection import Selection
+from croissant.story.story import Story
+from croissant.story.story_set import StorySet
+from croissant.story.tags import TagExpression
+from croissant.tests.story.contents import *
+
+class SelectionTest(unittest.TestCase):
+
+    """Class to test (with unittest) tags and selections.
+
+    The following checks are done:
+        tags -- are the tags read by both engines?
+        expression -- are tag expressions evaluated?
+        filter -- are the scenarios filtered?
+        scan -- does the scan agree with the filter?
+        story_set -- are unselected files ignored?
+
+    """
+
+    def test_tags(self):
+        """Test that the tags are read by both engines."""
+        for parse in (Story.parse, StoryParser.parse):
+            story = parse("tagged.feature", TAGGED_STORY)
+            self.assertEqual(story.tags, ["web", "slow"])
+            self.assertEqual(story.description, "Its description")
+            self.assertEqual([scenario.tags for scenario in \
+                    story.scenarios], [["smoke"], [], ["smoke",
+                    "database"]])
+            self.assertEqual(story.scenarios[0].contexts, ["a user"])
+            self.assertEqual(story.scenarios[2].start_at, 16)
+
+    def test_expression(self):
+        """Test that tag expressions are evaluated."""
+        expression = TagExpression("@smoke and not (@database or @slow)")
+        self.assertTrue(expression.match({"smoke"}))
+        self.assertFalse(expression.match({"smoke", "slow"}))
+        self.assertFalse(expression.match(set()))
+        for invalid in ("", "smoke", "@smoke and", "(@smoke", "@a @b"):
+            self.assertRaises(ValueError, TagExpression, invalid)
+
+    def test_filter(self):
+        """Test that the scenarios are filtered."""
+        cases = (
+            (Selection(tags="@smoke"), ["the login", "the registration"]),
+            (Selection(tags="@web and not @database"), ["the login",
+                    "the logout"]),
+            (Selection(scenarios="log"), ["the login", "the logout"]),
+            (Selection(scenarios="^the l", tags="@smoke"), ["the login"]),
+            (Selection(tags="@unknown"), []),
+        )
+        for selection, titles in cases:
+            story = Story.parse("tagged.feature", TAGGED_STORY)
+            self.assertEqual(selection.filter(story), bool(titles))
+            self.assertEqual([scenario.title for scenario in \
+                    story.scenarios], titles)
+            self.assertEqual(selection.scan(TAGGED_STORY), bool(titles))
+
+    def test_scan(self):
+        """Test that the scan agrees with the filter."""
+        content = "# language: fr\n" + FRENCH_STORY.split("\n", 1)[1]
+        self.assertTrue(Selection(scenarios="^le premier").scan(content))
+        self.assertFalse(Selection(scenarios="^Scénario").scan(content))
+        self.assertFalse(Selection(tags="@smoke").scan(STORY))
+        self.assertTrue(Selection(tags="not @smoke").scan(STORY))
+
+    def test_story_set(self):
+        """Test that unselected files are ignored."""
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        for name, content in (("tagged.feature", TAGGED_STORY),
+                ("story.feature", STORY), ("invalid.feature", "Feature")):
+            with open(os.path.join(root, name), "w") as file:
+                file.write(content)
+
+        story_set = StorySet()
+        story_set.selection = Selection(tags="@smoke")
+        story_set.load(root)
+        self.addCleanup(sys.path.remove, root)
+        self.assertEqual(list(story_set.stories), ["tagged"])
+        self.assertEqual(len(story_set.stories["tagged"].scenarios), 2)
+
+        story_set = StorySet()
+        selection = Selection(["st*", "tag*", "unknown*"])
+        story_set.selection = selection
+        story_set.load(root)
+        self.addCleanup(sys.path.remove, root)
+        self.assertEqual(sorted(story_set.stories), ["story", "tagged"])
+        self.assertEqual(sorted(story_set.story_names), ["invalid", "story",
+                "tagged"])
+        self.assertEqual(selection.find_unknown(story_set.story_names),
+                ["unknown*"])
@@ -0,0 +1,165 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Module containing the tests for the story object."""
+
+import unittest
+
+from croissant.language.exceptions.syntax import *
+from croissant.story.story import Story
+from croissant.tests.story.contents import *
+
+def describe(story):
+    """Return a description of the story, to compare it."""
+    scenarios = [(scenario.title, scenario.contexts, scenario.event,
+            scenario.postconditions, scenario.start_at) for scenario in \
+            story.scenarios]
+    return (story.title, story.description, scenarios)
+
+class StoryTest(unittest.TestCase):
+
+    """Class to test (with unittest) the parsing of stories.
+
+    The following checks are done:
+        parse -- is the story correctly parsed?
+        update -- are only the modified parts parsed again?
+        language -- is the language header used?
+
+    """
+
+    def test_parse(self):
+        """Test that a story is correctly parsed."""
+        story = Story.parse("story.feature", STORY)
+        self.assertEqual(story.title, "a story to test")
+        self.assertEqual(story.description, "Its description")
+        self.assertEqual(len(story.scenarios), 3)
+        scenario = story.scenarios[1]
+        self.assertEqual(scenario.title, "the second scenario")
+        self.assertEqual(scenario.contexts, ["a context"])
+        self.assertEqual(scenario.event, "something else happens")
+        self.assertEqual(scenario.postconditions, [
+                "something else is true", "another thing is true"])
+        self.assertEqual(scenario.start_at, 10)
+
+    def check_update(self, first, removed, added):
+        """Modify STORY, update the story and compare it to a new one.
+
+        The 'removed' lines starting at 'first' are replaced by the
+        'added' ones.  Return the story and the previous scenarios.
+
+        """
+        lines = STORY.splitlines()
+        story = Story.parse("story.feature", lines)
+        scenarios = list(story.scenarios)
+        lines[first:first + removed] = added
+        story.update(lines, first, first + len(added), len(added) - removed)
+        expected = Story.parse("story.feature", lines)
+        self.assertEqual(describe(story), describe(expected))
+        return story, scenarios
+
+    def test_update_scenario(self):
+        """Test that only the modified scenario is parsed again."""
+        story, scenarios = self.check_update(10, 1,
+                ["    Given a modified context", "    And a new one"])
+        self.assertIs(story.scenarios[0], scenarios[0])
+        self.assertIsNot(story.scenarios[1], scenarios[1])
+        self.assertIs(story.scenarios[2], scenarios[2])
+        self.assertEqual(story.scenarios[2].start_at, 17)
+
+    def test_update_new_scenario(self):
+        """Test that a scenario can be added or removed."""
+        story, scenarios = self.check_update(9, 0, ["Scenario: new",
+                "    Given a context", "    When it happens",
+                "    Then it is true", ""])
+        self.assertEqual(len(story.scenarios), 4)
+        self.assertIs(story.scenarios[2], scenarios[1])
+        self.assertIs(story.scenarios[3], scenarios[2])
+        story, scenarios = self.check_update(9, 6, [])
+        self.assertEqual(len(story.scenarios), 2)
+        self.assertIs(story.scenarios[1], scenarios[2])
+        self.assertIsNone(scenarios[1].father)
+
+    def test_update_header(self):
+        """Test that the header can be modified."""
+        story, scenarios = self.check_update(0, 2, ["Feature: modified",
+                "    A new", "    description"])
+        self.assertEqual(story.description, "A new\ndescription")
+        self.assertIs(story.scenarios[0], scenarios[0])
+
+    def test_language(self):
+        """Test that the language header is used."""
+        story = Story.parse("story.feature", FRENCH_STORY)
+        self.assertEqual(story.language, "fr")
+        self.assertEqual(story.title, "une histoire en français")
+        scenario = story.scenarios[0]
+        self.assertEqual(scenario.contexts, ["un contexte",
+                "un second contexte"])
+        self.assertEqual(scenario.event, "quelque chose arrive")
+        self.assertEqual(scenario.start_at, 5)
+
+    def test_default_language(self):
+        """Test that the default language is used without header."""
+        content = FRENCH_STORY.split("\n", 1)[1]
+        story = Story.parse("story.feature", content, language="fr")
+        self.assertEqual(story.language, "fr")
+        self.assertEqual(len(story.scenarios), 1)
+        with self.assertRaises(MissingKeyword):
+            Story.parse("story.feature", content)
+
+    def test_unknown_language(self):
+        """Test that an unknown language is a syntax error."""
+        content = "# language: xx\n" + STORY
+        with self.assertRaises(LanguageSyntaxError) as context:
+            Story.parse("story.feature", content)
+
+        self.assertEqual(context.exception.line, 1)
+
+    def test_missing_title(self):
+        """Test that a missing title is reported after the header."""
+        with self.assertRaises(MissingKeyword) as context:
+            Story.parse("story.feature", "Nope\n  desc\n")
+
+        self.assertEqual(context.exception.line, 1)
+        with self.assertRaises(MissingKeyword) as context:
+            Story.parse("story.feature", "# language: fr\nNope\n  desc\n")
+
+        self.assertEqual(context.exception.line, 2)
+
+    def test_update_language(self):
+        """Test that changing the language parses every scenario."""
+        lines = FRENCH_STORY.splitlines()
+        story = Story.parse("story.feature", lines)
+        scenario = story.scenarios[0]
+        lines[0] = "# language: en"
+        with self.assertRaises(MissingKeyword):
+            story.update(lines, 0, 1)
+
+        lines[0] = "# language: FR"
+        story.update(lines, 0, 1)
+        self.assertEqual(story.language, "fr")
+        self.assertIsNot(story.scenarios[0], scenario)
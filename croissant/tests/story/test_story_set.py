@@ -0,0 +1,333 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Module containing the tests for the story set."""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from croissant.step.exceptions import StepNotFound
+
+from croissant.language.exceptions.syntax import *
+from croissant.story.story_set import StorySet
+from croissant.story.watcher import Watcher
+from croissant.tests.story.contents import *
+from croissant.tests.story.test_story import describe
+
+class StorySetTest(unittest.TestCase):
+
+    """Class to test (with unittest) the loading of story sets.
+
+    The following checks are done:
+        jobs -- are stories parsed in parallel loaded in order?
+        error -- is the first syntax error raised with its file?
+        collect_errors -- are all syntax errors collected?
+        lazy_steps -- are step modules imported only when needed?
+        refresh -- are changed steps and stories loaded again?
+        compile -- are the scenarios compiled before being run?
+        libraries -- are step libraries merged and shared by stories?
+
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.write("features/first.feature", STORY)
+        self.write("features/second.feature", FRENCH_STORY)
+        self.write("features/sub/third.feature", STORY.replace(
+                "a story to test", "a third story"))
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+        while self.root in sys.path:
+            sys.path.remove(self.root)
+
+    def write(self, path, content, mtime=None):
+        """Write a file in the root directory.
+
+        If the modification time is given, it is set on the file.
+
+        """
+        full_path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w") as file:
+            file.write(content)
+
+        if mtime is not None:
+            os.utime(full_path, (mtime, mtime))
+
+    def load(self, jobs):
+        """Load the root directory with the given number of jobs."""
+        story_set = StorySet()
+        story_set.jobs = jobs
+        story_set.load(self.root)
+        return story_set
+
+    def test_jobs(self):
+        """Test that stories parsed in parallel are loaded in order."""
+        sequential = self.load(1)
+        parallel = self.load(2)
+        self.assertEqual(list(parallel.stories), list(sequential.stories))
+        self.assertEqual(sorted(parallel.stories), ["first", "second",
+                "sub.third"])
+        for name, story in sequential.stories.items():
+            self.assertEqual(describe(parallel.stories[name]),
+                    describe(story))
+            self.assertEqual(parallel.stories[name].language, story.language)
+
+    def test_error(self):
+        """Test that the first syntax error is raised with its file."""
+        self.write("features/sub/wrong.feature", "Feature: wrong\n")
+        for jobs in (1, 2):
+            with self.assertRaises(StructureError) as context:
+                self.load(jobs)
+
+            error = context.exception
+            self.assertEqual(error.file, os.path.join("features", "sub",
+                    "wrong.feature"))
+            self.assertEqual(str(error), "File {}, line 2: the description " \
+                    "couldn't be read".format(repr(error.file)))
+
+    def test_collect_errors(self):
+        """Test that all the syntax errors are collected in order."""
+        self.write("features/sub/wrong.feature", "Feature: wrong\n")
+        self.write("features/empty.feature", "")
+        self.write("features/given.feature", "Feature: given\n  desc\n\n" \
+                "Scenario: truncated\n    Given a context\n")
+        self.write("features/when.feature", "Feature: when\n  desc\n\n" \
+                "Scenario: truncated\n    Given a context\n" \
+                "    And another\n    When it happens\n")
+        for jobs in (1, 2):
+            story_set = StorySet()
+            story_set.jobs = jobs
+            story_set.collect_errors = True
+            story_set.load(self.root)
+            errors = story_set.syntax_errors
+            self.assertEqual(sorted(type(error).__name__ for error in \
+                    errors), ["EmptyFile", "MissingKeyword",
+                    "MissingKeyword", "StructureError"])
+            missing = sorted((error.file, error.line) for error in errors \
+                    if isinstance(error, MissingKeyword))
+            self.assertEqual(missing, [
+                    (os.path.join("features", "given.feature"), 6),
+                    (os.path.join("features", "when.feature"), 8)])
+            self.assertEqual(sorted(story_set.stories), ["first", "second",
+                    "sub.third"])
+
+    def test_lazy_steps(self):
+        """Test that step modules are imported only when needed."""
+        root = os.path.join(self.root, "lazy")
+        self.addCleanup(sys.modules.pop, "lazy_used", None)
+        for name, content in (
+                ("lazy_used.feature", STORY),
+                ("lazy_used.py", "from croissant.step import *\n\n" \
+                        "class Used(BaseStep):\n    pass\n"),
+                ("lazy_unused.feature", STORY),
+                ("lazy_unused.py", "raise ImportError('imported')\n")):
+            self.write(os.path.join("lazy", name), content)
+
+        story_set = StorySet()
+        story_set.load(root)
+        self.addCleanup(sys.path.remove, root)
+        self.assertEqual(story_set.step_modules, {"lazy_used": "lazy_used",
+                "lazy_unused": "lazy_unused"})
+        self.assertEqual(story_set.steps, {})
+        with self.assertRaises(StepNotFound):
+            story_set.run_story("lazy_used")
+
+        self.assertEqual(list(story_set.steps), ["lazy_used"])
+        self.assertEqual(story_set.steps["lazy_used"].croissant_path,
+                "lazy_used")
+
+        # The import errors are collected when compiling
+        self.assertEqual(story_set.import_errors, {})
+        story_set.compile()
+        self.assertEqual(list(story_set.import_errors), ["lazy_unused"])
+        self.assertIsInstance(story_set.import_errors["lazy_unused"],
+                ImportError)
+
+    def test_refresh(self):
+        """Test that changed steps and stories are loaded again."""
+        root = os.path.join(self.root, "refresh")
+        self.addCleanup(sys.modules.pop, "refreshed", None)
+        steps = "from croissant.step import *\n\nclass {}(BaseStep):\n" \
+                "    pass\n"
+        self.write("refresh/refreshed.feature", STORY, 1000)
+        self.write("refresh/refreshed.py", steps.format("First"), 1000)
+        story_set = StorySet()
+        story_set.load(root)
+        self.addCleanup(sys.path.remove, root)
+        watcher = Watcher(story_set)
+        first = story_set.get_step("refreshed")
+        self.assertEqual(watcher.poll(), ([], []))
+
+        # The step module is reloaded, all the scenarios are affected
+        self.write("refresh/refreshed.py", steps.format("Second"), 2000)
+        changed, removed = watcher.poll()
+        self.assertEqual(changed, [("refreshed.py", "step")])
+        scenarios = story_set.refresh(changed, removed)
+        self.assertEqual(len(scenarios), 3)
+        second = story_set.get_step("refreshed")
+        self.assertIsNot(second, first)
+        self.assertEqual(second.__name__, "Second")
+        self.assertEqual(second.croissant_path, "refreshed")
+
+        # Only the modified scenario of the story is affected
+        self.write("refresh/refreshed.feature", STORY.replace(
+                "nothing happens", "something strange happens"), 3000)
+        scenarios = story_set.refresh(*watcher.poll())
+        self.assertEqual([(name, scenario.title) for name, scenario in \
+                scenarios], [("refreshed", "the third scenario")])
+        self.assertEqual(len(story_set.stories["refreshed"].scenarios), 3)
+
+        # The step module and the story change together
+        self.write("refresh/refreshed.py", steps.format("Third"), 4000)
+        self.write("refresh/refreshed.feature", STORY.replace(
+                "nothing happens", "something new happens"), 4000)
+        scenarios = story_set.refresh([("refreshed.py", "step"),
+                ("refreshed.feature", "story")])
+        story = story_set.stories["refreshed"]
+        self.assertEqual([scenario for name, scenario in scenarios],
+                story.scenarios)
+        self.assertEqual(scenarios[2][1].event, "something new happens")
+        self.assertEqual(story_set.get_step("refreshed").__name__, "Third")
+        watcher.files = watcher.take_snapshot()
+
+        # A story is added
+        self.write("refresh/added.feature", STORY, 5000)
+        scenarios = story_set.refresh(*watcher.poll())
+        self.assertEqual(len(scenarios), 3)
+        self.assertEqual(story_set.story_names, ["refreshed", "added"])
+
+        # The stories are removed
+        os.remove(os.path.join(root, "refreshed.feature"))
+        os.remove(os.path.join(root, "added.feature"))
+        self.assertEqual(story_set.refresh(*watcher.poll()), [])
+        self.assertEqual(story_set.stories, {})
+        self.assertEqual(story_set.story_names, [])
+
+    def test_compile(self):
+        """Test that the scenarios are compiled before being run."""
+        root = os.path.join(self.root, "compile")
+        self.addCleanup(sys.modules.pop, "compiled", None)
+        self.write("compile/compiled.feature", STORY)
+        self.write("compile/compiled.py", "from croissant.step import *\n\n"
+                "class Compiled(BaseStep):\n\n"
+                "    @context('(a|another) (.*)')\n"
+                "    def given(self, article, name):\n"
+                "        pass\n\n"
+                "    @context('a first')\n"
+                "    def first(self):\n"
+                "        pass\n\n"
+                "    @event('something (.*)happens')\n"
+                "    def when(self, what):\n"
+                "        self.what = what\n\n"
+                "    @postcondition('(.*) is true')\n"
+                "    def then(self, what):\n"
+                "        assert self.what\n")
+
+        story_set = StorySet()
+        story_set.load(root)
+        self.addCleanup(sys.path.remove, root)
+        errors = story_set.compile()
+        self.assertEqual([error.scenario.title for error in errors],
+                ["the third scenario"])
+        story = story_set.stories["compiled"]
+        plan = story_set.plans[story.scenarios[1]]
+        self.assertEqual([call[0] for call in plan.calls], ["given",
+                "when", "then", "then"])
+        self.assertEqual(plan.calls[1][2], ("else ", ))
+        self.assertNotIn(story.scenarios[2], story_set.plans)
+        story_set.run_scenario("compiled", story.scenarios[1])
+        with self.assertRaises(StepNotFound):
+            story_set.run_scenario("compiled", story.scenarios[2])
+
+        ambiguous = story_set.find_ambiguous()
+        self.assertEqual([(line, [name for expression, name in matches]) \
+                for scenario, line, matches in ambiguous], [
+                ("a first context", ["given", "first"])])
+
+    def test_libraries(self):
+        """Test that step libraries are merged and shared by stories."""
+        root = os.path.join(self.root, "libraries")
+        for module in ("library", "shopping", "paying"):
+            self.addCleanup(sys.modules.pop, module, None)
+
+        story = "Feature: a story\n    Its description\n\n" \
+                "Scenario: a scenario\n" \
+                "    Given a user named alice\n" \
+                "    And a cart with 3 items\n" \
+                "    When the user buys the cart\n" \
+                "    Then 3 items are bought\n"
+        files = (
+            ("library.py", "from croissant.step import *\n\n"
+                    "class Login(BaseStep):\n\n"
+                    "    @context('a user named {name:word}')\n"
+                    "    def given(self, name):\n"
+                    "        self.user = name\n\n"
+                    "class Cart(BaseStep):\n\n"
+                    "    @context('a cart with {count:int} items')\n"
+                    "    def given(self, count):\n"
+                    "        self.items = count\n\n"
+                    "    @event('the user buys the cart')\n"
+                    "    def buy(self):\n"
+                    "        self.bought = self.items\n\n"
+                    "    @postcondition('{count:int} items are bought')\n"
+                    "    def then(self, count):\n"
+                    "        self.assertEqual(self.bought, count)\n"),
+            ("shopping.feature", story),
+            ("shopping.py", "from library import Login, Cart\n\n"
+                    "croissant_steps = [Login, Cart]\n"),
+            ("paying.feature", story),
+            ("paying.py", "from library import *\n\n"
+                    "croissant_steps = (Login, Cart)\n"),
+        )
+        for name, content in files:
+            self.write(os.path.join("libraries", name), content)
+
+        story_set = StorySet()
+        story_set.load(root)
+        self.addCleanup(sys.path.remove, root)
+        self.assertEqual(story_set.compile(static=True), [])
+        self.assertIs(story_set.get_static_step("shopping"),
+                story_set.get_static_step("paying"))
+        self.assertEqual(story_set.compile(), [])
+        self.assertIs(story_set.get_step("shopping"),
+                story_set.get_step("paying"))
+        story_set.run_story("shopping")
+        story_set.run_story("paying")
+
+        # The stories using a modified library are affected
+        with open(os.path.join(root, "library.py"), "a") as file:
+            file.write("\n")
+        affected = story_set.refresh([("library.py", "step")])
+        self.assertEqual(sorted(name for name, scenario in affected),
+                ["paying", "shopping"])
+        self.assertEqual(story_set.steps, {})
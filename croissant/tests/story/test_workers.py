@@ -0,0 +1,161 @@
+# Copyright (c) 2013 LE GOFF Vincent
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+# * Neither the name of the copyright holder nor the names of its contributors
+#   may be used to endorse or promote products derived from this software
+#   without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT
+# OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Module containing the tests for the worker processes."""
+
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from croissant.step.exceptions import *
+from croissant.story.story_set import StorySet
+from croissant.story.workers import *
+
+STORY = """Feature: a story run in workers
+    Its description
+
+Scenario: a passing scenario
+    Given a number 3
+    When I square it
+    Then I get 9
+
+Scenario: a failing scenario
+    Given a number 3
+    When I square it
+    Then I get 8
+
+Scenario: a broken scenario
+    Given a number 3
+    When I break it
+    Then I get 9
+
+Scenario: an undefined scenario
+    Given a number 3
+    When I cube it
+    Then I get 27
+"""
+
+STEPS = """from croissant.step import *
+
+class Square(BaseStep):
+
+    @context("a number {number:int}")
+    def given(self, number):
+        self.number = number
+
+    @event("I square it")
+    def square(self):
+        self.number = self.number ** 2
+
+    @event("I break it")
+    def crash(self):
+        raise KeyError("broken")
+
+    @postcondition("I get {result:int}")
+    def then(self, result):
+        self.assertEqual(self.number, result)
+"""
+
+class WorkersTest(unittest.TestCase):
+
+    """Class to test (with unittest) the worker processes.
+
+    The following checks are done:
+        fork -- are the results of forked workers the same?
+        spawn -- are the results of started workers the same?
+        errors -- are the errors created again from the results?
+
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        for name in ("worked_{}".format(i) for i in range(3)):
+            with open(os.path.join(self.root, name + ".feature"), "w") as \
+                    file:
+                file.write(STORY)
+            with open(os.path.join(self.root, name + ".py"), "w") as file:
+                file.write(STEPS)
+            self.addCleanup(sys.modules.pop, name, None)
+
+        self.story_set = StorySet()
+        self.story_set.load(self.root)
+        self.addCleanup(sys.path.remove, self.root)
+        self.story_set.compile()
+
+    def get_expected(self):
+        """Return the results of the scenarios run in this process."""
+        return [(story_name, scenario, run_scenario(self.story_set,
+                story_name, scenario)) for story_name, story in \
+                self.story_set.stories.items() for scenario in \
+                story.scenarios]
+
+    def check_results(self, results):
+        """Check the results of the worker processes."""
+        expected = self.get_expected()
+        self.assertEqual(len(results), 12)
+        for (story_name, scenario, result), (expected_name,
+                expected_scenario, expected_result) in zip(results,
+                expected):
+            self.assertEqual(story_name, expected_name)
+            self.assertIs(scenario, expected_scenario)
+            self.assertEqual(result[:2], expected_result[:2])
+            self.assertEqual(result[4], expected_result[4])
+
+        self.assertEqual([result[0] for name, scenario, result in \
+                results[:4]], [SUCCESS, FAILURE, ERROR, NOT_FOUND])
+
+    def test_fork(self):
+        """Test that the results of forked workers are the same."""
+        if "fork" not in multiprocessing.get_all_start_methods():
+            self.skipTest("processes cannot be forked")
+
+        self.check_results(list(run_parallel(self.story_set, 2, "fork")))
+
+    def test_spawn(self):
+        """Test that the results of started workers are the same."""
+        self.check_results(list(run_parallel(self.story_set, 2, "spawn")))
+
+    def test_errors(self):
+        """Test that the errors are created again from the results."""
+        results = self.get_expected()[:4]
+        errors = [rebuild_error(scenario, result) for story_name,
+                scenario, result in results]
+        self.assertIsNone(errors[0])
+        self.assertIsInstance(errors[1], StepAssertionError)
+        self.assertIs(errors[1].scenario, results[1][1])
+        self.assertEqual(str(errors[1]), "Step worked_0: 9 != 8")
+        self.assertIsInstance(errors[2], RemoteError)
+        self.assertEqual((errors[2].error_type, str(errors[2])),
+                ("KeyError", "'broken'"))
+        self.assertIsInstance(errors[3], StepNotFound)
+        self.assertIn("'I cube it'", errors[3].message)
+        self.assertIn("KeyError", results[2][2][2])
@@ -2,14 +2,14 @@ from croissant.step import *
 
 class Square(BaseStep):
 
-    @context("a number (\d+)")
+    @context("a number {number:int}")
     def init(self, number):
-        self.number = int(number)
+        self.number = number
 
     @event("I square it")
     def square(self):
         self.number = self.number ** 2
 
-    @postcondition("I get (\d+)")
+    @postcondition("I get {compare:int}")
     def result(self, compare):
-        self.assertEqual(self.number, int(compare))
+        self.assertEqual(self.number, compare)